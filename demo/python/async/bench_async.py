@@ -0,0 +1,39 @@
+"""
+Throughput of a synchronous and of an asyncio business operation.
+
+Both operations fetch PATHS paths from the local stand-in HTTP server
+(http_server.py, DELAY seconds per request) for each message. FetchBO
+fetches them one after the other, AsyncFetchBO awaits them all at once on
+the event loop of the job, reusing its keep-alive connections from one
+message to the next.
+
+Run it inside an IRIS instance with embedded python :
+    python3 bench_async.py
+"""
+import time
+
+import http_server
+from bo import FetchBO, AsyncFetchBO
+from msg import FetchRequest
+
+MESSAGES = 20
+PATHS = 10
+
+def bench(operation):
+    operation._dispatch_on_init(None)
+    request = FetchRequest(paths=[f"/item/{i}" for i in range(PATHS)])
+    start = time.perf_counter()
+    for _ in range(MESSAGES):
+        operation._dispatch_on_message(request)
+    elapsed = time.perf_counter() - start
+    operation._dispatch_on_tear_down()
+    return MESSAGES / elapsed
+
+if __name__ == '__main__':
+    server = http_server.start()
+    sync = bench(FetchBO())
+    asynchronous = bench(AsyncFetchBO())
+    server.shutdown()
+    print(f"{PATHS} calls of {http_server.DELAY}s per message")
+    print(f"sync operation  : {sync:.1f} messages/s")
+    print(f"async operation : {asynchronous:.1f} messages/s")
@@ -0,0 +1,68 @@
+"""
+Throughput of the HttpOutboundAdapter against ad-hoc HTTP calls.
+
+Against the local stand-in HTTP server (http_server.py):
+- without delay, REQUESTS calls opening a new connection each (urlopen, as
+  an ad-hoc requests.get does), then the same calls on the keep-alive
+  connections of the adapter,
+- with a delay of DELAY seconds per call, FAN_OUT calls one after the
+  other on the adapter, then sent at once with request_many.
+
+Run it inside an IRIS instance with embedded python :
+    python3 bench_http_adapter.py
+"""
+import time
+import urllib.request
+
+import http_server
+from grongier.pex import HttpOutboundAdapter
+
+REQUESTS = 500
+FAN_OUT = 40
+DELAY = 0.05
+
+def bench(function, count):
+    start = time.perf_counter()
+    function()
+    return count / (time.perf_counter() - start)
+
+def new_connections(base_url):
+    for i in range(REQUESTS):
+        with urllib.request.urlopen(f"{base_url}item/{i}") as response:
+            response.read()
+
+def keep_alive(adapter):
+    for i in range(REQUESTS):
+        adapter.get(f"item/{i}")
+
+def sequential(adapter):
+    for i in range(FAN_OUT):
+        adapter.get(f"item/{i}")
+
+def fan_out(adapter):
+    adapter.request_many([('GET', f"item/{i}") for i in range(FAN_OUT)])
+
+if __name__ == '__main__':
+    server = http_server.start()
+    base_url = f"http://127.0.0.1:{http_server.PORT}/"
+    adapter = HttpOutboundAdapter()
+    adapter.base_url = base_url
+
+    http_server.DELAY = 0
+    fresh = bench(lambda: new_connections(base_url), REQUESTS)
+    pooled = bench(lambda: keep_alive(adapter), REQUESTS)
+
+    http_server.DELAY = DELAY
+    one_by_one = bench(lambda: sequential(adapter), FAN_OUT)
+    concurrent = bench(lambda: fan_out(adapter), FAN_OUT)
+    stats = adapter.pool_stats()
+    adapter._dispatch_on_tear_down()
+    server.shutdown()
+
+    print(f"{REQUESTS} calls without delay")
+    print(f"new connection per call : {fresh:.0f} calls/s")
+    print(f"keep-alive pool         : {pooled:.0f} calls/s")
+    print(f"{FAN_OUT} calls of {DELAY}s, {adapter.max_concurrency} threads, {adapter.pool_size} connections")
+    print(f"one after the other     : {one_by_one:.1f} calls/s")
+    print(f"request_many            : {concurrent:.1f} calls/s")
+    print(f"pool: {stats}")
@@ -1,6 +1,8 @@
 from grongier.pex import BusinessOperation
-from msg import MyMessage
+from msg import MyMessage, FetchResponse
+from http_client import AsyncHttpClient, HttpClient
 
+import asyncio
 import time
 
 class MyBO(BusinessOperation):
@@ -9,4 +11,33 @@ class MyBO(BusinessOperation):
         time.sleep(1)
         return MyMessage(message=f"Hello, {request.message}")
 
-        
\ No newline at end of file
+class FetchBO(BusinessOperation):
+    """ Fetch the paths of the request one after the other."""
+
+    host = "127.0.0.1"
+    port = 8765
+
+    def on_init(self):
+        self.client = HttpClient(self.host, int(self.port))
+
+    def on_message(self, request):
+        return FetchResponse(results=[self.client.get(path) for path in request.paths])
+
+    def on_tear_down(self):
+        self.client.close()
+
+class AsyncFetchBO(BusinessOperation):
+    """ Fetch all the paths of the request at once, on the event loop of the job."""
+
+    host = "127.0.0.1"
+    port = 8765
+
+    def on_init(self):
+        self.client = AsyncHttpClient(self.host, int(self.port))
+
+    async def on_message(self, request):
+        results = await asyncio.gather(*(self.client.get(path) for path in request.paths))
+        return FetchResponse(results=list(results))
+
+    def on_tear_down(self):
+        self.client.close()
@@ -22,3 +22,16 @@ class MyBP(BusinessProcess):
         self.log_info(f"Received response two: {self.response_two.message}")
 
 
+
+class MyAsyncBP(BusinessProcess):
+    """ MyBP written as a coroutine, the job is released while the responses are on their way.
+    The coroutine is replayed from the beginning when responses arrive, see the limits of the replay in the README."""
+
+    async def on_message(self, request):
+        response_one, response_two = await self.gather(
+            self.call("Python.MyBO", MyMessage(message="Message1")),
+            self.call("Python.MyBO", MyMessage(message="Message2")))
+        response_three = await self.call("Python.MyBO", MyMessage(message=response_one.message))
+        self.log_info(f"Received response one: {response_one.message}")
+        self.log_info(f"Received response two: {response_two.message}")
+        self.log_info(f"Received response three: {response_three.message}")
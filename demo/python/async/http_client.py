@@ -0,0 +1,47 @@
+"""
+Minimal HTTP/1.1 clients for the async demo, standard library only.
+
+AsyncHttpClient keeps its connections open between the requests and the
+messages: it lives as long as the operation, and the event loop of the job
+is kept across the calls.
+"""
+import asyncio
+import http.client
+import json
+
+class AsyncHttpClient:
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.idle = []
+
+    async def get(self, path):
+        reader, writer = self.idle.pop() if self.idle else await asyncio.open_connection(self.host, self.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode())
+        await writer.drain()
+        headers = await reader.readuntil(b'\r\n\r\n')
+        length = 0
+        for line in headers.split(b'\r\n'):
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':', 1)[1])
+        body = await reader.readexactly(length)
+        self.idle.append((reader, writer))
+        return json.loads(body)
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+class HttpClient:
+
+    def __init__(self, host, port):
+        self.connection = http.client.HTTPConnection(host, port)
+
+    def get(self, path):
+        self.connection.request('GET', path)
+        return json.loads(self.connection.getresponse().read())
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,45 @@
+"""
+Local stand-in for a slow HTTP API, used by the async demo.
+
+Every GET answers {"path": ..., "delay": ...} after DELAY seconds, with
+HTTP/1.1 keep-alive so that the clients can reuse their connections.
+
+    python3 http_server.py [port]
+"""
+import json
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DELAY = 0.05
+PORT = 8765
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(DELAY)
+        body = json.dumps({'path': self.path, 'delay': DELAY}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start(port=PORT):
+    """ Start the server in a daemon thread and return it."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    print(f"serving on http://127.0.0.1:{port} with a delay of {DELAY}s")
+    ThreadingHTTPServer(('127.0.0.1', port), SlowHandler).serve_forever()
@@ -3,4 +3,12 @@ from dataclasses import dataclass
 
 @dataclass
 class MyMessage(Message):
-    message : str = None
\ No newline at end of file
+    message : str = None
+
+@dataclass
+class FetchRequest(Message):
+    paths : list = None
+
+@dataclass
+class FetchResponse(Message):
+    results : list = None
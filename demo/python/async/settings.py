@@ -1,7 +1,10 @@
-from bo import MyBO
-from bp import MyBP
+from bo import MyBO, FetchBO, AsyncFetchBO
+from bp import MyBP, MyAsyncBP
 
 CLASSES = {
     "Python.MyBO": MyBO,
     "Python.MyBP": MyBP,
+    "Python.MyAsyncBP": MyAsyncBP,
+    "Python.FetchBO": FetchBO,
+    "Python.AsyncFetchBO": AsyncFetchBO,
 }
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Micro-benchmark of the per-call overhead of the serializer decorators.
+
+Time an empty on_message round trip (deserialize the request, dispatch,
+serialize the response) with the previous bridge (decorators, bases walked
+and _IsA called on every message, linear scan of DISPATCH) and with the
+cached dispatch tables.
+
+Run it inside an IRIS instance with embedded python :
+    python3 bench_bridge.py
+"""
+import dataclasses
+import time
+
+from inspect import signature
+
+from grongier.pex import BusinessOperation
+
+from msg import MyBench
+
+N = 10_000
+
+class EmptyOperation(BusinessOperation):
+
+    def on_message(self, request):
+        return None
+
+def legacy_input_deserialzer(fonction):
+    """ input_deserialzer as it was before the dispatch tables."""
+    def dispatch_deserializer(self,*params, **param2):
+        serialized=[]
+        for param in params:
+            serialized.append(self._dispatch_deserializer(param))
+        for key, value in param2.items():
+            param2[key] = self._dispatch_deserializer(value)
+        return fonction(self,*serialized, **param2)
+    return dispatch_deserializer
+
+def legacy_output_serialzer(fonction):
+    """ output_serialzer as it was before the dispatch tables."""
+    def dispatch_serializer(self,*params, **param2):
+        return self._dispatch_serializer(fonction(self,*params, **param2))
+    return dispatch_serializer
+
+class LegacyEmptyOperation(EmptyOperation):
+    """ The bridge as it was before the dispatch tables: the decorators, the serializer and deserializer
+    lookups (bases walked and _IsA called on every message) and the dispatch on the DISPATCH list.
+    The bodies are encoded and decoded by the same code in both operations, only the lookups differ."""
+
+    DISPATCH = []
+
+    @legacy_input_deserialzer
+    @legacy_output_serialzer
+    def _dispatch_on_message(self, request):
+        return self._dispach_message(request)
+
+    def _dispatch_serializer(self, message):
+        if (message is not None and self._is_message_class(type(message))):
+            if not dataclasses.is_dataclass(message):
+                raise TypeError()
+            return self._serialize_message(message)
+        elif (message is not None and self._is_pickel_message_class(type(message))):
+            return self._serialize_pickle_message(message)
+        elif (message is not None and self._is_iris_object_instance(message)):
+            return message
+        elif (message is None or message == ""):
+            return message
+        raise TypeError()
+
+    def _dispatch_deserializer(self, serial):
+        if (serial is not None and type(serial).__module__.find('iris') == 0) and serial._IsA("Grongier.PEX.Message"):
+            return self._deserialize_message(serial)
+        elif (serial is not None and type(serial).__module__.find('iris') == 0) and serial._IsA("Grongier.PEX.PickleMessage"):
+            return self._deserialize_pickle_message(serial)
+        return serial
+
+    def _dispach_message(self, request):
+        call = 'on_message'
+        module = request.__class__.__module__
+        classname = request.__class__.__name__
+        for msg,method in self.DISPATCH:
+            if msg == module+"."+classname:
+                call = method
+        return getattr(self,call)(request)
+
+    def _create_dispatch(self):
+        if len(self.DISPATCH) == 0:
+            method_list = [func for func in dir(self) if callable(getattr(self, func)) and not func.startswith("_")]
+            for method in method_list:
+                try:
+                    param = signature(getattr(self, method)).parameters
+                except ValueError:
+                    param=''
+                if (len(param)==1):
+                    annotation = str(param[list(param)[0]].annotation)
+                    i = annotation.find("'")
+                    j = annotation.rfind("'")
+                    if j == -1:
+                        j = None
+                    self.DISPATCH.append((annotation[i+1:j],method))
+        return
+
+def bench(operation, serial):
+    operation._dispatch_on_init(None)
+    start = time.perf_counter()
+    for _ in range(N):
+        operation._dispatch_on_message(serial)
+    return (time.perf_counter() - start) / N * 1_000_000
+
+if __name__ == '__main__':
+    serial = EmptyOperation()._serialize_message(MyBench('value'))
+    legacy = bench(LegacyEmptyOperation(), serial)
+    cached = bench(EmptyOperation(), serial)
+    print(f"legacy bridge : {legacy:.2f} us per call")
+    print(f"cached bridge : {cached:.2f} us per call")
@@ -0,0 +1,59 @@
+"""
+Benchmark of the DataFrame and ndarray fields of the messages.
+
+Compare the json path ('dataframe:' + to_json(orient="table") and read_json)
+with the binary side payload (Arrow IPC when pyarrow is installed, NumPy
+buffers otherwise) on the size of the payload and the time to write and read it.
+
+It needs pandas and numpy, pyarrow is optional :
+    python3 bench_columnar.py
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from grongier.pex._columnar import _Columnar
+from grongier.pex._message_codec import JsonCodec
+from grongier.pex._utils import _Utils
+
+ROWS = [1_000, 50_000, 500_000]
+
+def dataframe(rows):
+    return pd.DataFrame({
+        'id': np.arange(rows),
+        'value': np.random.random(rows),
+        'flag': np.random.random(rows) > 0.5,
+        'created': pd.date_range('2023-01-01', periods=rows, freq='s'),
+    })
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def json_path(codec, dikt):
+    body, write = timed(codec.dumps, dikt)
+    result, read = timed(codec.loads, body)
+    return result['df'], len(body.encode()), write, read
+
+def columnar_path(codec, dikt):
+    def write(dikt):
+        dikt, frames = _Columnar.encode(dikt)
+        return codec.dumps(dikt), b''.join(_Utils.pack_frames(frames))
+    def read(body, payload):
+        return _Columnar.decode(codec.loads(body), _Utils.unpack_frames(payload))
+    (body, payload), write_time = timed(write, dikt)
+    result, read_time = timed(read, body, payload)
+    return result['df'], len(body.encode()) + len(payload), write_time, read_time
+
+if __name__ == '__main__':
+    codec = JsonCodec()
+    print(f"{'rows':>8} {'json size':>12} {'json write':>11} {'json read':>10} {'binary size':>12} {'binary write':>13} {'binary read':>12}")
+    for rows in ROWS:
+        dikt = {'name': 'bench', 'df': dataframe(rows)}
+        df, json_size, json_write, json_read = json_path(codec, dikt)
+        assert len(df) == rows
+        df, size, write, read = columnar_path(codec, dikt)
+        assert df.equals(dikt['df'])
+        print(f"{rows:>8} {json_size:>12} {json_write:>11.4f} {json_read:>10.4f} {size:>12} {write:>13.4f} {read:>12.4f}")
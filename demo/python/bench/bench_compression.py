@@ -0,0 +1,54 @@
+"""
+Benchmark of the compression of the message bodies.
+
+Report the compression ratio and the CPU time to compress and decompress
+json bodies with zlib, zlib with a preset dictionary and lzma, from small
+repetitive messages to large documents.
+
+It only needs the standard library and grongier.pex :
+    python3 bench_compression.py
+"""
+import json
+import random
+import time
+
+from grongier.pex._compression import _Compression
+
+SIZES = [200, 2_000, 100_000, 1_000_000]
+ROUNDS = 20
+
+def record(i):
+    return {
+        "id": i,
+        "status": random.choice(["NEW", "PENDING", "DONE"]),
+        "patient": {"name": f"patient-{random.randint(0, 10_000)}", "city": random.choice(["Paris", "Boston", "Lyon"])},
+        "amount": round(random.random() * 1000, 2),
+    }
+
+def body(size):
+    records = []
+    text = "[]"
+    while len(text) < size:
+        records.append(record(len(records)))
+        text = json.dumps(records)
+    return text.encode()
+
+def timed(function, *args, **kwargs):
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        result = function(*args, **kwargs)
+    return result, (time.process_time() - start) / ROUNDS
+
+if __name__ == '__main__':
+    random.seed(0)
+    zdict = _Compression.build_dict(body(200) for _ in range(200))
+    methods = [("zlib", None), ("zlib+dict", zdict), ("lzma", None)]
+    print(f"{'size':>10} {'method':>10} {'ratio':>7} {'compress ms':>12} {'decompress ms':>14}")
+    for size in SIZES:
+        data = body(size)
+        for name, dictionary in methods:
+            method = name.split('+')[0]
+            compressed, compress = timed(_Compression.compress, data, method, zdict=dictionary)
+            result, decompress = timed(_Compression.decompress, compressed, method, zdict=dictionary)
+            assert result == data
+            print(f"{len(data):>10} {name:>10} {len(data) / len(compressed):>7.2f} {compress * 1000:>12.3f} {decompress * 1000:>14.3f}")
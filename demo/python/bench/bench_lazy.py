@@ -0,0 +1,40 @@
+"""
+Benchmark of the lazy deserialization of the messages.
+
+Decode the same message N times eagerly and lazily, when the handler reads
+no field (like a response ignored by bp.py), one field, or all of them.
+
+Run it inside an IRIS instance with embedded python :
+    python3 bench_lazy.py
+"""
+import time
+
+from grongier.pex._business_host import _BusinessHost
+
+from msg import MyBench
+
+N = 10_000
+
+def no_field(msg):
+    return None
+
+def one_field(msg):
+    return msg.property_name_0
+
+def all_fields(msg):
+    return [getattr(msg, f'property_name_{i}') for i in range(10)]
+
+def bench(host, serial, access):
+    start = time.perf_counter()
+    for _ in range(N):
+        access(host._dispatch_deserializer(serial))
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    eager = _BusinessHost()
+    lazy = _BusinessHost()
+    lazy.lazy = True
+    serial = eager._serialize_message(MyBench(*[f'value_{i}' * 10 for i in range(10)]))
+    print(f"{'access':>10} {'eager':>8} {'lazy':>8}")
+    for access in [no_field, one_field, all_fields]:
+        print(f"{access.__name__:>10} {bench(eager, serial, access):>8.4f} {bench(lazy, serial, access):>8.4f}")
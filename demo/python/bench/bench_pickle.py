@@ -0,0 +1,45 @@
+"""
+Benchmark of the PickleMessage storage formats.
+
+Compare the base64 character stream with the binary stream (pickle protocol 5,
+buffers out-of-band) for messages holding a bytearray field.
+
+Run it inside an IRIS instance with embedded python :
+    python3 bench_pickle.py
+"""
+import time
+
+from dataclasses import dataclass
+
+from grongier.pex import PickleMessage
+from grongier.pex._business_host import _BusinessHost
+
+SIZES = [1_000, 100_000, 1_000_000, 10_000_000, 100_000_000]
+
+@dataclass
+class BinaryMessage(PickleMessage):
+    name:str = None
+    payload:bytearray = None
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def bench(host, message):
+    serial, write = timed(host._serialize_pickle_message, message)
+    result, read = timed(host._deserialize_pickle_message, serial)
+    assert result.payload == message.payload
+    stream = serial.jbin if host.pickle_binary else serial.jstr
+    return write, read, stream.Size
+
+if __name__ == '__main__':
+    legacy = _BusinessHost()
+    binary = _BusinessHost()
+    binary.pickle_binary = True
+    print(f"{'size':>10} {'base64 write':>13} {'base64 read':>12} {'base64 size':>12} {'binary write':>13} {'binary read':>12} {'binary size':>12}")
+    for size in SIZES:
+        message = BinaryMessage('bench', bytearray(range(256)) * (size // 256))
+        legacy_write, legacy_read, legacy_size = bench(legacy, message)
+        binary_write, binary_read, binary_size = bench(binary, message)
+        print(f"{size:>10} {legacy_write:>13.4f} {legacy_read:>12.4f} {legacy_size:>12} {binary_write:>13.4f} {binary_read:>12.4f} {binary_size:>12}")
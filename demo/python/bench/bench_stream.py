@@ -0,0 +1,55 @@
+"""
+Benchmark of the stream helpers of grongier.pex._utils.
+
+Compare the previous implementation (string concatenation on read, list of
+chunks on write) with the chunked one for payloads from 1 KB to 100 MB.
+
+Run it inside an IRIS instance with embedded python :
+    python3 bench_stream.py
+"""
+import time
+
+import iris
+
+from grongier.pex._utils import _Utils
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000]
+
+def legacy_stream_to_string(stream) -> str:
+    string = ""
+    stream.Rewind()
+    while not stream.AtEnd:
+        string += stream.Read(4092)
+    return string
+
+def legacy_string_to_stream(string:str):
+    stream = iris.cls('%Stream.GlobalCharacter')._New()
+    n = 4092
+    chunks = [string[i:i+n] for i in range(0, len(string), n)]
+    for chunk in chunks:
+        stream.Write(chunk)
+    return stream
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def human(size):
+    for unit in ['B', 'KB', 'MB']:
+        if size < 1000:
+            return f"{size}{unit}"
+        size //= 1000
+    return f"{size}GB"
+
+if __name__ == '__main__':
+    print(f"{'size':>8} {'legacy write':>14} {'legacy read':>14} {'write':>10} {'read':>10}")
+    for size in SIZES:
+        payload = 'x' * size
+        stream, legacy_write = timed(legacy_string_to_stream, payload)
+        result, legacy_read = timed(legacy_stream_to_string, stream)
+        assert result == payload
+        stream, write = timed(_Utils.string_to_stream, payload)
+        result, read = timed(_Utils.stream_to_string, stream)
+        assert result == payload
+        print(f"{human(size):>8} {legacy_write:>14.4f} {legacy_read:>14.4f} {write:>10.4f} {read:>10.4f}")
@@ -2,6 +2,7 @@ from grongier.pex import InboundAdapter,OutboundAdapter
 import requests
 import iris
 import json
+import smtplib
 
 class RedditInboundAdapter(InboundAdapter):
     """
@@ -69,3 +70,24 @@ class TestHeartBeat(OutboundAdapter):
 
     def on_task(self):
         self.log_info('on_task')
+
+class SmtpOutboundAdapter(OutboundAdapter):
+    """
+    This adapter keeps its SMTP connections open in the connection pool
+    instead of opening one per mail.
+    """
+    host = 'localhost'
+    port = 1025
+
+    def create_connection(self):
+        return smtplib.SMTP(self.host, int(self.port))
+
+    def check_connection(self, connection):
+        return connection.noop()[0] == 250
+
+    def close_connection(self, connection):
+        connection.quit()
+
+    def send_mail(self, sender, receivers, text):
+        with self.connection() as server:
+            server.sendmail(sender, receivers, text)
@@ -32,6 +32,27 @@ class EmailOperation(BusinessOperation):
             server.sendmail(sender, receivers, msg.as_string())
             print("Successfully sent email")
 
+class EmailOperationWithPool(BusinessOperation):
+    """
+    This operation sends the same email as EmailOperation, through the
+    SmtpOutboundAdapter which reuses its SMTP connections from one message to the next
+    """
+    def get_adapter_type():
+        """
+        Name of the registred Adapter
+        """
+        return "Python.SmtpOutboundAdapter"
+
+    def on_message(self, request):
+        msg = MIMEText('This is test mail')
+
+        msg['Subject'] = request.found+" found"
+        msg['From'] = 'admin@example.com'
+        msg['To'] = request.to_email_address
+
+        self.adapter.send_mail('admin@example.com', [ request.to_email_address ], msg.as_string())
+        self.log_info(f"Successfully sent email, pool: {self.adapter.pool_stats()}")
+
 class EmailOperationWithIrisAdapter(BusinessOperation):
     """
     This operation receive a PostMessage and send an email with all the
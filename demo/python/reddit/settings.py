@@ -5,6 +5,8 @@ CLASSES = {
     "Python.FileOperationWithIrisAdapter": bo.FileOperationWithIrisAdapter,
     "Python.EmailOperation": bo.EmailOperation,
     "Python.EmailOperationWithIrisAdapter": bo.EmailOperationWithIrisAdapter,
+    "Python.EmailOperationWithPool": bo.EmailOperationWithPool,
+    "Python.SmtpOutboundAdapter": adapter.SmtpOutboundAdapter,
     "Python.RedditService": bs.RedditService,
     "Python.RedditServiceWithIrisAdapter": bs.RedditServiceWithIrisAdapter,
     "Python.RedditServiceWithPexAdapter": bs.RedditServiceWithPexAdapter,
@@ -3,22 +3,35 @@ from grongier.pex._business_process import _BusinessProcess
 from grongier.pex._private_session_duplex import _PrivateSessionDuplex
 from grongier.pex._private_session_process import _PrivateSessionProcess
 from grongier.pex._business_operation import _BusinessOperation
+from grongier.pex._batch_business_operation import _BatchBusinessOperation, _BatchItemError
 from grongier.pex._inbound_adapter import _InboundAdapter
 from grongier.pex._outbound_adapter import _OutboundAdapter
+from grongier.pex._http_outbound_adapter import _HttpOutboundAdapter, _HttpResponse
 from grongier.pex._message import _Message
 from grongier.pex._pickle_message import _PickleMessage
 from grongier.pex._director import _Director
 from grongier.pex._utils import _Utils
+from grongier.pex._business_host import RequestError
+from grongier.pex._logging import _LogHandler
+from grongier.pex._connection_pool import _ConnectionPool
+from grongier.pex._message_codec import _MessageCodec, register_codec, get_codec
 
 class Utils(_Utils): pass
 class InboundAdapter(_InboundAdapter): pass
 class OutboundAdapter(_OutboundAdapter): pass
+class HttpOutboundAdapter(_HttpOutboundAdapter): pass
+class HttpResponse(_HttpResponse): pass
 class BusinessService(_BusinessService): pass
 class BusinessOperation(_BusinessOperation): pass
+class BatchBusinessOperation(_BatchBusinessOperation): pass
 class BusinessProcess(_BusinessProcess): pass
 class DuplexService(_PrivateSessionDuplex): pass
 class DuplexOperation(_PrivateSessionDuplex): pass
 class DuplexProcess(_PrivateSessionProcess): pass
 class Message(_Message): pass
 class PickleMessage(_PickleMessage): pass
+class BatchItemError(_BatchItemError, Message): pass
 class Director(_Director): pass
+class MessageCodec(_MessageCodec): pass
+class LogHandler(_LogHandler): pass
+class ConnectionPool(_ConnectionPool): pass
@@ -0,0 +1,140 @@
+import math
+import time
+import dataclasses
+
+from grongier.pex._business_operation import _BusinessOperation
+from grongier.pex._business_host import _BusinessHost
+from grongier.pex._logging import _LogSink
+from grongier.pex._event_loop import _EventLoop
+
+@dataclasses.dataclass
+class _BatchItemError:
+    """ Response sent to the caller of a request of a batch that failed.
+
+    Attributes:
+        error: the error text
+        error_type: the name of the class of the exception
+    """
+    error: str = None
+    error_type: str = None
+
+class _BatchBusinessOperation(_BusinessOperation):
+    """ Business operation handling its requests by batches.
+
+    The requests are buffered and handed over together to on_batch when batch_size requests are buffered,
+    when the oldest one is older than batch_age seconds (checked on each request and on keepalive),
+    on keepalive and on tear down. The KeepaliveInterval setting is lowered to batch_age, rounded up to the
+    second, when it is 0 or greater, so that the last batch doesn't wait for more traffic. The response of each request is deferred (DeferResponse) and sent to its
+    caller (SendDeferredResponse) once on_batch has returned: the response of the request at the same rank
+    in the list returned by on_batch, or a BatchItemError.
+
+    Persistence: a buffered request is acknowledged to its caller only when its response is sent, after
+    on_batch returned. The buffer itself lives in the memory of the job, if the job stops before the batch
+    is flushed the requests are not processed: their message headers stay in the deferred state, and
+    synchronous callers get a timeout instead of a response. Such requests can be resent from the
+    message viewer. on_batch must therefore commit its work before returning.
+    """
+
+    batch_size:int = 100
+    batch_age:float = 1.0
+
+    def on_batch(self, requests):
+        """ Called with the buffered requests.
+
+        Parameters:
+        requests: the list of the requests, in their order of arrival.
+
+        Returns:
+        A list of the same length as requests, with the response of each request: an instance of a subclass
+        of Message or of IRISObject, None, or an exception (or a BatchItemError) for a request that failed.
+        None, instead of a list, gives no response to all the requests.
+        An exception raised by on_batch fails all the requests of the batch.
+        The default implementation handles the requests one by one with on_message and the dispatch system.
+        """
+        return [_EventLoop.result(self._dispach_message(request)) for request in requests]
+
+    @_LogSink.flush_after
+    @_BusinessHost.input_deserialzer
+    def _dispatch_on_message(self, request):
+        """ For internal use only. """
+        batch = self.__dict__.setdefault('_batch', [])
+        if not batch:
+            self._batch_start = time.monotonic()
+        batch.append((self.iris_handle.dispatchDeferResponse(), request))
+        if len(batch) >= int(self.batch_size) or self._batch_due():
+            self._flush_batch()
+        return None
+
+    def _dispatch_on_init(self, host_object):
+        """ For internal use only. """
+        super()._dispatch_on_init(host_object)
+        self._bound_keepalive()
+        return
+
+    def _dispatch_on_keepalive(self):
+        """ For internal use only. """
+        self._flush_batch()
+        return super()._dispatch_on_keepalive()
+
+    def _dispatch_on_tear_down(self, host_object=None):
+        """ For internal use only. """
+        try:
+            self._flush_batch()
+        finally:
+            super()._dispatch_on_tear_down(host_object)
+        return
+
+    def _bound_keepalive(self):
+        """ For internal use only. Keepalive is the only call the job gets without a request, it is made
+        at least every batch_age seconds so that a partial batch is flushed when the traffic stops. """
+        age = float(self.batch_age)
+        if age <= 0 or self.iris_handle is None:
+            return
+        bound = max(math.ceil(age), 1)
+        interval = float(self.iris_handle.KeepaliveInterval or 0)
+        if interval <= 0 or interval > bound:
+            self.iris_handle.KeepaliveInterval = bound
+            self.log_info("KeepaliveInterval set to %s seconds to flush the batches older than batch_age", bound)
+
+    def _batch_due(self):
+        return time.monotonic() - self.__dict__.get('_batch_start', 0.0) >= float(self.batch_age)
+
+    def _flush_batch(self):
+        """ For internal use only. Hand the buffered requests over to on_batch and send the responses. """
+        batch = self.__dict__.get('_batch')
+        if not batch:
+            return
+        self._batch = []
+        tokens = [token for token, _ in batch]
+        requests = [request for _, request in batch]
+        try:
+            responses = _EventLoop.result(self.on_batch(requests))
+            responses = [None] * len(requests) if responses is None else list(responses)
+            if len(responses) != len(requests):
+                raise ValueError("on_batch returned " + str(len(responses)) + " responses for " + str(len(requests)) + " requests")
+        except Exception as e:
+            responses = [e] * len(requests)
+        for token, response in zip(tokens, responses):
+            try:
+                self._send_batch_response(token, response)
+            except Exception as e:
+                self.log_error("Response of a batch item not sent: %s", e)
+        return
+
+    def _send_batch_response(self, token, response):
+        """ For internal use only. Send the response of a request of the batch, or a BatchItemError when
+        it is an exception or when it can't be serialized. """
+        if not isinstance(response, BaseException):
+            try:
+                self.iris_handle.dispatchSendDeferredResponse(token, self._dispatch_serializer(response))
+                return
+            except Exception as e:
+                response = e
+        self.log_error("Batch item failed: %s", response)
+        self.iris_handle.dispatchSendDeferredResponse(token, self._dispatch_serializer(self._batch_item_error(response)))
+
+    @staticmethod
+    def _batch_item_error(exception):
+        # the public class is a Message built by grongier.pex on top of this module
+        from grongier.pex import BatchItemError
+        return BatchItemError(error=str(exception), error_type=type(exception).__name__)
@@ -1,30 +1,71 @@
-import datetime
+import io
 import pickle
+import dataclasses
+import typing
+import types
 import codecs
-import uuid
-import decimal
-import base64
-import json
-import importlib
+import copyreg
 import iris
 
 from functools import wraps
 
-from inspect import signature, getsource
-
-from dacite import from_dict, Config
+from inspect import signature, getattr_static, Parameter
 
 from grongier.pex._common import _Common
 from grongier.pex._utils import _Utils
+from grongier.pex._dataclass_codec import _DataclassCodec
+from grongier.pex._class_resolver import _ClassResolver
+from grongier.pex._message_codec import _MessageCodec, IrisJSONEncoder, IrisJSONDecoder
+from grongier.pex._compression import _Compression
+from grongier.pex._columnar import _Columnar, CODEC_SUFFIX
+from grongier.pex._lazy_message import _LazyMessage
+from grongier.pex._connections import _Connections
+
+# typing.Union[A, B] and A | B (python 3.10+)
+_UNION_TYPES = (typing.Union, getattr(types, 'UnionType', typing.Union))
+
+class RequestError(Exception):
+    """ Error of one of the calls of send_multi_request_sync, returned in place of its response.
+
+    Attributes:
+        target: the name of the target of the call
+        request: the request that was sent
+        message: the error text
+    """
+
+    def __init__(self, target, request, message):
+        super().__init__(message)
+        self.target = target
+        self.request = request
+        self.message = message
+
+    def __reduce__(self):
+        return (type(self), (self.target, self.request, self.message))
 
 class _BusinessHost(_Common):
     """ This is a superclass for BusinessService, BusinesProcess, and BusinessOperation that
     defines common methods. It is a subclass of Common.
     """
 
-    buffer:int = 64000
+    buffer:int = 1000000
+    pickle_binary:bool = False
+    codec:str = 'json'
+    compression:str = ''
+    compression_threshold:int = 1000000
+    inline_threshold:int = 32000
+    columnar:bool = False
+    lazy:bool = False
     DISPATCH = []
 
+    # name of the method serializing each python class, of the method deserializing each IRIS class
+    _serializers = {}
+    _deserializers = {}
+    _iris_is_a = {}
+
+    # handlers of the messages of the component class, see _dispatch_method
+    _dispatch_tables = None
+    _dispatch_cache = {}
+
     def input_serialzer(fonction):
         """
         It takes a function as an argument, and returns a function that takes the same arguments as the
@@ -34,14 +75,12 @@ class _BusinessHost(_Common):
         :return: The function dispatch_serializer is being returned.
         """
         def dispatch_serializer(self,*params, **param2):
-            # Handle positional arguments
-            serialized=[]
-            for param in params:
-                serialized.append(self._dispatch_serializer(param))
+            serialize = self._dispatch_serializer
             # Handle keyword arguments
             for key, value in param2.items():
-                param2[key] = self._dispatch_serializer(value)
-            return fonction(self,*serialized, **param2)
+                param2[key] = serialize(value)
+            # Handle positional arguments
+            return fonction(self,*map(serialize, params), **param2)
         return dispatch_serializer
     
     def input_serialzer_param(position:int,name:str):
@@ -56,17 +95,12 @@ class _BusinessHost(_Common):
             @wraps(fonction)
             def dispatch_serializer(self,*params, **param2):
                 # Handle positional arguments
-                serialized=[]
-                for i,param in enumerate(params):
-                    if i == position:
-                        serialized.append(self._dispatch_serializer(param))
-                    else:
-                        serialized.append(param)
+                if len(params) > position:
+                    params = params[:position] + (self._dispatch_serializer(params[position]),) + params[position+1:]
                 # Handle keyword arguments
-                for key, value in param2.items():
-                    if key == name:
-                        param2[key] = self._dispatch_serializer(value)
-                return fonction(self,*serialized, **param2)
+                if name in param2:
+                    param2[name] = self._dispatch_serializer(param2[name])
+                return fonction(self,*params, **param2)
             return dispatch_serializer
         return input_serialzer_param
 
@@ -93,14 +127,12 @@ class _BusinessHost(_Common):
         :return: The function dispatch_deserializer is being returned.
         """
         def dispatch_deserializer(self,*params, **param2):
-            # Handle positional arguments
-            serialized=[]
-            for param in params:
-                serialized.append(self._dispatch_deserializer(param))
+            deserialize = self._dispatch_deserializer
             # Handle keyword arguments
             for key, value in param2.items():
-                param2[key] = self._dispatch_deserializer(value)
-            return fonction(self,*serialized, **param2)
+                param2[key] = deserialize(value)
+            # Handle positional arguments
+            return fonction(self,*map(deserialize, params), **param2)
         return dispatch_deserializer
 
     def output_serialzer(fonction):
@@ -136,6 +168,41 @@ class _BusinessHost(_Common):
 
         return self.iris_handle.dispatchSendRequestSync(target,request,timeout,description)
 
+    def send_multi_request_sync(self, targets_and_requests:list, timeout=-1, description=None) -> list:
+        """ Send several requests at once and wait for all the responses.
+
+        The requests are all sent before waiting for the first response, so that the targets work in
+        parallel and the call lasts about as long as the slowest of them.
+
+        Parameters:
+        targets_and_requests: a list of tuples (target, request), target is the name of the business process or operation
+            to receive the request, request is an instance of a subclass of Message or of IRISObject class.
+        timeout: an optional integer that specifies the number of seconds to wait for all the responses. The default value is -1, which means wait forever.
+        description: an optional string parameter that sets a description property in the message headers. The default is None.
+        Returns:
+            the list of the responses, in the order of the requests. A call that failed or timed out
+            doesn't raise, a RequestError is in the list in place of its response.
+        Raises:
+        TypeError: if a request is not of type Message or IRISObject.
+        """
+        targets_and_requests = list(targets_and_requests)
+        targets = _Utils.iris_class('%Library.ListOfDataTypes')._New()
+        requests = _Utils.iris_class('%Library.ListOfObjects')._New()
+        for target, request in targets_and_requests:
+            targets.Insert(target)
+            requests.Insert(self._dispatch_serializer(request))
+        responses = _Utils.iris_class('%Library.ListOfObjects')._New()
+        errors = _Utils.iris_class('%Library.ListOfDataTypes')._New()
+        self.iris_handle.dispatchSendRequestSyncMultiple(targets, requests, timeout, description, responses, errors)
+        result = []
+        for i, (target, request) in enumerate(targets_and_requests, 1):
+            error = errors.GetAt(i)
+            if error:
+                result.append(RequestError(target, request, error))
+            else:
+                result.append(self._dispatch_deserializer(responses.GetAt(i)))
+        return result
+
     @input_serialzer_param(1,'request')
     def send_request_async(self, target, request, description=None):
         """ Send the specified message to the target business process or business operation asynchronously.
@@ -161,19 +228,43 @@ class _BusinessHost(_Common):
         Returns:
         string: The message in json format.
         """
+        if _Utils.to_bool(self.pickle_binary):
+            return self._serialize_pickle_message_binary(message)
 
         pickle_string = codecs.encode(pickle.dumps(message), "base64").decode()
         module = message.__class__.__module__
         classname = message.__class__.__name__
 
-        msg = iris.cls('Grongier.PEX.PickleMessage')._New()
+        msg = _Utils.iris_class('Grongier.PEX.PickleMessage')._New()
         msg.classname = module + "." + classname
 
-        stream = _Utils.string_to_stream(pickle_string)
+        stream = _Utils.string_to_stream(pickle_string, self.buffer)
         msg.jstr = stream
 
         return msg
 
+    def _serialize_pickle_message_binary(self,message):
+        """ Converts a python message into an iris grongier.pex.PickleMessage stored in a binary stream.
+        The message is pickled with protocol 5, large buffers (bytes, bytearray, numpy arrays, ...) are
+        kept out-of-band and written as separate frames after the pickle, without being copied in it.
+
+        Parameters:
+        message: The message to serialize, an instance of a class that is a subclass of PickleMessage.
+
+        Returns:
+        The iris Grongier.PEX.PickleMessage
+        """
+        pickler = OutOfBandPickler(io.BytesIO())
+        pickler.dump(message)
+        module = message.__class__.__module__
+        classname = message.__class__.__name__
+
+        msg = _Utils.iris_class('Grongier.PEX.PickleMessage')._New()
+        msg.classname = module + "." + classname
+
+        msg.jbin = _Utils.bytes_to_stream(_Utils.pack_frames(pickler.frames(), self.buffer))
+
+        return msg
 
     def _dispatch_serializer(self,message):
         """
@@ -183,21 +274,79 @@ class _BusinessHost(_Common):
         :param message: The message to be serialized
         :return: The serialized message
         """
-        if (message is not None and self._is_message_instance(message)):
-            return self._serialize_message(message)
-        elif (message is not None and self._is_pickle_message_instance(message)):
-            return self._serialize_pickle_message(message)
-        elif (message is not None and self._is_iris_object_instance(message)):
-            return message
-        elif (message is None or message == ""):
-            return message
+        klass = type(message)
+        try:
+            serializer = _BusinessHost._serializers[klass]
+        except KeyError:
+            serializer = self._serializer_for(klass)
+        return getattr(self, serializer)(message)
+
+    @classmethod
+    def _serializer_for(cls, klass) -> str:
+        """
+        Return the name of the method serializing the instances of klass.
+        The answer is computed once per python class and kept in _serializers.
+
+        :param klass: the python class of the message
+        :raises TypeError: if the instances of klass can't be sent
+        """
+        if klass.__dict__.get('__iop_lazy__', False):
+            serializer = '_serialize_lazy_message'
+        elif cls._message_kind(klass) == 'message':
+            if not dataclasses.is_dataclass(klass):
+                raise TypeError(klass.__module__ + '.' + klass.__qualname__+" must be a dataclass")
+            serializer = '_serialize_message'
+        elif cls._message_kind(klass) == 'pickle':
+            serializer = '_serialize_pickle_message'
+        elif klass.__module__.find('iris') == 0:
+            serializer = '_serialize_iris_object'
+        elif klass is type(None) or klass is str:
+            serializer = '_serialize_empty'
         else:
             # todo : decorator takes care of all the parameters, so this should never happen
             # return message
             raise TypeError("The message must be an instance of a class that is a subclass of Message or IRISObject %Persistent class.")
+        _BusinessHost._serializers[klass] = serializer
+        return serializer
+
+    def _serialize_lazy_message(self, message):
+        """ A lazy message never accessed is sent as the original message."""
+        serial = _LazyMessage.serial(message)
+        if serial is None:
+            return self._serialize_message(message)
+        return serial
+
+    def _serialize_iris_object(self, message):
+        """ IRIS objects are sent as is, they must be persistent."""
+        if self._iris_class_is(message, '%Persistent'):
+            return message
+        raise TypeError("The message must be an instance of a class that is a subclass of Message or IRISObject %Persistent class.")
+
+    def _serialize_empty(self, message):
+        if message is None or message == "":
+            return message
+        raise TypeError("The message must be an instance of a class that is a subclass of Message or IRISObject %Persistent class.")
+
+    @staticmethod
+    def _iris_class_is(obj, superclass:str) -> bool:
+        """
+        Return obj._IsA(superclass), the answer is cached per IRIS class name.
+        """
+        key = (obj._ClassName(1), superclass)
+        try:
+            return _BusinessHost._iris_is_a[key]
+        except KeyError:
+            result = _BusinessHost._iris_is_a[key] = bool(obj._IsA(superclass))
+            return result
 
     def _serialize_message(self,message):
         """ Converts a python dataclass message into an iris grongier.pex.message.
+        The body is written with the codec named by the CODEC attribute of the message class,
+        or else by the codec setting of the component.
+        Text bodies shorter than the inline_threshold setting are stored in the jinline property,
+        larger ones in the jstr stream.
+        Messages whose class sets TYPED = True are written without type prefixes.
+        DataFrame and ndarray fields are written in the jbuf binary stream when the columnar setting is on.
 
         Parameters:
         message: The message to serialize, an instance of a class that is a subclass of Message.
@@ -205,24 +354,75 @@ class _BusinessHost(_Common):
         Returns:
         string: The message in json format.
         """
-        json_string = json.dumps(message, cls=IrisJSONEncoder, ensure_ascii=False)
+        codec = _MessageCodec.get(getattr(type(message), 'CODEC', None) or self.codec)
+        dikt = _DataclassCodec.encode(message)
+        frames = None
+        if _Utils.to_bool(self.columnar):
+            dikt, frames = _Columnar.encode(dikt)
+        body = codec.dumps(dikt, typed=getattr(type(message), 'TYPED', False))
         module = message.__class__.__module__
         classname = message.__class__.__name__
 
-        msg = iris.cls('Grongier.PEX.Message')._New()
+        msg = _Utils.iris_class('Grongier.PEX.Message')._New()
         msg.classname = module + "." + classname
 
-        stream = _Utils.string_to_stream(json_string)
-        msg.jstr = stream
+        if frames:
+            # tells the reader to load the jbuf stream, messages without frames never touch it
+            msg.codec = codec.name + CODEC_SUFFIX
+        elif codec.name != 'json':
+            msg.codec = codec.name
+
+        method, zdict = self._compression_for(type(message), len(body))
+        if method:
+            if not codec.binary:
+                body = body.encode()
+            msg.compression = method
+            msg.jbin = _Utils.bytes_to_stream(_Compression.compress(body, method, zdict=zdict), self.buffer)
+        elif codec.binary:
+            msg.jbin = _Utils.bytes_to_stream(body, self.buffer)
+        elif len(body) < int(self.inline_threshold):
+            # small body, stored in the message itself without allocating a stream
+            msg.jinline = body
+        else:
+            msg.jstr = _Utils.string_to_stream(body, self.buffer)
+
+        if frames:
+            msg.jbuf = _Utils.bytes_to_stream(_Utils.pack_frames(frames, self.buffer))
 
         return msg
 
+    def _compression_for(self, klass, size:int):
+        """
+        Return the compression method and the preset dictionary to write a body of size bytes.
+        The COMPRESSION, COMPRESSION_THRESHOLD and COMPRESSION_DICT attributes of the message class
+        take precedence over the compression and compression_threshold settings of the component.
+
+        :param klass: the class of the message
+        :param size: the size of the body
+        :return: a tuple (method, zdict), method is None when the body must not be compressed
+        """
+        method = getattr(klass, 'COMPRESSION', None) or self.compression
+        if not method or method == 'none':
+            return None, None
+        threshold = getattr(klass, 'COMPRESSION_THRESHOLD', None)
+        if threshold is None:
+            threshold = self.compression_threshold
+        if size < int(threshold):
+            return None, None
+        _Compression.check(method)
+        return method, getattr(klass, 'COMPRESSION_DICT', None)
+
     def _deserialize_pickle_message(self,serial):
         """ 
         Converts an iris grongier.pex.message into an python dataclass message.
-        
+        Reads the binary stream when it is set, otherwise the legacy base64 character stream.
         """
-        string = _Utils.stream_to_string(serial.jstr)
+        jbin = serial.jbin
+        if jbin is not None and jbin.Size > 0:
+            frames = _Utils.unpack_frames(_Utils.stream_to_bytes(jbin, self.buffer, writable=True))
+            return OutOfBandUnpickler(frames).load()
+
+        string = _Utils.stream_to_string(serial.jstr, self.buffer)
 
         msg = pickle.loads(codecs.decode(string.encode(), "base64"))
         return msg
@@ -235,105 +435,195 @@ class _BusinessHost(_Common):
         :param serial: The serialized object
         :return: The return value is a tuple of the form (serial, serial_type)
         """
-        if (serial is not None and type(serial).__module__.find('iris') == 0) and serial._IsA("Grongier.PEX.Message"):
-            return self._deserialize_message(serial)
-        elif (serial is not None and type(serial).__module__.find('iris') == 0) and serial._IsA("Grongier.PEX.PickleMessage"):
-            return self._deserialize_pickle_message(serial)
-        else:
+        if serial is None or type(serial).__module__.find('iris') != 0:
             return serial
+        classname = serial._ClassName(1)
+        try:
+            deserializer = _BusinessHost._deserializers[classname]
+        except KeyError:
+            if self._iris_class_is(serial, "Grongier.PEX.Message"):
+                deserializer = '_deserialize_message'
+            elif self._iris_class_is(serial, "Grongier.PEX.PickleMessage"):
+                deserializer = '_deserialize_pickle_message'
+            else:
+                deserializer = None
+            _BusinessHost._deserializers[classname] = deserializer
+        if deserializer is None:
+            return serial
+        return getattr(self, deserializer)(serial)
 
     def _deserialize_message(self,serial):
         """ 
         Converts an iris grongier.pex.message into an python dataclass message.
+        If the LAZY attribute of the message class, or else the lazy setting of the component, is set,
+        the message is only decoded when one of its attributes is first accessed.
         """
 
-        if (serial.classname is None):
-            raise ValueError("JSON message malformed, must include classname")
         classname = serial.classname
+        if (classname is None):
+            raise ValueError("JSON message malformed, must include classname")
+        msg = _ClassResolver.resolve(classname)
+
+        lazy = getattr(msg, 'LAZY', None)
+        if lazy is None:
+            lazy = _Utils.to_bool(self.lazy)
+        if lazy and _LazyMessage.supports(msg):
+            return _LazyMessage.wrap(msg, serial, lambda: self._decode_message(serial, msg))
+        return self._decode_message(serial, msg)
+
+    def _decode_message(self, serial, msg):
+        """
+        Decode the body of an iris grongier.pex.message into an instance of the dataclass msg.
+        """
+        name = serial.codec
+        columnar = bool(name) and name.endswith(CODEC_SUFFIX)
+        if columnar:
+            name = name[:-len(CODEC_SUFFIX)]
+        codec = _MessageCodec.for_reading(name)
+        compression = serial.compression
+        if compression:
+            body = _Compression.decompress(_Utils.stream_to_bytes(serial.jbin, self.buffer),
+                                           compression, getattr(msg, 'COMPRESSION_DICT', None))
+            if not codec.binary:
+                body = body.decode()
+        elif codec.binary:
+            body = _Utils.stream_to_bytes(serial.jbin, self.buffer)
+        else:
+            body = serial.jinline or _Utils.stream_to_string(serial.jstr, self.buffer)
 
-        j = classname.rindex(".")
-        if (j <=0):
-            raise ValueError("Classname must include a module: " + classname)
-        try:
-            module = importlib.import_module(classname[:j])
-            msg = getattr(module, classname[j+1:])
-        except Exception:
-            raise ImportError("Class not found: " + classname)
+        typed = getattr(msg, 'TYPED', False)
+        jdict = codec.loads(body, typed=True) if typed else codec.loads(body)
+
+        if columnar:
+            _Columnar.decode(jdict, _Utils.unpack_frames(_Utils.stream_to_bytes(serial.jbuf, self.buffer)))
 
-        string = _Utils.stream_to_string(serial.jstr)
+        if typed:
+            # the annotations of the dataclass drive the conversions, strings are not scanned
+            return _DataclassCodec.decode_typed(msg, jdict)
 
-        jdict = json.loads(string, cls=IrisJSONDecoder)
         msg = self._dataclass_from_dict(msg,jdict)
         return msg
 
     def _dataclass_from_dict(self,klass, dikt):
         """
         > If the field is not in the dataclass, then add it as an attribute
+        The decode function of each dataclass is compiled once and cached, see _DataclassCodec.
         
         :param klass: The dataclass to convert to
         :param dikt: the dictionary to convert to a dataclass
         :return: A dataclass object with the fields of the dataclass and the fields of the dictionary.
         """
-        ret = from_dict(klass, dikt, Config(check_types=False))
-        
-        try:
-            fieldtypes = klass.__annotations__
-        except Exception as e:
-            fieldtypes = []
-        
-        for key,val in dikt.items():
-            if key not in fieldtypes:
-                setattr(ret, key, val)
-        return ret
+        return _DataclassCodec.decode(klass, dikt)
 
     def _dispach_message(self, request):
         """
         It takes a request object, and returns a response object
+        The method handling the request is looked up once per class of request, see _dispatch_method.
         
         :param request: The request object
         :return: The return value is the result of the method call.
         """
+        return getattr(self, self._dispatch_method(type(request)))(request)
 
-        call = 'on_message'
-
-        module = request.__class__.__module__
-        classname = request.__class__.__name__
+    def __init_subclass__(cls, **kwargs):
+        """ Each component class gets its own dispatch table, built on first use. """
+        super().__init_subclass__(**kwargs)
+        cls._dispatch_tables = None
+        cls._dispatch_cache = {}
 
-        for msg,method in self.DISPATCH:
-            if msg == module+"."+classname:
-                call = method
+    @classmethod
+    def _dispatch_method(cls, klass) -> str:
+        """
+        Return the name of the method handling the messages of class klass: the handler annotated with
+        klass or, for subclassed messages, with the closest class of its MRO, else on_message.
+        The walk stops at object and at the bases of the framework (Message, PickleMessage...), a handler
+        annotated with one of them only gets the messages of that exact class.
+        The answer is cached per class of message.
 
-        return getattr(self,call)(request)
+        :param klass: the class of the message
+        :return: the name of the method
+        """
+        cache = cls._dispatch_cache
+        try:
+            return cache[klass]
+        except KeyError:
+            pass
+        by_type, by_name = cls._create_dispatch_tables()
+        method = 'on_message'
+        for k in getattr(klass, '__mro__', (klass,)):
+            if k is not klass and (k is object or k.__module__.startswith('grongier.pex')):
+                break
+            if k in by_type:
+                method = by_type[k]
+                break
+            name = k.__module__ + "." + k.__name__
+            if name in by_name:
+                method = by_name[name]
+                break
+        cache[klass] = method
+        return method
+
+    @classmethod
+    def _create_dispatch_tables(cls):
+        """
+        Build, once per class, the tables of the public methods taking a single annotated parameter:
+        one keyed by the annotated classes (each class of a Union included), one keyed by the names of the
+        annotations that can't be resolved to a class. Entries of DISPATCH are added to the second one.
+
+        :return: a tuple (by_type, by_name)
+        """
+        tables = cls.__dict__.get('_dispatch_tables')
+        if tables is not None:
+            return tables
+        by_type = {}
+        by_name = {}
+        for method in dir(cls):
+            if method.startswith("_"):
+                continue
+            attribute = getattr_static(cls, method)
+            if _BusinessHost.__dict__.get(method) is attribute:
+                # the decorators of the framework are not handlers
+                continue
+            if isinstance(attribute, staticmethod):
+                function, skip = attribute.__func__, 0
+            elif isinstance(attribute, classmethod):
+                function, skip = attribute.__func__, 1
+            elif isinstance(attribute, types.FunctionType):
+                function, skip = attribute, 1
+            else:
+                continue
+            try:
+                param = list(signature(function).parameters.values())[skip:]
+            except (ValueError, TypeError):
+                continue
+            #one parameter
+            if len(param) != 1 or param[0].annotation is Parameter.empty:
+                continue
+            annotation = param[0].annotation
+            try:
+                annotation = typing.get_type_hints(function).get(param[0].name, annotation)
+            except Exception:
+                pass
+            if isinstance(annotation, str):
+                by_name[annotation] = method
+                continue
+            if typing.get_origin(annotation) in _UNION_TYPES:
+                classes = typing.get_args(annotation)
+            else:
+                classes = (annotation,)
+            for klass in classes:
+                if isinstance(klass, type) and klass is not type(None):
+                    by_type[klass] = method
+        for name, method in cls.DISPATCH:
+            by_name[name] = method
+        tables = cls._dispatch_tables = (by_type, by_name)
+        return tables
 
-    
     def _create_dispatch(self):
         """
-        It creates a list of tuples, where each tuple contains the name of a class and the name of a method
-        that takes an instance of that class as its only argument
-        :return: A list of tuples.
-        """
-        if len(self.DISPATCH) == 0:
-            #get all function in current BO
-            method_list = [func for func in dir(self) if callable(getattr(self, func)) and not func.startswith("_")]
-            for method in method_list:
-                #get signature of current function
-                try:
-                    param = signature(getattr(self, method)).parameters
-                # Handle staticmethod
-                except ValueError as e:
-                    param=''
-                #one parameter
-                if (len(param)==1):
-                    #get parameter type
-                    annotation = str(param[list(param)[0]].annotation)
-                    #trim annotation format <class 'toto'>
-                    i = annotation.find("'")
-                    j = annotation.rfind("'")
-                    #if end is not found
-                    if j == -1:
-                        j = None
-                    classname = annotation[i+1:j]
-                    self.DISPATCH.append((classname,method))
+        Build the dispatch tables of the class of the component if it isn't done yet.
+        """
+        self._create_dispatch_tables()
         return
 
     @staticmethod
@@ -342,6 +632,9 @@ class _BusinessHost(_Common):
         calls for the class. Implement this method to allow connections between components to show up in 
         the interoperability UI.
 
+        The default implementation analyses the source of the class statically: string literals, class
+        attributes and attributes or variables assigned a string literal are resolved, on_init isn't called.
+
         Returns:
             An IRISList containing all targets for this class. Default is None.
         """
@@ -390,122 +683,84 @@ class _BusinessHost(_Common):
         calls for the class. Implement this method to allow connections between components to show up in 
         the interoperability UI.
 
+        The default implementation analyses the source of the class statically: string literals, class
+        attributes and attributes or variables assigned a string literal are resolved, on_init isn't called.
+
         Returns:
             An IRISList containing all targets for this class. Default is None.
         """
-        ## Parse the class code to find all invocations of send_request_sync and send_request_async
-        ## and return the targets
-        targer_list = []
-        # get the source code of the class
-        source = getsource(self.__class__)
-        # find all invocations of send_request_sync and send_request_async
-        for method in ['send_request_sync','send_request_async','SendRequestSync','SendRequestAsync']:
-            i = source.find(method)
-            while i != -1:
-                j = source.find("(",i)
-                if j != -1:
-                    k = source.find(",",j)
-                    if k != -1:
-                        target = source[j+1:k]
-                        if target.find("=") != -1:
-                            # it's a keyword argument, remove the keyword
-                            target = target[target.find("=")+1:].strip()
-                        if target not in targer_list:
-                            targer_list.append(target)
-                i = source.find(method,i+1)
-
-        for target in targer_list:
-            # if target is a string, remove the quotes
-            if target[0] == "'" and target[-1] == "'":
-                targer_list[targer_list.index(target)] = target[1:-1]
-            elif target[0] == '"' and target[-1] == '"':
-                targer_list[targer_list.index(target)] = target[1:-1]
-            # if target is a variable, try to find the value of the variable
-            else:
-                self.on_init()
-                try:
-                    if target.find("self.") != -1:
-                        # it's a class variable
-                        targer_list[targer_list.index(target)] = getattr(self,target[target.find(".")+1:])
-                    elif target.find(".") != -1:
-                        # it's a class variable
-                        targer_list[targer_list.index(target)] = getattr(getattr(self,target[:target.find(".")]),target[target.find(".")+1:])
-                    else:
-                        targer_list[targer_list.index(target)] = getattr(self,target)
-                except Exception as e:
-                    pass
-
-        return targer_list
-
-# It's a subclass of the standard JSONEncoder class that knows how to encode date/time, decimal types,
-# and UUIDs.
-class IrisJSONEncoder(json.JSONEncoder):
+        ## Parse the class code, once per version of its source file, to find all invocations
+        ## of send_request_sync and send_request_async and return the targets, without running it
+        return _Connections.find(type(self))
+
+class _OutOfBandBytes:
+    """ Stands for a large bytes or bytearray field, pickled as a PickleBuffer and rebuilt with its type."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __reduce_ex__(self, protocol):
+        return type(self.value), (pickle.PickleBuffer(self.value),)
+
+# It's a pickler using protocol 5 that keeps large binary objects out of the pickle,
+# so that they are written to the stream from their own memory instead of being copied in the pickle.
+class OutOfBandPickler(pickle.Pickler):
     """
-    JSONEncoder subclass that knows how to encode date/time, decimal types, and
-    UUIDs.
+    Pickler using protocol 5 that keeps large payloads out-of-band.
+    Objects that support protocol 5 natively (numpy arrays, PickleBuffer) are given to buffer_callback,
+    bytes and bytearray fields bigger than OUT_OF_BAND_THRESHOLD are wrapped in a PickleBuffer first.
+    Use frames() after dump() to get the pickle and all its out-of-band payloads.
     """
 
-    def default(self, o):
-        if o.__class__.__name__ == 'DataFrame':
-            return 'dataframe:'+o.to_json(orient="table")
-        elif isinstance(o, datetime.datetime):
-            r = o.isoformat()
-            if o.microsecond:
-                r = r[:23] + r[26:]
-            if r.endswith("+00:00"):
-                r = r[:-6] + "Z"
-            return 'datetime:'+r
-        elif isinstance(o, datetime.date):
-            return 'date:'+o.isoformat()
-        elif isinstance(o, datetime.time):
-            r = o.isoformat()
-            if o.microsecond:
-                r = r[:12]
-            return 'time:'+r
-        elif isinstance(o, decimal.Decimal): 
-            return 'decimal:'+str(o)
-        elif isinstance(o, uuid.UUID):
-            return 'uuid:'+str(o)
-        elif isinstance(o, bytes):
-            return 'bytes:'+base64.b64encode(o).decode("UTF-8")
-        elif hasattr(o, '__dict__'):
-            return o.__dict__
+    OUT_OF_BAND_THRESHOLD = 65536
+
+    def __init__(self, file):
+        self.file = file
+        self.buffers = []
+        super().__init__(file, protocol=5, buffer_callback=self.buffers.append)
+
+    def reducer_override(self, obj):
+        # bytes and bytearray are saved before this hook is called, so the large ones are
+        # swapped in the state of the object holding them, which goes through this hook
+        if isinstance(obj, (type, types.FunctionType)) or type(obj) in copyreg.dispatch_table:
+            return NotImplemented
+        reduced = obj.__reduce_ex__(5)
+        if not isinstance(reduced, tuple) or len(reduced) < 3:
+            return reduced
+        state = reduced[2]
+        if type(state) is dict:
+            state = self._out_of_band(state)
+        elif (type(state) is tuple and len(state) == 2
+                and all(part is None or type(part) is dict for part in state)):
+            # (__dict__, slots) state of the classes with __slots__
+            state = tuple(part and self._out_of_band(part) for part in state)
         else:
-            return super().default(o)
-
-# It's a JSON decoder that looks for a colon in the value of a key/value pair. If it finds one, it
-# assumes the value is a string that represents a type and a value. It then converts the value to the
-# appropriate type
-class IrisJSONDecoder(json.JSONDecoder):
-    def __init__(self, *args, **kwargs):
-        json.JSONDecoder.__init__(
-            self, object_hook=self.object_hook, *args, **kwargs)
-
-    def object_hook(self, obj):
-        ret = {}
-        for key, value in obj.items():
-            i = 0
-            if isinstance(value, str):
-                i = value.find(":") 
-            if (i>0):
-                typ = value[:i]
-                if typ == 'datetime':
-                    ret[key] = datetime.datetime.fromisoformat(value[i+1:])
-                elif typ == 'date':
-                    ret[key] = datetime.date.fromisoformat(value[i+1:])
-                elif typ == 'time':
-                    ret[key] = datetime.time.fromisoformat(value[i+1:])
-                elif typ == 'dataframe':
-                    module = importlib.import_module('pandas')
-                    ret[key] = module.read_json(value[i+1:],orient="table")
-                elif typ == 'decimal':
-                    ret[key] = decimal.Decimal(value[i+1:])
-                elif typ == 'uuid':
-                    ret[key] = uuid.UUID(value[i+1:])
-                elif typ == 'bytes':
-                    ret[key] = base64.b64decode((value[i+1:].encode("UTF-8")))
-                else:
-                    ret[key] = value
-            else:
-                ret[key] = value
-        return ret
+            return reduced
+        return reduced[:2] + (state,) + reduced[3:]
+
+    def _out_of_band(self, fields:dict) -> dict:
+        """ The fields, with the large bytes and bytearray values wrapped, copied only if there are any."""
+        large = [name for name, value in fields.items()
+                 if type(value) in (bytes, bytearray) and len(value) >= self.OUT_OF_BAND_THRESHOLD]
+        if not large:
+            return fields
+        fields = dict(fields)
+        for name in large:
+            fields[name] = _OutOfBandBytes(fields[name])
+        return fields
+
+    def frames(self) -> list:
+        """ The pickle, then the protocol 5 buffers."""
+        return [self.file.getbuffer()] + [buffer.raw() for buffer in self.buffers]
+
+class OutOfBandUnpickler(pickle.Unpickler):
+    """
+    Unpickler of the frames written by OutOfBandPickler.
+    Protocol 5 buffers are handed over as memoryviews, without any copy: over a bytearray,
+    they give writable objects (numpy arrays), as the base64 pickles do.
+    """
+
+    def __init__(self, frames):
+        super().__init__(io.BytesIO(frames[0]), buffers=frames[1:])
@@ -1,5 +1,7 @@
 import importlib
 from grongier.pex._business_host import _BusinessHost
+from grongier.pex._event_loop import _EventLoop
+from grongier.pex._logging import _LogSink
 
 class _BusinessOperation(_BusinessHost):
     """ This class corresponds to the PEX framework EnsLib.PEX.BusinessOperation class.
@@ -17,6 +19,7 @@ class _BusinessOperation(_BusinessHost):
         Typically, the operation will either send the message to the external system or forward it to a business process or another business operation.
         If the operation has an adapter, it uses the Adapter.invoke() method to call the method on the adapter that sends the message to the external system.
         If the operation is forwarding the message to another production component, it uses the SendRequestAsync() or the SendRequestSync() method
+        on_message and the other message handlers can be coroutine functions (async def), they are run on the event loop of the job.
 
         Parameters:
         request: An instance of either a subclass of Message or of IRISObject containing the incoming message for the business operation.
@@ -32,27 +35,38 @@ class _BusinessOperation(_BusinessHost):
         """
         return
 
+    def _dispatch_on_keepalive(self):
+        """ For internal use only. """
+        _LogSink.flush()
+        return self.on_keepalive()
+
     def _set_iris_handles(self, handle_current, handle_partner):
         """ For internal use only. """
         self.iris_handle = handle_current
         if type(handle_partner).__module__.find('iris') == 0:
             if handle_partner._IsA("Grongier.PEX.OutboundAdapter"):
-                module = importlib.import_module(handle_partner.GetModule())
-                handle_partner = getattr(module, handle_partner.GetClassname())()
+                # share the python adapter run by IRIS, with its settings, connection pool and keepalive
+                adapter = handle_partner.GetClass()
+                if adapter is None or adapter == "":
+                    module = importlib.import_module(handle_partner.GetModule())
+                    adapter = getattr(module, handle_partner.GetClassname())()
+                handle_partner = adapter
             self.Adapter = self.adapter = handle_partner
         return
 
+    @_LogSink.flush_after
     def _dispatch_on_init(self, host_object):
         """ For internal use only. """
         self._create_dispatch()
-        self.on_init()
+        _EventLoop.result(self.on_init())
         return
 
+    @_LogSink.flush_after
     @_BusinessHost.input_deserialzer
     @_BusinessHost.output_serialzer
     def _dispatch_on_message(self, request):
         """ For internal use only. """
-        return self._dispach_message(request)
+        return _EventLoop.result(self._dispach_message(request))
 
     def OnMessage(self, request):
         """ DEPRECATED : use on_message
@@ -1,4 +1,15 @@
+import pickle
+import inspect
+import collections
+
 from grongier.pex._business_host import _BusinessHost
+from grongier.pex._utils import _Utils, IRIS_MAX_STRING_LENGTH
+from grongier.pex._logging import _LogSink
+from grongier.pex._event_loop import _EventLoop
+from grongier.pex._continuation import _Continuation, _Call, _Gather, STATE_KEY
+
+Call = collections.namedtuple('Call', ['request', 'response', 'completion_key'])
+Call.__doc__ = """ A request sent by the business process with send_request_async, its response and its completion key."""
 
 class _BusinessProcess(_BusinessHost):
     """ Typically contains most of the logic in a production.
@@ -10,7 +21,9 @@ class _BusinessProcess(_BusinessHost):
     DISPATCH = []
 
     PERSISTENT_PROPERTY_LIST=None
-    """ A list of the variable names of persistent properties."""        
+    """ A list of the variable names of persistent properties, their values can be any picklable object."""
+
+    _continuation = None        
 
     def on_message(self, request):
         """ Called when the business operation receives a message from another production component.
@@ -55,6 +68,24 @@ class _BusinessProcess(_BusinessHost):
         """
         return self.OnResponse(request, response, call_request, call_response, completion_key)
 
+    def on_responses(self, request, response, calls):
+        """ Handles all the responses to the messages sent to the targets at once, implement it instead of on_response.
+        When a business process implements this method, the responses are accumulated as they arrive and handed over in
+        a single call, when all of them have arrived or when the timer set with set_timer fires, just before on_complete.
+        The persistent properties are then restored and saved once instead of once per response.
+        Parameters:
+        request: An instance of IRISObject or subclass of Message that contains the initial request message sent to the business process.
+        response: An instance of IRISObject or subclass of Message that contains the response message that this business process can return
+            to the production component that sent the initial message.
+        calls: a list of Call named tuples (request, response, completion_key), in the order of arrival of the responses.
+        Returns:
+        An instance of IRISObject or subclass of Message that contains the response message that this business process can return
+            to the production component that sent the initial message.
+        """
+        for call in calls:
+            response = self.on_response(request, response, call.request, call.response, call.completion_key)
+        return response
+
     def on_complete(self, request, response):
         """ Called after the business process has received and handled all responses to requests it has sent to targets.
         Parameters: 
@@ -95,7 +126,20 @@ class _BusinessProcess(_BusinessHost):
             response_required = 1
         else:
             response_required = 0
-        return self.iris_handle.dispatchSendRequestAsync(target,request,response_required,completion_key,description)
+        if _Continuation.is_key(completion_key):
+            # a call of await self.call(), sent once by the continuation
+            return self.iris_handle.dispatchSendRequestAsync(target,request,response_required,completion_key,description)
+        return self._replayable(self.iris_handle.dispatchSendRequestAsync, target, request, response_required, completion_key, description)
+
+    def send_request_sync(self, target, request, timeout=-1, description=None):
+        """ See _BusinessHost.send_request_sync.
+        In a coroutine on_request, the request is sent once, its response is returned again when the coroutine is replayed."""
+        return self._replayable(super().send_request_sync, target, request, timeout, description)
+
+    def send_multi_request_sync(self, targets_and_requests:list, timeout=-1, description=None) -> list:
+        """ See _BusinessHost.send_multi_request_sync.
+        In a coroutine on_request, the requests are sent once, their responses are returned again when the coroutine is replayed."""
+        return self._replayable(super().send_multi_request_sync, targets_and_requests, timeout, description)
 
     def set_timer(self, timeout, completion_key=None):
         """ Specifies the maximum time the business process will wait for responses.
@@ -108,85 +152,222 @@ class _BusinessProcess(_BusinessHost):
         self.iris_handle.dispatchSetTimer(timeout, completion_key)
         return
 
+    def call(self, target, request, description=None):
+        """ Send a request from a coroutine on_request and wait for its response: response = await self.call(target, request).
+        The request is sent with send_request_async and the job is released while the response is on its way,
+        the coroutine is resumed, by replaying it from the beginning, when the response arrives.
+        The coroutine must be deterministic: the same request and the same responses must lead to the same calls in the same order.
+
+        Parameters:
+        target: a string that specifies the name of the business process or operation to receive the request.
+        request: an instance of IRISObject or of a subclass of Message.
+        description: an optional string parameter that sets a description property in the message header. The default is None.
+        Returns:
+            an awaitable, its result is the response of the target.
+        """
+        return _Call(self, target, request, description)
+
+    def gather(self, *calls):
+        """ Send several requests at once from a coroutine on_request: responses = await self.gather(self.call(a, r1), self.call(b, r2)).
+
+        Parameters:
+        calls: the awaitables returned by call().
+        Returns:
+            an awaitable, its result is the list of the responses, in the order of the calls.
+        """
+        return _Gather(self, calls)
+
     def _set_iris_handles(self, handle_current, handle_partner):
         """ For internal use only. """
         self.iris_handle = handle_current
         return
 
     def _save_persistent_properties(self, host_object):
-        """ For internal use only. """
-        if self.PERSISTENT_PROPERTY_LIST == None:
+        """ For internal use only.
+        The properties of PERSISTENT_PROPERTY_LIST are pickled together and written in one call,
+        only if the pickle differs from the one restored or saved last.
+        The state of a suspended coroutine on_request is saved with them."""
+        if self.PERSISTENT_PROPERTY_LIST == None and not self._uses_continuations():
             return
-        for prop in self.PERSISTENT_PROPERTY_LIST:
-            val = getattr(self, prop, None)
-            typ = val.__class__.__name__
-            if (typ in ["str","int","float","bool","bytes"]):
-                try:
-                    host_object.setPersistentProperty(prop, val)
-                except:
-                    pass
+        state = {prop: getattr(self, prop) for prop in self.PERSISTENT_PROPERTY_LIST or () if hasattr(self, prop)}
+        if self._continuation is not None:
+            state[STATE_KEY] = self._continuation.state
+        try:
+            blob = pickle.dumps(state)
+        except Exception:
+            blob = pickle.dumps(self._picklable_state(state))
+        if blob == self.__dict__.get('_persistent_snapshot'):
+            return
+        if len(blob) <= IRIS_MAX_STRING_LENGTH:
+            host_object.setPersistentState(blob)
+        else:
+            for i, chunk in enumerate(_Utils.iter_chunks(blob, IRIS_MAX_STRING_LENGTH)):
+                host_object.setPersistentState(chunk, 1 if i else 0)
+        self._persistent_snapshot = blob
         return
 
+    def _picklable_state(self, state):
+        """ For internal use only. Drop the values that can't be pickled, with a warning."""
+        result = {}
+        for prop, val in state.items():
+            try:
+                pickle.dumps(val)
+            except Exception as e:
+                self.log_warning("Persistent property %s not saved: %s", prop, e)
+                continue
+            result[prop] = val
+        return result
+
     def _restore_persistent_properties(self, host_object):
-        """ For internal use only. """
-        if self.PERSISTENT_PROPERTY_LIST == None:
+        """ For internal use only.
+        The properties are restored from the pickle saved by _save_persistent_properties, from the
+        properties saved one by one by previous versions, or reset to their class value."""
+        if self.PERSISTENT_PROPERTY_LIST == None and not self._uses_continuations():
             return
-        for prop in self.PERSISTENT_PROPERTY_LIST:
-            try:
-                val = host_object.getPersistentProperty(prop)
-                setattr(self, prop, val)
-            except:
-                pass
+        blob = host_object.getPersistentState()
+        if isinstance(blob, str):
+            blob = blob.encode('latin-1')
+        elif blob is not None and not isinstance(blob, bytes):
+            blob = _Utils.stream_to_bytes(blob, IRIS_MAX_STRING_LENGTH)
+        if blob:
+            state = pickle.loads(blob)
+        elif host_object.hasPersistentProperties():
+            state = {}
+            for prop in self.PERSISTENT_PROPERTY_LIST or ():
+                try:
+                    state[prop] = host_object.getPersistentProperty(prop)
+                except:
+                    pass
+        else:
+            state = {}
+        continuation = state.pop(STATE_KEY, None)
+        self._continuation = None if continuation is None else _Continuation(continuation)
+        for prop in self.PERSISTENT_PROPERTY_LIST or ():
+            if prop in state:
+                setattr(self, prop, state[prop])
+            else:
+                self.__dict__.pop(prop, None)
+        self._persistent_snapshot = blob or None
         return
 
+    @_LogSink.flush_after
     def _dispatch_on_connected(self, host_object):
         """ For internal use only. """
-        self.on_connected()
+        _EventLoop.result(self.on_connected())
+        # the snapshot may come from another instance of the process, always save
+        self.__dict__.pop('_persistent_snapshot', None)
         self._save_persistent_properties(host_object)
         return
 
+    @_LogSink.flush_after
     def _dispatch_on_init(self, host_object):
         """ For internal use only. """
         self._restore_persistent_properties(host_object)
         self._create_dispatch()
-        self.on_init()
+        _EventLoop.result(self.on_init())
         self._save_persistent_properties(host_object)
         return
 
     def _dispatch_on_tear_down(self, host_object):
         """ For internal use only. """
-        self._restore_persistent_properties(host_object)
-        self.on_tear_down()
-        self._save_persistent_properties(host_object)
+        try:
+            self._restore_persistent_properties(host_object)
+            _EventLoop.result(self.on_tear_down())
+            self._save_persistent_properties(host_object)
+        finally:
+            _LogSink.flush()
+            _EventLoop.close()
         return
 
+    @_LogSink.flush_after
     @_BusinessHost.input_deserialzer
     @_BusinessHost.output_serialzer
     def _dispatch_on_request(self, host_object, request):
         """ For internal use only. """
         self._restore_persistent_properties(host_object)
         return_object = self._dispach_message(request)
+        if inspect.iscoroutine(return_object):
+            self._continuation = _Continuation()
+            done, return_object = self._continue(return_object)
         self._save_persistent_properties(host_object)
         return return_object
     
+    @_LogSink.flush_after
     @_BusinessHost.input_deserialzer
     @_BusinessHost.output_serialzer
     def _dispatch_on_response(self, host_object, request, response, call_request, call_response, completion_key):
         """ For internal use only. """
         self._restore_persistent_properties(host_object)
-        return_object = self.on_response(request, response, call_request, call_response, completion_key)
+        if self._continuation is not None and _Continuation.is_key(completion_key):
+            self._continuation.record(completion_key, call_response)
+            return_object = response
+            if self._continuation.ready():
+                done, result = self._continue(self._dispach_message(request))
+                if done:
+                    return_object = result
+        else:
+            return_object = self.on_response(request, response, call_request, call_response, completion_key)
         self._save_persistent_properties(host_object)
         return return_object
 
+    @_LogSink.flush_after
     @_BusinessHost.input_deserialzer
     @_BusinessHost.output_serialzer
-    def _dispatch_on_complete(self, host_object, request, response):
+    def _dispatch_on_complete(self, host_object, request, response, call_requests=None, call_responses=None, completion_keys=None):
         """ For internal use only. """
         self._restore_persistent_properties(host_object)
+        if call_requests is not None and call_requests.Count() > 0:
+            deserialize = self._dispatch_deserializer
+            calls = [Call(deserialize(call_requests.GetAt(i)), deserialize(call_responses.GetAt(i)), completion_keys.GetAt(i))
+                     for i in range(1, call_requests.Count() + 1)]
+            response = self.on_responses(request, response, calls)
         return_object = self.on_complete(request, response)
         self._save_persistent_properties(host_object)
         return return_object
 
+    @classmethod
+    def _coalesce_responses(cls):
+        """ For internal use only. True if the responses are handed over to on_responses. """
+        return cls.on_responses is not _BusinessProcess.on_responses and not cls._uses_continuations()
+
+    @classmethod
+    def _uses_continuations(cls):
+        """ For internal use only. True if on_request, on_message or a message handler is a coroutine function. """
+        try:
+            return cls.__dict__['_coroutine_handlers']
+        except KeyError:
+            pass
+        by_type, by_name = cls._create_dispatch_tables()
+        names = {'on_request', 'on_message'}.union(by_type.values(), by_name.values())
+        result = any(inspect.iscoroutinefunction(getattr(cls, name, None)) for name in names)
+        cls._coroutine_handlers = result
+        return result
+
+    def _continue(self, coroutine):
+        """ For internal use only. Replay a coroutine on_request, forget its state when it is done. """
+        done, result = self._continuation.run(coroutine)
+        if done:
+            self._continuation = None
+        return done, result
+
+    def _replayable(self, function, *args):
+        """ For internal use only. Make a call of a coroutine on_request once, return its result when the coroutine is replayed. """
+        continuation = self._continuation
+        if continuation is None or not continuation.running:
+            return function(*args)
+        return continuation.effect(lambda: function(*args), self._dispatch_deserializer)
+
+    @property
+    def _log_muted(self):
+        """ For internal use only. The log entries of a coroutine on_request are written once, not on its replays. """
+        return self._continuation is not None and self._continuation.replaying
+
+    def _continuation_wait(self, calls):
+        """ For internal use only. """
+        if self._continuation is None:
+            raise RuntimeError("self.call() and self.gather() can only be awaited in a coroutine on_request")
+        return (yield from self._continuation.wait(calls, self._dispatch_deserializer))
+
     def OnRequest(self, request):
         """ 
         DEPRECATED : use on_request
@@ -1,7 +1,10 @@
 import importlib
 from grongier.pex._business_host import _BusinessHost
+from grongier.pex._event_loop import _EventLoop
+from grongier.pex._polling import _PollingHost
+from grongier.pex._logging import _LogSink
 
-class _BusinessService(_BusinessHost):
+class _BusinessService(_BusinessHost, _PollingHost):
     """ This class is responsible for receiving the data from external system and sending it to business processes or business operations in the production.
     The business service can use an adapter to access the external system, which is specified in the InboundAdapter property. 
     There are three ways of implementing a business service:
@@ -14,6 +17,7 @@ class _BusinessService(_BusinessHost):
     """
     Adapter = adapter = None
     _wait_for_next_call_interval = False
+    _next_call_interval = None
 
     def on_process_input(self, message_input):
         """ Receives the message from the inbond adapter via the PRocessInput method and is responsible for forwarding it to target business processes or operations.
@@ -23,9 +27,27 @@ class _BusinessService(_BusinessHost):
         Parameters:
         message_input: an instance of IRISObject or subclass of Message containing the data that the inbound adapter passes in.
             The message can have any structure agreed upon by the inbound adapter and the business service. 
+        It can be a coroutine function (async def), it is then run on the event loop of the job.
+
+        With the adaptive_polling setting and the default adapter, on_process_input is called again at once while
+        it returns a true value (it found work), and at an interval growing from polling_min_interval by polling_backoff
+        up to polling_max_interval (CallInterval if 0) while it returns a false value.
         """
         return self.OnProcessInput(message_input)
 
+    def process_inputs(self, messages):
+        """ Receives a batch of messages from an inbound adapter whose on_task returns or yields its messages.
+        The batch is handled in one ProcessInput call: the messages sent while handling it share a session.
+        Override it to handle the batch as a whole, the default implementation calls on_process_input for each message.
+
+        Parameters:
+        messages: a list of instances of IRISObject or subclass of Message, at most max_batch of the adapter.
+        It can be a coroutine function (async def), it is then run on the event loop of the job.
+        """
+        for message in messages:
+            _EventLoop.result(self.on_process_input(message))
+        return
+
     def _set_iris_handles(self, handle_current, handle_partner):
         """ For internal use only. """
         self.iris_handle = handle_current
@@ -36,11 +58,27 @@ class _BusinessService(_BusinessHost):
         self.Adapter = self.adapter = handle_partner
         return
     
+    @_LogSink.flush_after
     @_BusinessHost.input_deserialzer
     @_BusinessHost.output_serialzer
     def _dispatch_on_process_input(self, request):
         """ For internal use only. """
-        return self.on_process_input(request)
+        response = _EventLoop.result(self.on_process_input(request))
+        if request is None or request == "":
+            # polled by the default adapter
+            interval = self._next_poll_interval(bool(response), lambda: self.iris_handle.Adapter.CallInterval)
+            if interval is not None:
+                self._wait_for_next_call_interval = interval > 0
+                self._next_call_interval = interval
+                # the default adapter discards the output, which is only the outcome of the poll
+                return None
+        return response
+
+    @_LogSink.flush_after
+    def _dispatch_process_inputs(self, messages):
+        """ For internal use only. """
+        _EventLoop.result(self.process_inputs([self._dispatch_deserializer(message) for message in messages]))
+        return
 
     def OnProcessInput(self, message_input):
         """  DEPRECATED : use on_process_input
@@ -0,0 +1,105 @@
+import sys
+import time
+import importlib
+
+from collections import OrderedDict
+
+class _ClassResolver():
+    """ Bounded cache resolving a "module.classname" string to the python class.
+
+    Entries are checked against sys.modules on each hit, so a module that has been reloaded
+    (or removed) is resolved again. Classnames that can't be resolved are remembered for
+    NEGATIVE_TTL seconds so that unknown classnames fail fast.
+    """
+
+    MAXSIZE = 1024
+    """ Maximum number of classnames kept in the cache."""
+    NEGATIVE_TTL = 10.0
+    """ Number of seconds an unknown classname is remembered."""
+
+    _cache = OrderedDict()
+    _negative = OrderedDict()
+
+    hits = 0
+    misses = 0
+    negative_hits = 0
+    invalidations = 0
+
+    @classmethod
+    def resolve(cls, classname:str):
+        """
+        Return the python class named by classname.
+
+        :param classname: the full name of the class, ie: module.classname
+        :return: the python class
+        :raises ValueError: if the classname doesn't include a module
+        :raises ImportError: if the class can't be found
+        """
+        entry = cls._cache.get(classname)
+        if entry is not None:
+            klass, module_name, module, name = entry
+            if sys.modules.get(module_name) is module and module.__dict__.get(name) is klass:
+                cls.hits += 1
+                cls._cache.move_to_end(classname)
+                return klass
+            # the module has been reloaded or removed
+            del cls._cache[classname]
+            cls.invalidations += 1
+
+        expiry = cls._negative.get(classname)
+        if expiry is not None:
+            if time.monotonic() < expiry:
+                cls.negative_hits += 1
+                raise ImportError("Class not found: " + classname)
+            del cls._negative[classname]
+
+        cls.misses += 1
+        j = classname.rfind(".")
+        if (j <= 0):
+            raise ValueError("Classname must include a module: " + classname)
+        module_name = classname[:j]
+        name = classname[j+1:]
+        try:
+            module = importlib.import_module(module_name)
+            klass = getattr(module, name)
+        except Exception:
+            cls._negative[classname] = time.monotonic() + cls.NEGATIVE_TTL
+            if len(cls._negative) > cls.MAXSIZE:
+                cls._negative.popitem(last=False)
+            raise ImportError("Class not found: " + classname)
+
+        cls._cache[classname] = (klass, module_name, module, name)
+        if len(cls._cache) > cls.MAXSIZE:
+            cls._cache.popitem(last=False)
+        return klass
+
+    @classmethod
+    def invalidate(cls, classname:str=None):
+        """
+        Forget one classname, or all of them.
+
+        :param classname: the classname to forget, None to clear the whole cache
+        """
+        if classname is None:
+            cls.invalidations += len(cls._cache)
+            cls._cache.clear()
+            cls._negative.clear()
+        else:
+            if cls._cache.pop(classname, None) is not None:
+                cls.invalidations += 1
+            cls._negative.pop(classname, None)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Counters of the cache.
+
+        :return: a dictionary with hits, misses, negative_hits, invalidations and size
+        """
+        return {
+            'hits': cls.hits,
+            'misses': cls.misses,
+            'negative_hits': cls.negative_hits,
+            'invalidations': cls.invalidations,
+            'size': len(cls._cache),
+        }
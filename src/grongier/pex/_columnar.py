@@ -0,0 +1,151 @@
+import json
+import importlib
+
+MARKER = 'buffer:'
+""" Prefix of the value written in the body in place of a DataFrame or an ndarray."""
+
+CODEC_SUFFIX = '+columnar'
+""" Suffix of the codec tag of a message whose jbuf stream holds frames."""
+
+class _Columnar():
+    """ Binary side payload of the DataFrame and ndarray fields of a message.
+
+    Instead of being written in the body as json, each DataFrame or ndarray field is replaced by
+    the marker "buffer:N" and written as frames: a json header followed by the raw buffers.
+    The first frame maps the name of each replaced field to the index of its frames, only these
+    fields are read back from the frames, the markers themselves are never parsed, so a string
+    value starting with "buffer:" is left as is.
+    - DataFrames are written in the Arrow IPC stream format when pyarrow is installed, otherwise
+      column by column as NumPy buffers when all the columns have a numeric, bool or datetime dtype
+      and the index is a RangeIndex.
+    - ndarrays are written as their NumPy buffer, the header holds the dtype and the shape.
+    Other values, DataFrames that can't be written without pyarrow included, stay in the body.
+
+    Decoded ndarrays are built with np.frombuffer on the frames, without copy, they are read-only.
+    """
+
+    @staticmethod
+    def _kind(value):
+        """ Return 'ndarray' or 'dataframe' for the values written as frames, None otherwise."""
+        klass = type(value)
+        module = klass.__module__
+        if klass.__name__ == 'ndarray' and module == 'numpy':
+            return None if value.dtype.hasobject else 'ndarray'
+        if klass.__name__ == 'DataFrame' and module.startswith('pandas'):
+            return 'dataframe'
+        return None
+
+    @staticmethod
+    def encode(dikt:dict):
+        """
+        Replace the DataFrame and ndarray values of a dictionary by markers.
+
+        :param dikt: the dictionary of the message, it isn't modified
+        :return: a tuple (dictionary, frames), the same dictionary and an empty list if there is nothing to replace
+        """
+        frames = []
+        fields = {}
+        result = dikt
+        for key, value in dikt.items():
+            kind = _Columnar._kind(value)
+            if kind is None:
+                continue
+            if kind == 'ndarray':
+                encoded = _Columnar._encode_ndarray(value)
+            else:
+                encoded = _Columnar._encode_dataframe(value)
+            if encoded is None:
+                continue
+            if result is dikt:
+                result = dict(dikt)
+            result[key] = MARKER + str(len(fields))
+            # the frames are numbered after the header of the fields
+            fields[key] = len(frames) + 1
+            frames.extend(encoded)
+        if frames:
+            frames.insert(0, _Columnar._header(fields=fields))
+        return result, frames
+
+    @staticmethod
+    def decode(dikt:dict, frames:list) -> dict:
+        """
+        Replace the markers of a dictionary by the DataFrames and ndarrays read from the frames.
+
+        :param dikt: the dictionary decoded from the body, it is modified
+        :param frames: the frames, as returned by _Utils.unpack_frames
+        :return: the dictionary
+        """
+        if not frames:
+            return dikt
+        for key, i in json.loads(bytes(frames[0]))['fields'].items():
+            if key in dikt:
+                dikt[key] = _Columnar._decode(frames, i)
+        return dikt
+
+    @staticmethod
+    def _header(**header) -> bytes:
+        return json.dumps(header).encode()
+
+    @staticmethod
+    def _encode_ndarray(array) -> list:
+        np = importlib.import_module('numpy')
+        if array.flags.c_contiguous:
+            order = 'C'
+        elif array.flags.f_contiguous:
+            order = 'F'
+        else:
+            array = np.ascontiguousarray(array)
+            order = 'C'
+        header = _Columnar._header(kind='ndarray', frames=1, dtype=np.lib.format.dtype_to_descr(array.dtype),
+                                   shape=array.shape, order=order)
+        return [header, array.reshape(-1, order=order).view(np.uint8).data if array.size else b'']
+
+    @staticmethod
+    def _encode_dataframe(frame) -> list:
+        try:
+            pa = importlib.import_module('pyarrow')
+        except ImportError:
+            return _Columnar._encode_dataframe_numpy(frame)
+        table = pa.Table.from_pandas(frame)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return [_Columnar._header(kind='arrow', frames=1), sink.getvalue()]
+
+    @staticmethod
+    def _encode_dataframe_numpy(frame) -> list:
+        pd = importlib.import_module('pandas')
+        np = importlib.import_module('numpy')
+        index = frame.index
+        if not isinstance(index, pd.RangeIndex) or not frame.columns.is_unique:
+            return None
+        columns = []
+        for name in frame.columns:
+            column = frame[name].to_numpy()
+            if column.dtype.hasobject or not isinstance(name, str):
+                return None
+            columns.append(np.ascontiguousarray(column))
+        header = _Columnar._header(kind='columns', frames=len(columns), columns=list(frame.columns),
+                                   dtypes=[np.lib.format.dtype_to_descr(c.dtype) for c in columns],
+                                   index=[index.start, index.stop, index.step])
+        return [header] + [c.view(np.uint8).data if c.size else b'' for c in columns]
+
+    @staticmethod
+    def _decode(frames:list, i:int):
+        header = json.loads(bytes(frames[i]))
+        kind = header['kind']
+        if kind == 'ndarray':
+            np = importlib.import_module('numpy')
+            dtype = np.lib.format.descr_to_dtype(header['dtype'])
+            return np.frombuffer(frames[i + 1], dtype=dtype).reshape(header['shape'], order=header['order'])
+        if kind == 'arrow':
+            pa = importlib.import_module('pyarrow')
+            return pa.ipc.open_stream(pa.py_buffer(frames[i + 1])).read_all().to_pandas()
+        if kind == 'columns':
+            pd = importlib.import_module('pandas')
+            np = importlib.import_module('numpy')
+            data = {}
+            for j, (name, descr) in enumerate(zip(header['columns'], header['dtypes'])):
+                data[name] = np.frombuffer(frames[i + 1 + j], dtype=np.lib.format.descr_to_dtype(descr))
+            return pd.DataFrame(data, index=pd.RangeIndex(*header['index']), columns=header['columns'])
+        raise ValueError("Unknown buffer kind: " + str(kind))
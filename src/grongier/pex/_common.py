@@ -1,15 +1,27 @@
-import traceback
+import sys
 import dataclasses
 import inspect
 import iris
 import abc
 
+from grongier.pex._event_loop import _EventLoop
+from grongier.pex._logging import _LogSink
+
+# rank of the log entry types, entries below the log_level setting of the component are dropped
+_LOG_LEVELS = {'assert': 0, 'info': 1, 'warning': 2, 'error': 3, 'alert': 4}
+
 class _Common(metaclass=abc.ABCMeta):
     """ This is a common superclass for all component types that defines common methods."""
 
     INFO_URL: str
     ICON_URL: str
     iris_handle = None
+    log_level:str = 'assert'
+    log_buffer_size:int = 0
+    log_flush_interval:float = 1.0
+    log_repeat_limit:int = 0
+    # True while the entries must not be written, see _BusinessProcess._log_muted
+    _log_muted = False
 
     def on_init(self):
         """ The on_init() method is called when the component is started.
@@ -25,27 +37,52 @@ class _Common(metaclass=abc.ABCMeta):
         Use the on_connected() method to initialize any structures needed by the component."""
         return self.OnConnected()
 
+    @_LogSink.flush_after
     def _dispatch_on_connected(self, host_object):
         """ For internal use only. """
-        self.on_connected()
+        _EventLoop.result(self.on_connected())
         return
 
+    @_LogSink.flush_after
     def _dispatch_on_init(self, host_object):
         """ For internal use only. """
-        self.on_init()
+        _EventLoop.result(self.on_init())
         return
 
-    def _dispatch_on_tear_down(self, host_object):
+    def _dispatch_on_tear_down(self, host_object=None):
         """ For internal use only. """
-        self.on_tear_down()
+        try:
+            _EventLoop.result(self.on_tear_down())
+        finally:
+            _LogSink.flush()
+            _EventLoop.close()
         return
 
     def _set_iris_handles(self, handle_current, handle_partner):
         pass
 
+    _message_kinds = {}
+
+    @classmethod
+    def _message_kind(cls, klass):
+        """ Return 'message', 'pickle' or None for a python class.
+        The answer is computed once per class, walking the bases of the class."""
+        try:
+            return _Common._message_kinds[klass]
+        except KeyError:
+            pass
+        if cls._is_message_class(klass):
+            kind = 'message'
+        elif cls._is_pickel_message_class(klass):
+            kind = 'pickle'
+        else:
+            kind = None
+        _Common._message_kinds[klass] = kind
+        return kind
+
     @classmethod
     def _is_message_instance(cls, obj):
-        if cls._is_message_class(type(obj)):
+        if cls._message_kind(type(obj)) == 'message':
             if not dataclasses.is_dataclass(obj):
                 raise TypeError(type(obj).__module__ + '.' + type(obj).__qualname__+" must be a dataclass")
             return True
@@ -53,7 +90,7 @@ class _Common(metaclass=abc.ABCMeta):
 
     @classmethod
     def _is_pickle_message_instance(cls, obj):
-        if cls._is_pickel_message_class(type(obj)):
+        if cls._message_kind(type(obj)) == 'pickle':
             return True
         return False
     
@@ -100,16 +137,18 @@ class _Common(metaclass=abc.ABCMeta):
             classes = inspect.getmro(cls)
             for cl in classes:
                 classname = str(cl)[7:-1]
-                if classname in ["'grongier.pex.BusinessService'","'grongier.pex.BusinessOperation'","'grongier.pex.DuplexOperation'","'grongier.pex.DuplexService'"] :
+                if classname in ["'grongier.pex.BusinessService'","'grongier.pex.BusinessOperation'","'grongier.pex.DuplexOperation'","'grongier.pex.DuplexService'","'grongier.pex.BatchBusinessOperation'"] :
                     # Remove the apostrophes and set as super_class, then find if it uses an adapter
-                    super_class = classname[1:-1]
+                    # a batch business operation is a business operation on the IRIS side
+                    super_class = classname[1:-1].replace('BatchBusinessOperation','BusinessOperation')
                     adapter = cls.get_adapter_type()
                     if adapter is None:
                         adapter = cls.getAdapterType()
                     break
-                elif classname in ["'grongier.pex.BusinessProcess'","'grongier.pex.DuplexProcess'","'grongier.pex.InboundAdapter'","'grongier.pex.OutboundAdapter'"] :
+                elif classname in ["'grongier.pex.BusinessProcess'","'grongier.pex.DuplexProcess'","'grongier.pex.InboundAdapter'","'grongier.pex.OutboundAdapter'","'grongier.pex.HttpOutboundAdapter'"] :
                     # Remove the apostrophes and set as super_class
-                    super_class = classname[1:-1]
+                    # an http outbound adapter is an outbound adapter on the IRIS side
+                    super_class = classname[1:-1].replace('HttpOutboundAdapter','OutboundAdapter')
                     break
 
             if ""==super_class:
@@ -202,85 +241,75 @@ class _Common(metaclass=abc.ABCMeta):
             pass
         return ret
 
-    def log_info(self, message):
+    def _log(self, level, method, message, args):
+        """ Write a log entry with the method of the caller of log_xxx, found with a single frame lookup.
+        Nothing is formatted nor sent to IRIS when the level is below the log_level setting.
+        When log_buffer_size isn't 0, the entry is queued in the log sink of the job and written in bulk."""
+        if self._log_muted:
+            return
+        threshold = _LOG_LEVELS.get(self.log_level)
+        if threshold is None:
+            threshold = _LOG_LEVELS.get(str(self.log_level).strip().lower(), 0)
+        if _LOG_LEVELS[level] < threshold:
+            return
+        if args:
+            message = message % args
+        try:
+            current_method = sys._getframe(2).f_code.co_name
+        except ValueError:
+            current_method = None
+        _LogSink.write(method, self.__class__.__name__, current_method, message,
+                       int(self.log_buffer_size or 0), float(self.log_flush_interval or 0), int(self.log_repeat_limit or 0))
+        return
+
+    def log_info(self, message, *args):
         """ Write a log entry of type "info". Log entries can be viewed in the management portal.
         
         Parameters:
         message: a string that is written to the log.
+        args: optional values, the message is then formatted with message % args, only if the entry is written.
         """
-
-        current_class = self.__class__.__name__
-        current_method = None
-        try:
-            frame = traceback.extract_stack()[-2]
-            current_method = frame.name
-        except:
-            pass
-        iris.cls("Ens.Util.Log").LogInfo(current_class, current_method, message)
+        self._log('info', 'LogInfo', message, args)
         return
 
-    def log_alert(self, message):
+    def log_alert(self, message, *args):
         """ Write a log entry of type "alert". Log entries can be viewed in the management portal.
         
         Parameters:
         message: a string that is written to the log.
+        args: optional values, the message is then formatted with message % args, only if the entry is written.
         """
-        current_class = self.__class__.__name__
-        current_method = None
-        try:
-            frame = traceback.extract_stack()[-2]
-            current_method = frame.name
-        except:
-            pass
-        iris.cls("Ens.Util.Log").LogAlert(current_class, current_method, message)
+        self._log('alert', 'LogAlert', message, args)
         return
 
-    def log_warning(self, message):
+    def log_warning(self, message, *args):
         """ Write a log entry of type "warning". Log entries can be viewed in the management portal.
         
         Parameters:
         message: a string that is written to the log.
+        args: optional values, the message is then formatted with message % args, only if the entry is written.
         """
-        current_class = self.__class__.__name__
-        current_method = None
-        try:
-            frame = traceback.extract_stack()[-2]
-            current_method = frame.name
-        except:
-            pass
-        iris.cls("Ens.Util.Log").LogWarning(current_class, current_method, message)
+        self._log('warning', 'LogWarning', message, args)
         return
 
-    def log_error(self, message):
+    def log_error(self, message, *args):
         """ Write a log entry of type "error". Log entries can be viewed in the management portal.
         
         Parameters:
         message: a string that is written to the log.
+        args: optional values, the message is then formatted with message % args, only if the entry is written.
         """
-        current_class = self.__class__.__name__
-        current_method = None
-        try:
-            frame = traceback.extract_stack()[-2]
-            current_method = frame.name
-        except:
-            pass
-        iris.cls("Ens.Util.Log").LogError(current_class, current_method, message)
+        self._log('error', 'LogError', message, args)
         return
 
-    def log_assert(self, message):
+    def log_assert(self, message, *args):
         """ Write a log entry of type "assert". Log entries can be viewed in the management portal.
         
         Parameters:
         message: a string that is written to the log.
+        args: optional values, the message is then formatted with message % args, only if the entry is written.
         """
-        current_class = self.__class__.__name__
-        current_method = None
-        try:
-            frame = traceback.extract_stack()[-2]
-            current_method = frame.name
-        except:
-            pass
-        iris.cls("Ens.Util.Log").LogAssert(current_class, current_method, message)
+        self._log('assert', 'LogAssert', message, args)
         return
 
     def LOGINFO(self, message):
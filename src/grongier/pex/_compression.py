@@ -0,0 +1,93 @@
+import zlib
+import lzma
+
+ZLIB_WINDOW_SIZE = 32768
+""" Size of the zlib window, only the last 32 KB of a preset dictionary are used."""
+
+class _Compression():
+    """ Compression of the body of the messages with the standard library.
+
+    Supported methods are zlib and lzma. A preset dictionary (zdict) can be given to zlib
+    so that small messages sharing the same keys and values compress too. The dictionary
+    isn't stored in the body, the reader must use the same one; zlib checks it with the
+    dictionary id written in the header.
+    """
+
+    METHODS = ('zlib', 'lzma')
+
+    @staticmethod
+    def check(method:str):
+        """
+        Check that the compression method is supported.
+
+        :param method: the name of the compression method
+        :raises ValueError: if the method is unknown
+        """
+        if method not in _Compression.METHODS:
+            raise ValueError("Unknown compression method: " + str(method))
+
+    @staticmethod
+    def compress(data:bytes, method:str='zlib', level:int=None, zdict:bytes=None) -> bytes:
+        """
+        Compress data.
+
+        :param data: the bytes to compress
+        :param method: zlib or lzma
+        :param level: the compression level (zlib: 0-9, lzma: 0-9), None for the default one
+        :param zdict: a preset dictionary, zlib only
+        :return: the compressed bytes
+        """
+        if method == 'zlib':
+            if level is None:
+                level = zlib.Z_DEFAULT_COMPRESSION
+            if zdict:
+                compressor = zlib.compressobj(level, zdict=zdict)
+            else:
+                compressor = zlib.compressobj(level)
+            return compressor.compress(data) + compressor.flush()
+        if method == 'lzma':
+            if zdict:
+                raise ValueError("Preset dictionaries are only supported by zlib")
+            return lzma.compress(data, preset=level)
+        _Compression.check(method)
+
+    @staticmethod
+    def decompress(data, method:str='zlib', zdict:bytes=None) -> bytes:
+        """
+        Decompress data written by compress.
+
+        :param data: the compressed bytes
+        :param method: zlib or lzma
+        :param zdict: the preset dictionary used to compress the data
+        :return: the decompressed bytes
+        """
+        if method == 'zlib':
+            if zdict:
+                decompressor = zlib.decompressobj(zdict=zdict)
+            else:
+                decompressor = zlib.decompressobj()
+            return decompressor.decompress(data) + decompressor.flush()
+        if method == 'lzma':
+            return lzma.decompress(data)
+        _Compression.check(method)
+
+    @staticmethod
+    def build_dict(samples, size:int=ZLIB_WINDOW_SIZE) -> bytes:
+        """
+        Build a zlib preset dictionary from sample bodies.
+
+        zlib looks for matches in the dictionary as if it was written just before the data,
+        the most frequent content must be at the end. Samples are deduplicated, ordered from the
+        least to the most frequent and the result is truncated to the window size.
+
+        :param samples: an iterable of sample bodies, str or bytes
+        :param size: the maximum size of the dictionary
+        :return: the dictionary
+        """
+        counts = {}
+        for sample in samples:
+            if isinstance(sample, str):
+                sample = sample.encode()
+            counts[sample] = counts.get(sample, 0) + 1
+        ordered = sorted(counts, key=counts.get)
+        return b''.join(ordered)[-size:]
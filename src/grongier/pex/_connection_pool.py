@@ -0,0 +1,225 @@
+import collections
+import contextlib
+import threading
+import time
+
+class _ConnectionPool():
+    """ Pool of connections to an external system, kept open from one message to the next.
+
+    Connections are created by factory on demand, up to max_size open at once, and handed back to the
+    pool after use. A connection idle for more than max_idle seconds is closed by evict_idle, a
+    connection failing check is closed by check_idle, both are run on keepalive by the outbound adapter.
+    A connection released after an OSError (the connection broke) is closed instead of kept.
+
+    The pool is thread safe, so it can serve concurrent requests of a component.
+
+    Counters: created, evicted (idle or failing connections closed), acquired, waits (acquires that had
+    to wait for a free connection) and wait_time (total seconds waited).
+    """
+
+    def __init__(self, factory, max_size=10, max_idle=60.0, check=None, close=None, timeout=30.0):
+        """
+        :param factory: function returning a new connection
+        :param max_size: maximum number of connections open at once, in use or idle
+        :param max_idle: seconds after which an idle connection is closed by evict_idle, 0 to keep them
+        :param check: function returning True if a connection is still usable, None to skip the checks
+        :param close: function closing a connection, by default its close method is called
+        :param timeout: seconds to wait for a free connection before raising TimeoutError, None to wait forever
+        """
+        self.factory = factory
+        self.max_size = max(int(max_size), 1)
+        self.max_idle = float(max_idle)
+        self.checker = check
+        self.closer = close
+        self.timeout = timeout
+        # idle connections with the time they were released, the most recent on the right
+        self._idle = collections.deque()
+        self._in_use = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self.created = 0
+        self.evicted = 0
+        self.acquired = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    @property
+    def size(self) -> int:
+        """ Number of open connections, in use or idle."""
+        return self._in_use + len(self._idle)
+
+    def acquire(self, timeout=-1):
+        """
+        Take an idle connection, or open a new one, waiting for a free one when max_size are in use.
+
+        :param timeout: seconds to wait, None to wait forever, by default the timeout of the pool
+        :return: the connection, to give back with release
+        """
+        if timeout == -1:
+            timeout = self.timeout
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The connection pool is closed")
+            if not self._idle and self.size >= self.max_size:
+                start = time.monotonic()
+                self.waits += 1
+                try:
+                    if not self._condition.wait_for(lambda: self._idle or self.size < self.max_size or self._closed, timeout):
+                        raise TimeoutError("No free connection after " + str(timeout) + " seconds, " + str(self.max_size) + " in use")
+                finally:
+                    self.wait_time += time.monotonic() - start
+                if self._closed:
+                    raise RuntimeError("The connection pool is closed")
+            self.acquired += 1
+            self._in_use += 1
+            if self._idle:
+                return self._idle.pop()[0]
+        # open the connection outside of the lock, the slot is already counted in _in_use
+        try:
+            connection = self.factory()
+        except BaseException:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.created += 1
+        return connection
+
+    def release(self, connection, discard=False):
+        """
+        Give a connection back to the pool.
+
+        :param connection: a connection returned by acquire
+        :param discard: True to close the connection instead of keeping it (it broke)
+        """
+        with self._condition:
+            self._in_use -= 1
+            keep = not discard and not self._closed
+            if keep:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+        if not keep:
+            self._close(connection)
+
+    @contextlib.contextmanager
+    def connection(self, timeout=-1):
+        """
+        Context manager acquiring a connection and releasing it at the end of the block.
+        The connection is closed when the block raises an OSError.
+
+            with self.pool.connection() as smtp:
+                smtp.sendmail(sender, receivers, text)
+        """
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        except OSError:
+            self.release(connection, discard=True)
+            raise
+        except BaseException:
+            self.release(connection)
+            raise
+        self.release(connection)
+
+    def warm_up(self, count) -> int:
+        """
+        Open connections ahead of the first messages, up to count idle connections and max_size in all.
+
+        :param count: the number of idle connections wanted
+        :return: the number of connections opened
+        """
+        opened = 0
+        while True:
+            with self._condition:
+                if self._closed or len(self._idle) >= count or self.size >= self.max_size:
+                    return opened
+                # the slot is reserved while the connection is opened outside of the lock
+                self._in_use += 1
+            try:
+                connection = self.factory()
+            except BaseException:
+                with self._condition:
+                    self._in_use -= 1
+                    self._condition.notify()
+                raise
+            # the slot is handed over to the idle connection at once, the size never exceeds max_size
+            with self._condition:
+                self._in_use -= 1
+                self.created += 1
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+            opened += 1
+
+    def evict_idle(self) -> int:
+        """ Close the connections idle for more than max_idle seconds, return their number."""
+        if self.max_idle <= 0:
+            return 0
+        limit = time.monotonic() - self.max_idle
+        expired = []
+        with self._condition:
+            # the least recently used are on the left
+            while self._idle and self._idle[0][1] < limit:
+                expired.append(self._idle.popleft()[0])
+            self.evicted += len(expired)
+            self._condition.notify_all()
+        for connection in expired:
+            self._close(connection)
+        return len(expired)
+
+    def check_idle(self) -> int:
+        """ Run the health check on the idle connections and close the failing ones, return their number."""
+        if self.checker is None:
+            return 0
+        with self._condition:
+            idle, self._idle = self._idle, collections.deque()
+            self._in_use += len(idle)
+        healthy, failed = [], []
+        for connection, released in idle:
+            try:
+                ok = self.checker(connection)
+            except Exception:
+                ok = False
+            (healthy if ok else failed).append((connection, released))
+        with self._condition:
+            self._in_use -= len(idle)
+            if self._closed:
+                failed += healthy
+            else:
+                self._idle.extendleft(reversed(healthy))
+            self.evicted += len(failed)
+            self._condition.notify_all()
+        for connection, _ in failed:
+            self._close(connection)
+        return len(failed)
+
+    def close(self):
+        """ Close the idle connections, the connections in use are closed when released."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, collections.deque()
+            self._condition.notify_all()
+        for connection, _ in idle:
+            self._close(connection)
+
+    def stats(self) -> dict:
+        """ Return the number of connections in use and idle, and the counters."""
+        with self._condition:
+            return {
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'created': self.created,
+                'evicted': self.evicted,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+            }
+
+    def _close(self, connection):
+        try:
+            if self.closer is not None:
+                self.closer(connection)
+            elif hasattr(connection, 'close'):
+                connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,162 @@
+import ast
+import hashlib
+import inspect
+
+SEND_METHODS = ('send_request_sync', 'send_request_async', 'SendRequestSync', 'SendRequestAsync')
+""" Methods whose first argument, or target keyword argument, is the name of a production item."""
+
+class _Connections():
+    """ Static discovery of the targets of a component, for the interoperability UI.
+
+    The source of the class, and of its user defined base classes, is parsed once with ast, the calls
+    to the send methods are looked for and their target is resolved without running any code:
+    - string constants,
+    - class attributes (self.X, cls.X or ClassName.X) holding a string,
+    - attributes assigned a string constant in a method (self.X = "..."),
+    - names assigned a string constant in the same function or at the module level.
+    Targets that can't be resolved statically are ignored.
+
+    Results are cached per class with the hash of the source file, so that a modified file is parsed again.
+    """
+
+    _cache = {}
+
+    @classmethod
+    def find(cls, klass) -> list:
+        """
+        Return the names of the targets of the component class klass.
+
+        :param klass: the component class
+        :return: a list of names, without duplicates
+        """
+        targets = []
+        for base in klass.__mro__:
+            if base is object or base.__module__.split('.')[0] == 'grongier':
+                continue
+            for target in cls._find_in_class(base):
+                if target not in targets:
+                    targets.append(target)
+        return targets
+
+    @classmethod
+    def clear(cls):
+        """ Forget all the cached results."""
+        cls._cache.clear()
+
+    @classmethod
+    def _find_in_class(cls, klass) -> tuple:
+        try:
+            filename = inspect.getsourcefile(klass)
+            with open(filename, 'rb') as file:
+                source = file.read()
+        except (TypeError, OSError):
+            return ()
+        key = (filename, klass.__qualname__)
+        digest = hashlib.sha1(source).hexdigest()
+        cached = cls._cache.get(key)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+        try:
+            tree = ast.parse(source, filename)
+        except SyntaxError:
+            targets = ()
+        else:
+            node = cls._class_node(tree, klass)
+            targets = () if node is None else tuple(_TargetFinder(tree, node, klass).targets)
+        cls._cache[key] = (digest, targets)
+        return targets
+
+    @staticmethod
+    def _class_node(tree, klass):
+        """ Find the ClassDef of klass, following its qualname, or by name for the classes defined in functions."""
+        path = klass.__qualname__.split('.')
+        if '<locals>' not in path:
+            body = tree.body
+            node = None
+            for name in path:
+                node = next((n for n in body if isinstance(n, ast.ClassDef) and n.name == name), None)
+                if node is None:
+                    break
+                body = node.body
+            if node is not None:
+                return node
+        return next((n for n in ast.walk(tree) if isinstance(n, ast.ClassDef) and n.name == klass.__name__), None)
+
+class _TargetFinder():
+    """ Resolve the targets of the send calls of one class definition."""
+
+    def __init__(self, tree, node, klass):
+        self.klass = klass
+        self.class_name = node.name
+        self.module_constants = self._constants(tree.body)
+        self.attribute_constants = {}
+        for child in ast.walk(node):
+            if isinstance(child, (ast.Assign, ast.AnnAssign)):
+                for target in self._assign_targets(child):
+                    if (isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name)
+                            and target.value.id == 'self' and self._is_str(child.value)):
+                        self.attribute_constants.setdefault(target.attr, []).append(child.value.value)
+        self.targets = []
+        self._visit(node, self.module_constants)
+
+    @staticmethod
+    def _is_str(node) -> bool:
+        return isinstance(node, ast.Constant) and isinstance(node.value, str)
+
+    @staticmethod
+    def _assign_targets(node) -> list:
+        if isinstance(node, ast.Assign):
+            return node.targets
+        return [node.target]
+
+    def _constants(self, body) -> dict:
+        """ Names assigned a string constant in a block, other assignments of the same name are ignored."""
+        constants = {}
+        for node in body:
+            if isinstance(node, (ast.Assign, ast.AnnAssign)) and self._is_str(node.value):
+                for target in self._assign_targets(node):
+                    if isinstance(target, ast.Name):
+                        constants.setdefault(target.id, []).append(node.value.value)
+        return constants
+
+    def _visit(self, node, constants):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                local = dict(constants)
+                local.update(self._constants(ast.walk(child)))
+                self._visit(child, local)
+                continue
+            if isinstance(child, ast.Call):
+                self._call(child, constants)
+            self._visit(child, constants)
+
+    def _call(self, node, constants):
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else func.id if isinstance(func, ast.Name) else None
+        if name not in SEND_METHODS:
+            return
+        target = next((k.value for k in node.keywords if k.arg == 'target'), None)
+        if target is None and node.args:
+            target = node.args[0]
+        if target is None:
+            return
+        for value in self._resolve(target, constants):
+            if value not in self.targets:
+                self.targets.append(value)
+
+    def _resolve(self, node, constants) -> list:
+        if self._is_str(node):
+            return [node.value]
+        if isinstance(node, ast.Name):
+            return constants.get(node.id, [])
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            if node.value.id in ('self', 'cls', self.class_name):
+                try:
+                    value = inspect.getattr_static(self.klass, node.attr)
+                except AttributeError:
+                    value = None
+                if isinstance(value, str):
+                    return [value]
+                if node.value.id == 'self':
+                    return self.attribute_constants.get(node.attr, [])
+        return []
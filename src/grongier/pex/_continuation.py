@@ -0,0 +1,213 @@
+from grongier.pex._utils import _Utils
+from grongier.pex._lazy_message import _LazyMessage
+from grongier.pex._business_host import RequestError
+
+PREFIX = 'iop:'
+""" Prefix of the completion keys of the calls made with await self.call(...)."""
+
+STATE_KEY = '__iop_continuation__'
+""" Key of the continuation in the persistent state of the business process."""
+
+class _IrisRef():
+    """ Reference to an IRIS object kept in the state of a continuation, instead of the object."""
+
+    def __init__(self, classname, id):
+        self.classname = classname
+        self.id = id
+
+def _pack(value):
+    """ Replace the IRIS objects and the lazy messages of a response by references, recursively in lists and tuples."""
+    if isinstance(value, list):
+        return [_pack(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_pack(v) for v in value)
+    if isinstance(value, RequestError):
+        return RequestError(value.target, _pack(value.request), value.message)
+    serial = _LazyMessage.serial(value)
+    if serial is not None:
+        # the message is kept in IRIS, only its id is saved
+        value = serial
+    if value is not None and value != "" and type(value).__module__.find('iris') == 0:
+        return _IrisRef(value._ClassName(1), value._Id())
+    return value
+
+def _unpack(value, deserialize):
+    """ Inverse of _pack."""
+    if isinstance(value, list):
+        return [_unpack(v, deserialize) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_unpack(v, deserialize) for v in value)
+    if isinstance(value, RequestError):
+        return RequestError(value.target, _unpack(value.request, deserialize), value.message)
+    if isinstance(value, _IrisRef):
+        return deserialize(_Utils.iris_class(value.classname)._OpenId(value.id))
+    return value
+
+class _Suspend():
+    """ Yielded to the driver when the coroutine waits for responses that haven't arrived yet."""
+
+_SUSPEND = _Suspend()
+
+class _Call():
+    """ Awaitable returned by BusinessProcess.call, the request is sent when it is awaited."""
+
+    def __init__(self, process, target, request, description=None):
+        self.process = process
+        self.target = target
+        self.request = request
+        self.description = description
+
+    def send(self, completion_key):
+        self.process.send_request_async(self.target, self.request, response_required=True,
+                                        completion_key=completion_key, description=self.description)
+
+    def __await__(self):
+        responses = yield from self.process._continuation_wait([self])
+        return responses[0]
+
+class _Gather():
+    """ Awaitable returned by BusinessProcess.gather, all the requests are sent at once."""
+
+    def __init__(self, process, calls):
+        self.process = process
+        self.calls = calls
+
+    def __await__(self):
+        return (yield from self.process._continuation_wait(self.calls))
+
+class _Continuation():
+    """ Continuation of a coroutine on_request of a business process, by deterministic replay.
+
+    A coroutine can't be saved between two jobs, so the coroutine is started again from the beginning
+    each time the responses it waits for have all arrived. The calls are numbered in the order they are
+    awaited, call n gets the completion key "iop:n": the calls that have already been sent aren't sent
+    again and the awaits of the calls already answered return their response at once, until the first
+    call still waiting for its response, where the coroutine is suspended and closed.
+
+    The code before the await the coroutine was suspended at is replayed: while replaying, log entries
+    aren't written and the synchronous calls (send_request_sync, send_multi_request_sync) and the
+    send_request_async without await aren't sent again, the result they had the first time is returned.
+    The handler must be deterministic: the same request and the same responses must lead to the same
+    calls in the same order, a replay sending a call to another target, or making a synchronous call
+    that wasn't made the first time, raises a RuntimeError. Other side effects (writes to a database,
+    to a file...) are run again at each replay, they should come after the last await.
+    Each resume replays all the code before it, n sequential awaits cost O(n²) steps of the handler.
+
+    The state is a dict, saved with the persistent properties of the process:
+    - sent: the number of calls already sent,
+    - targets: the target of each call sent, to check the replays,
+    - responses: the responses received, by completion key,
+    - effects: the results of the synchronous calls, in their order,
+    - pending: the completion keys the coroutine is waiting for,
+    - resume: the number of the first call of the await the coroutine is suspended at, None before the first suspension.
+    The IRIS objects and the messages decoded lazily are saved as references to the IRIS messages,
+    the other python messages are pickled.
+    """
+
+    def __init__(self, state=None):
+        self.state = state if state is not None else {'sent': 0, 'responses': {}, 'pending': []}
+        for key, value in (('targets', []), ('effects', []), ('resume', None)):
+            self.state.setdefault(key, value)
+        self.index = 0
+        self.effect_index = 0
+        self.running = False
+        self.replaying = False
+
+    @staticmethod
+    def is_key(completion_key) -> bool:
+        """ Return True for the completion keys of the calls made with await self.call(...)."""
+        return isinstance(completion_key, str) and completion_key.startswith(PREFIX)
+
+    def record(self, completion_key, response):
+        """
+        Keep the response of a call. IRIS objects and lazy messages are kept as a reference, python messages as is.
+
+        :param completion_key: the completion key of the call
+        :param response: the response, deserialized
+        """
+        self.state['responses'][completion_key] = _pack(response)
+
+    def ready(self) -> bool:
+        """ Return True if all the responses the coroutine waits for have arrived."""
+        responses = self.state['responses']
+        return all(key in responses for key in self.state['pending'])
+
+    def response(self, completion_key, deserialize):
+        return _unpack(self.state['responses'][completion_key], deserialize)
+
+    def effect(self, function, deserialize):
+        """
+        Make a synchronous call of the coroutine the first time, return the result it had when replaying.
+
+        :param function: the function making the call
+        :param deserialize: the function deserializing the IRIS messages
+        :return: the result of the call
+        """
+        effects = self.state['effects']
+        i = self.effect_index
+        self.effect_index += 1
+        if self.replaying != (i < len(effects)):
+            raise RuntimeError("on_request isn't deterministic: the synchronous call " + str(i) + " of the replay "
+                               + ("wasn't made" if self.replaying else "was already made") + " the first time")
+        if self.replaying:
+            return _unpack(effects[i], deserialize)
+        result = function()
+        effects.append(_pack(result))
+        return result
+
+    def wait(self, calls, deserialize):
+        """ Generator behind the awaitables: send the new calls, return the responses or suspend."""
+        first = self.index
+        resume = self.state['resume']
+        if resume is None or first >= resume:
+            # past the await the coroutine was suspended at, the code runs for the first time
+            self.replaying = False
+        targets = self.state['targets']
+        keys = []
+        for call in calls:
+            key = PREFIX + str(self.index)
+            if self.index < len(targets):
+                if targets[self.index] != call.target:
+                    raise RuntimeError("on_request isn't deterministic: the call " + str(self.index) + " was sent to "
+                                       + str(targets[self.index]) + ", the replay sends it to " + str(call.target))
+            else:
+                targets.append(call.target)
+            self.index += 1
+            if self.index > self.state['sent']:
+                call.send(key)
+                self.state['sent'] = self.index
+            keys.append(key)
+        responses = self.state['responses']
+        pending = [key for key in keys if key not in responses]
+        if pending:
+            self.state['pending'] = pending
+            self.state['resume'] = first
+            yield _SUSPEND
+            raise RuntimeError("A suspended on_request can't be resumed")
+        self.state['pending'] = []
+        return [self.response(key, deserialize) for key in keys]
+
+    def run(self, coroutine):
+        """
+        Replay the coroutine until it completes or waits for a response that hasn't arrived.
+
+        :param coroutine: the coroutine returned by the handler
+        :return: a tuple (done, result), result being the return value of the coroutine when done
+        """
+        self.index = 0
+        self.effect_index = 0
+        self.replaying = self.state['resume'] is not None
+        self.running = True
+        try:
+            awaited = coroutine.send(None)
+        except StopIteration as e:
+            if self.replaying:
+                raise RuntimeError("on_request isn't deterministic: the replay returned before the await it was suspended at")
+            return True, e.value
+        finally:
+            self.running = False
+            self.replaying = False
+        coroutine.close()
+        if awaited is not _SUSPEND:
+            raise RuntimeError("Only self.call() and self.gather() can be awaited in a business process")
+        return False, None
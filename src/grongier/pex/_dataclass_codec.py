@@ -0,0 +1,351 @@
+import typing
+import dataclasses
+import collections.abc
+import io
+import datetime
+import decimal
+import uuid
+import base64
+import importlib
+
+from dacite import from_dict, Config
+
+_MISSING = dataclasses.MISSING
+
+class _DataclassCodec():
+    """ Registry of encode/decode functions specialized for each dataclass.
+
+    The first time a dataclass is seen, its fields are introspected once and a decode function
+    is generated (with exec, the same way the dataclasses module generates __init__) that builds
+    the instance from a dict without any runtime type introspection.
+    Fields that don't need any conversion are copied as is, nested dataclasses, Optional, List and Dict
+    fields are converted with precomputed converters.
+    Keys of the dict that are not fields of the dataclass are set as attributes of the instance.
+
+    In the typed mode, values are written without type prefix and the annotations of the fields
+    tell which values must be converted to datetime, date, time, Decimal, UUID, bytes or DataFrame.
+    """
+
+    _decoders = {}
+    _typed_decoders = {}
+    _encoders = {}
+
+    @classmethod
+    def decode(cls, klass, data:dict):
+        """
+        Build an instance of klass from a dict.
+
+        :param klass: the dataclass to build
+        :param data: the dictionary to convert to a dataclass
+        :return: an instance of klass
+        """
+        try:
+            decoder = cls._decoders[klass]
+        except KeyError:
+            decoder = cls._decoders[klass] = cls._compile_decoder(klass)
+        return decoder(data)
+
+    @classmethod
+    def decode_typed(cls, klass, data:dict):
+        """
+        Build an instance of klass from a dict decoded without type prefixes, the values of the fields
+        annotated with datetime, date, time, Decimal, UUID, bytes or DataFrame are converted.
+        Strings of the other fields are kept as is.
+
+        :param klass: the dataclass to build
+        :param data: the dictionary to convert to a dataclass
+        :return: an instance of klass
+        """
+        try:
+            decoder = cls._typed_decoders[klass]
+        except KeyError:
+            decoder = cls._typed_decoders[klass] = cls._compile_decoder(klass, typed=True)
+        return decoder(data)
+
+    @classmethod
+    def encode(cls, obj) -> dict:
+        """
+        Convert a dataclass instance to a dict ready to be dumped, nested dataclasses included.
+        Attributes that are not fields of the dataclass are kept.
+
+        :param obj: the dataclass instance
+        :return: a dictionary
+        """
+        klass = type(obj)
+        try:
+            encoder = cls._encoders[klass]
+        except KeyError:
+            encoder = cls._encoders[klass] = cls._compile_encoder(klass)
+        return encoder(obj)
+
+    @classmethod
+    def clear(cls):
+        """ Forget all the compiled functions. """
+        cls._decoders.clear()
+        cls._typed_decoders.clear()
+        cls._encoders.clear()
+
+    @staticmethod
+    def _type_hints(klass) -> dict:
+        try:
+            return typing.get_type_hints(klass)
+        except Exception:
+            return {f.name: f.type for f in dataclasses.fields(klass)}
+
+    @staticmethod
+    def _is_optional(typ) -> bool:
+        return typing.get_origin(typ) is typing.Union and type(None) in typing.get_args(typ)
+
+    @staticmethod
+    def _scalar_decoder(typ):
+        """
+        Return the function converting a string to typ in the typed mode, or None if typ isn't
+        a type written as a string. Values written with the type prefix are accepted too.
+        """
+        if typ is datetime.datetime:
+            prefix, parse = 'datetime:', datetime.datetime.fromisoformat
+        elif typ is datetime.date:
+            prefix, parse = 'date:', datetime.date.fromisoformat
+        elif typ is datetime.time:
+            prefix, parse = 'time:', datetime.time.fromisoformat
+        elif typ is decimal.Decimal:
+            prefix, parse = 'decimal:', decimal.Decimal
+        elif typ is uuid.UUID:
+            prefix, parse = 'uuid:', uuid.UUID
+        elif typ is bytes:
+            prefix, parse = 'bytes:', lambda value: base64.b64decode(value.encode("UTF-8"))
+        elif getattr(typ, '__name__', None) == 'DataFrame':
+            prefix, parse = 'dataframe:', lambda value: importlib.import_module('pandas').read_json(io.StringIO(value), orient="table")
+        else:
+            return None
+        n = len(prefix)
+        def convert_scalar(value):
+            if isinstance(value, str):
+                if value.startswith(prefix):
+                    value = value[n:]
+                return parse(value)
+            if typ is decimal.Decimal and isinstance(value, (int, float)):
+                return decimal.Decimal(str(value))
+            return value
+        return convert_scalar
+
+    @classmethod
+    def _decoder_for(cls, typ, typed:bool=False):
+        """
+        Return a function converting a decoded json value to typ, or None if the value can be used as is.
+        """
+        if isinstance(typ, type) and dataclasses.is_dataclass(typ):
+            decode = cls.decode_typed if typed else cls.decode
+            def convert_dataclass(value):
+                if isinstance(value, dict):
+                    return decode(typ, value)
+                return value
+            return convert_dataclass
+
+        if typed:
+            convert = cls._scalar_decoder(typ)
+            if convert is not None:
+                return convert
+
+        origin = typing.get_origin(typ)
+        args = typing.get_args(typ)
+
+        if origin is typing.Union:
+            converters = [c for c in (cls._decoder_for(arg, typed) for arg in args if arg is not type(None)) if c is not None]
+            if not converters:
+                return None
+            if len(converters) == 1:
+                convert = converters[0]
+                def convert_optional(value):
+                    if value is None:
+                        return None
+                    return convert(value)
+                return convert_optional
+            def convert_union(value):
+                if value is None:
+                    return None
+                for convert in converters:
+                    try:
+                        return convert(value)
+                    except Exception:
+                        continue
+                return value
+            return convert_union
+
+        if origin in (list, set, frozenset, tuple, collections.abc.Sequence, collections.abc.MutableSequence,
+                      collections.abc.Set, collections.abc.MutableSet, collections.abc.Collection, collections.abc.Iterable):
+            if not args:
+                return None
+            if origin is tuple and not (len(args) == 2 and args[1] is Ellipsis):
+                item_converters = [cls._decoder_for(arg, typed) for arg in args]
+                if not any(item_converters):
+                    return None
+                def convert_tuple(value):
+                    if not isinstance(value, (list, tuple)):
+                        return value
+                    return value.__class__(c(v) if c is not None else v for c, v in zip(item_converters, value))
+                return convert_tuple
+            convert = cls._decoder_for(args[0], typed)
+            if convert is None:
+                return None
+            def convert_list(value):
+                if isinstance(value, list):
+                    return [convert(v) for v in value]
+                if isinstance(value, (tuple, set, frozenset)):
+                    return value.__class__(convert(v) for v in value)
+                return value
+            return convert_list
+
+        if origin in (dict, collections.abc.Mapping, collections.abc.MutableMapping):
+            if len(args) != 2:
+                return None
+            convert = cls._decoder_for(args[1], typed)
+            if convert is None:
+                return None
+            def convert_dict(value):
+                if isinstance(value, dict):
+                    return {k: convert(v) for k, v in value.items()}
+                return value
+            return convert_dict
+
+        return None
+
+    @classmethod
+    def _encoder_for(cls, typ):
+        """
+        Return a function converting a value of type typ to a json friendly value, or None if the
+        json encoder can deal with it directly.
+        """
+        if isinstance(typ, type) and dataclasses.is_dataclass(typ):
+            encode = cls.encode
+            def convert_dataclass(value):
+                if dataclasses.is_dataclass(value) and hasattr(value, '__dict__'):
+                    return encode(value)
+                return value
+            return convert_dataclass
+
+        origin = typing.get_origin(typ)
+        args = typing.get_args(typ)
+
+        if origin is typing.Union:
+            converters = [c for c in (cls._encoder_for(arg) for arg in args if arg is not type(None)) if c is not None]
+            if len(converters) != 1:
+                # ambiguous, let the json encoder deal with it
+                return None
+            return converters[0]
+
+        if origin in (list, collections.abc.Sequence, collections.abc.MutableSequence) and args:
+            convert = cls._encoder_for(args[0])
+            if convert is None:
+                return None
+            def convert_list(value):
+                if isinstance(value, list):
+                    return [convert(v) for v in value]
+                return value
+            return convert_list
+
+        if origin in (dict, collections.abc.Mapping, collections.abc.MutableMapping) and len(args) == 2:
+            convert = cls._encoder_for(args[1])
+            if convert is None:
+                return None
+            def convert_dict(value):
+                if isinstance(value, dict):
+                    return {k: convert(v) for k, v in value.items()}
+                return value
+            return convert_dict
+
+        return None
+
+    @classmethod
+    def _compile_decoder(cls, klass, typed:bool=False):
+        """
+        Generate the decode function of a dataclass.
+        If the dataclass can't be compiled, fall back to dacite.
+        """
+        try:
+            return cls._generate_decoder(klass, typed)
+        except Exception:
+            def decode_with_dacite(data):
+                ret = from_dict(klass, data, Config(check_types=False))
+                for key, val in data.items():
+                    if not hasattr(ret, key):
+                        setattr(ret, key, val)
+                return ret
+            return decode_with_dacite
+
+    @classmethod
+    def _generate_decoder(cls, klass, typed:bool=False):
+        hints = cls._type_hints(klass)
+        fields = dataclasses.fields(klass)
+        # everything annotated on the class hierarchy is not an extra attribute
+        names = set(hints) | {f.name for f in fields}
+
+        namespace = {'_klass': klass, '_names': frozenset(names)}
+        lines = []
+        post_init = []
+        for i, f in enumerate(fields):
+            typ = hints.get(f.name, f.type)
+            convert = cls._decoder_for(typ, typed)
+            key = repr(f.name)
+            if convert is not None:
+                namespace[f'_c{i}'] = convert
+                value = f"_c{i}(data[{key}])"
+            else:
+                value = f"data[{key}]"
+            if f.init:
+                lines.append(f"    if {key} in data:")
+                lines.append(f"        kwargs[{key}] = {value}")
+                if f.default is _MISSING and f.default_factory is _MISSING and cls._is_optional(typ):
+                    lines.append("    else:")
+                    lines.append(f"        kwargs[{key}] = None")
+            else:
+                post_init.append(f"    if {key} in data:")
+                post_init.append(f"        setattr(obj, {key}, {value})")
+
+        source = "\n".join(
+            ["def decode(data):", "    kwargs = {}"]
+            + lines
+            + ["    obj = _klass(**kwargs)"]
+            + post_init
+            + ["    for key in data.keys() - _names:",
+               "        setattr(obj, key, data[key])",
+               "    return obj"]
+        )
+        exec(source, namespace)
+        decode = namespace['decode']
+        decode.__qualname__ = f"{klass.__qualname__}.__iop_decode__"
+        return decode
+
+    @classmethod
+    def _compile_encoder(cls, klass):
+        """
+        Generate the encode function of a dataclass.
+        """
+        if not dataclasses.is_dataclass(klass):
+            return lambda obj: obj.__dict__
+        hints = cls._type_hints(klass)
+        namespace = {}
+        lines = []
+        for i, f in enumerate(dataclasses.fields(klass)):
+            convert = cls._encoder_for(hints.get(f.name, f.type))
+            if convert is None:
+                continue
+            namespace[f'_c{i}'] = convert
+            key = repr(f.name)
+            lines.append(f"    value = d.get({key})")
+            lines.append("    if value is not None:")
+            lines.append(f"        d[{key}] = _c{i}(value)")
+
+        if not lines:
+            # nothing to convert, the json encoder will read __dict__ directly
+            return lambda obj: obj.__dict__
+
+        source = "\n".join(
+            ["def encode(obj):", "    d = dict(obj.__dict__)"]
+            + lines
+            + ["    return d"]
+        )
+        exec(source, namespace)
+        encode = namespace['encode']
+        encode.__qualname__ = f"{klass.__qualname__}.__iop_encode__"
+        return encode
@@ -269,7 +269,7 @@ class _Director():
             deserialized_response = business_host._dispatch_deserializer(response)
         except ImportError as e:
             # can't import the class, return the string
-            deserialized_response = f'{response.classname} : {_Utils.stream_to_string(response.jstr)}'
+            deserialized_response = f'{response.classname} : {response.jinline or _Utils.stream_to_string(response.jstr)}'
         return deserialized_response
 
             
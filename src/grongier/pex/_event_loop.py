@@ -0,0 +1,80 @@
+import asyncio
+import inspect
+
+class _EventLoop():
+    """ Event loop of the job, running the coroutine handlers of the components.
+
+    The loop is created on first use and kept across the calls, so that the connections, sessions and
+    other resources bound to it can be reused from one message to the next. Each handler runs until
+    completion before returning to IRIS, the concurrency is inside a call: a handler can await many
+    I/O operations at once (asyncio.gather, tasks, ...).
+    """
+
+    _loop = None
+
+    @staticmethod
+    def result(value):
+        """
+        Return value, or the result of value if it is awaitable (coroutine handler).
+
+        :param value: the return value of a handler
+        """
+        if inspect.isawaitable(value):
+            return _EventLoop.run(value)
+        return value
+
+    @classmethod
+    def get(cls) -> asyncio.AbstractEventLoop:
+        """ Return the event loop of the job, create it if needed."""
+        loop = cls._loop
+        if loop is None or loop.is_closed():
+            loop = cls._loop = asyncio.new_event_loop()
+        return loop
+
+    @classmethod
+    def run(cls, awaitable):
+        """
+        Run awaitable on the event loop of the job until it completes and return its result.
+
+        The loop can't be entered again while it is running, which happens when a coroutine handler calls a
+        coroutine handler of a component of the same job (in process call): a RuntimeError is raised rather
+        than running awaitable in another thread, where its calls to IRIS would leave the thread of the job.
+
+        :param awaitable: a coroutine or any awaitable
+        """
+        loop = cls.get()
+        if loop.is_running():
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            raise RuntimeError("A coroutine handler can't be called from another coroutine handler of the same job "
+                               "(in process call): make one of the handlers synchronous, or run the target in its own job")
+        return loop.run_until_complete(awaitable)
+
+    @classmethod
+    def iterate(cls, async_iterator):
+        """
+        Iterate over an async iterator (async generator) from synchronous code, on the event loop of the job.
+
+        :param async_iterator: the async iterator
+        """
+        while True:
+            try:
+                yield cls.run(async_iterator.__anext__())
+            except StopAsyncIteration:
+                return
+
+    @classmethod
+    def close(cls):
+        """ Cancel the pending tasks and close the event loop of the job, a new one is created on next use."""
+        loop, cls._loop = cls._loop, None
+        if loop is None or loop.is_closed() or loop.is_running():
+            return
+        try:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
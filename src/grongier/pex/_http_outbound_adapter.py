@@ -0,0 +1,328 @@
+import codecs
+import concurrent.futures
+import dataclasses
+import http.client
+import inspect
+import json
+import select
+import ssl
+import tempfile
+import time
+import urllib.parse
+
+from grongier.pex._outbound_adapter import _OutboundAdapter
+from grongier.pex._utils import _Utils
+from grongier.pex._connection_pool import _ConnectionPool
+
+# errors of a kept-alive connection closed by the server, the request is sent again on a new connection
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+# bodies streamed by request_many to an IRIS stream are kept in memory up to this size, in a temporary file above
+_SPOOL_SIZE = 1 << 20
+
+# methods that can be sent twice without side effect, the only ones sent again after a stale connection
+_IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'))
+
+def _charset(headers:dict, default:str='utf-8') -> str:
+    """ Return the charset of the Content-Type header, or default."""
+    for param in headers.get('content-type', '').split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'charset' and value:
+            return value.strip('"')
+    return default
+
+@dataclasses.dataclass
+class _HttpResponse:
+    """ Response of the HttpOutboundAdapter.
+
+    Attributes:
+        status: the status code
+        reason: the reason phrase
+        headers: the headers, by lower case name
+        body: the body, None when it was streamed
+        length: the number of bytes of the body
+        url: the url of the request
+        elapsed: the number of seconds from the request to the end of the body
+    """
+    status: int = 0
+    reason: str = None
+    headers: dict = dataclasses.field(default_factory=dict)
+    body: bytes = None
+    length: int = 0
+    url: str = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+    @property
+    def text(self) -> str:
+        """ The body decoded with the charset of the Content-Type header, utf-8 by default."""
+        return (self.body or b'').decode(_charset(self.headers), errors='replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+class _HttpOutboundAdapter(_OutboundAdapter):
+    """ Outbound adapter calling HTTP APIs over persistent connections.
+
+    Each host gets a connection pool of at most pool_size keep-alive connections (the per host limit),
+    reused from one message to the next for the lifetime of the job, so the TCP and TLS handshakes are
+    only done once per connection. A request of an idempotent method (GET, HEAD, OPTIONS, PUT, DELETE)
+    sent on a kept-alive connection that the server closed in the meantime is sent again on a new
+    connection, other requests (POST, PATCH...) raise the error, they may have reached the server.
+
+    request sends one request, request_many sends a list of requests concurrently, on up to
+    max_concurrency threads, for the fan-out of a message to many calls. The body of a response can be
+    streamed into a file or an IRIS stream (a stream property of a message) instead of being loaded in memory.
+
+    Settings:
+    base_url: the url the relative urls are resolved against, its host is warmed up with pool_min_size connections
+    timeout: the socket timeout in seconds
+    max_concurrency: the maximum number of requests sent at once by request_many
+    chunk_size: the size of the chunks of a streamed body
+    verify_ssl: False to skip the check of the certificates of the servers
+    """
+
+    base_url:str = ''
+    timeout:float = 30.0
+    max_concurrency:int = 10
+    chunk_size:int = 65536
+    verify_ssl:bool = True
+
+    def request(self, method, url, body=None, headers=None, stream_to=None) -> _HttpResponse:
+        """ Send a request and read its response.
+
+        Parameters:
+        method: the HTTP method, GET, POST...
+        url: the url, absolute or relative to base_url
+        body: the body, bytes, str (encoded in utf-8), a dict or a list (sent as JSON), or a file object
+        headers: a dict of headers
+        stream_to: an object with a write method (file) or a Write method (IRIS stream) the body is written to
+            by chunks of chunk_size bytes, instead of being kept in the body of the response. The body is
+            written as is in an IRIS binary stream, decoded with the charset of the response (utf-8 by
+            default) in an IRIS character stream
+
+        Returns:
+        An HttpResponse.
+        """
+        url = urllib.parse.urljoin(self.base_url, url) if self.base_url else url
+        parts = urllib.parse.urlsplit(url)
+        path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+            headers.setdefault('Content-Type', 'application/json')
+        elif isinstance(body, str):
+            body = body.encode()
+        pool = self.get_pool(url)
+        start = time.perf_counter()
+        while True:
+            connection = pool.acquire()
+            # a connection that was already used may have been closed by the server while idle
+            reused = getattr(connection, '_iop_reused', False)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+            except _STALE_ERRORS:
+                pool.release(connection, discard=True)
+                if reused and method.upper() in _IDEMPOTENT_METHODS and (body is None or isinstance(body, bytes)):
+                    continue
+                raise
+            except BaseException:
+                pool.release(connection, discard=True)
+                raise
+            try:
+                result = self._read(response, stream_to)
+            except BaseException:
+                pool.release(connection, discard=True)
+                raise
+            connection._iop_reused = True
+            pool.release(connection, discard=response.will_close)
+            result.url = url
+            result.elapsed = time.perf_counter() - start
+            return result
+
+    def get(self, url, headers=None, stream_to=None) -> _HttpResponse:
+        """ Send a GET request, see request."""
+        return self.request('GET', url, headers=headers, stream_to=stream_to)
+
+    def post(self, url, body=None, headers=None) -> _HttpResponse:
+        """ Send a POST request, see request."""
+        return self.request('POST', url, body=body, headers=headers)
+
+    def request_many(self, requests) -> list:
+        """ Send requests concurrently, on up to max_concurrency threads and pool_size connections per host.
+
+        The threads make no IRIS call: a body streamed to an IRIS stream is written to a temporary file
+        by the thread, then copied to the IRIS stream by the calling thread once all the requests are done.
+
+        Parameters:
+        requests: a list of requests, each one a dict of the parameters of request (method, url, body, headers,
+            stream_to), or a tuple of them in order, (method, url) for instance
+
+        Returns:
+        The list of the responses, in the order of the requests, with the exception raised for a request that failed.
+        """
+        requests = list(requests)
+        if len(requests) <= 1:
+            return [self._send(arguments) for arguments in requests]
+        calls = []
+        iris_streams = {}
+        for i, arguments in enumerate(requests):
+            try:
+                call = self._bind(arguments)
+            except TypeError as e:
+                calls.append(e)
+                continue
+            stream_to = call.arguments.get('stream_to')
+            if stream_to is not None and not hasattr(stream_to, 'write'):
+                iris_streams[i] = stream_to
+                call.arguments['stream_to'] = tempfile.SpooledTemporaryFile(_SPOOL_SIZE)
+            calls.append(call)
+        responses = list(self._get_executor().map(self._send, calls))
+        for i, stream in iris_streams.items():
+            with calls[i].arguments['stream_to'] as spool:
+                if isinstance(responses[i], _HttpResponse):
+                    spool.seek(0)
+                    self._copy_to_iris(spool, stream, responses[i].headers)
+        return responses
+
+    def get_pool(self, url=None) -> _ConnectionPool:
+        """ Return the connection pool of the host of url, by default of base_url, create it on first use."""
+        url = url or self.base_url
+        if not url:
+            raise ValueError("An absolute url or the base_url setting is required")
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError("Not an absolute http or https url: " + url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        pools = self.__dict__.setdefault('_host_pools', {})
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools.setdefault(key, _ConnectionPool(lambda: self._connect(*key), int(self.pool_size),
+                                                         float(self.pool_max_idle), self.check_connection,
+                                                         self.close_connection, float(self.pool_timeout)))
+        return pool
+
+    def pool_stats(self) -> dict:
+        """ Return the metrics of the connection pools, by host ("scheme://host:port")."""
+        return {scheme + '://' + host + ':' + str(port): pool.stats()
+                for (scheme, host, port), pool in list(self.__dict__.get('_host_pools', {}).items())}
+
+    def check_connection(self, connection) -> bool:
+        """ An idle keep-alive connection is usable as long as the server hasn't closed it (nothing to read)."""
+        if connection.sock is None:
+            return False
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+        return not readable
+
+    def _connect(self, scheme, host, port):
+        """ For internal use only. Open a connection to a host. """
+        if scheme == 'https':
+            context = ssl.create_default_context()
+            if not _Utils.to_bool(self.verify_ssl):
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            connection = http.client.HTTPSConnection(host, port, timeout=float(self.timeout), context=context)
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=float(self.timeout))
+        connection.connect()
+        return connection
+
+    def _bind(self, arguments) -> inspect.BoundArguments:
+        """ For internal use only. Bind a request of request_many to the parameters of request. """
+        if isinstance(arguments, inspect.BoundArguments):
+            return arguments
+        if isinstance(arguments, dict):
+            return inspect.signature(self.request).bind(**arguments)
+        return inspect.signature(self.request).bind(*arguments)
+
+    def _send(self, arguments):
+        """ For internal use only. Send a request of request_many, return the exception raised if it failed. """
+        if isinstance(arguments, Exception):
+            return arguments
+        try:
+            call = self._bind(arguments)
+            return self.request(*call.args, **call.kwargs)
+        except Exception as e:
+            return e
+
+    def _copy_to_iris(self, source, stream, headers):
+        """ For internal use only. Copy a body from a file to an IRIS stream. """
+        write, end = self._iris_writer(stream, headers)
+        size = int(self.chunk_size)
+        while True:
+            chunk = source.read(size)
+            if not chunk:
+                break
+            write(chunk)
+        if end is not None:
+            end()
+
+    def _read(self, response, stream_to):
+        """ For internal use only. Read the body of a response, or write it to stream_to. """
+        # the public class is a Message built by grongier.pex on top of this module
+        from grongier.pex import HttpResponse
+        result = HttpResponse(status=response.status, reason=response.reason,
+                              headers={name.lower(): value for name, value in response.getheaders()})
+        if stream_to is None:
+            result.body = response.read()
+            result.length = len(result.body)
+            return result
+        if hasattr(stream_to, 'write'):
+            write, end = stream_to.write, None
+        else:
+            write, end = self._iris_writer(stream_to, result.headers)
+        size = int(self.chunk_size)
+        while True:
+            chunk = response.read(size)
+            if not chunk:
+                if end is not None:
+                    end()
+                return result
+            write(chunk)
+            result.length += len(chunk)
+
+    @staticmethod
+    def _iris_writer(stream, headers):
+        """ For internal use only. Return the functions writing the chunks of a body to an IRIS stream,
+        and ending the body. IRIS binary streams take one character per byte, the chunks of a character
+        stream are decoded with the charset of the response, the characters split between two chunks included.
+        """
+        if not stream.IsCharacter():
+            return (lambda chunk: stream.Write(chunk.decode('latin-1'))), None
+        decoder = codecs.getincrementaldecoder(_charset(headers))(errors='replace')
+        def write(chunk):
+            text = decoder.decode(chunk)
+            if text:
+                stream.Write(text)
+        def end():
+            text = decoder.decode(b'', final=True)
+            if text:
+                stream.Write(text)
+        return write, end
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """ For internal use only. Threads of request_many, kept for the lifetime of the job. """
+        executor = self.__dict__.get('_executor')
+        if executor is None:
+            executor = self._executor = concurrent.futures.ThreadPoolExecutor(max(int(self.max_concurrency), 1),
+                                                                              thread_name_prefix='http')
+        return executor
+
+    def _pools(self) -> list:
+        """ For internal use only. """
+        return list(self.__dict__.get('_host_pools', {}).values())
+
+    def _dispatch_on_tear_down(self, host_object=None):
+        """ For internal use only. """
+        try:
+            super()._dispatch_on_tear_down(host_object)
+        finally:
+            executor = self.__dict__.pop('_executor', None)
+            if executor is not None:
+                executor.shutdown(wait=False)
+        return
@@ -1,18 +1,73 @@
+import inspect
+import itertools
+from collections.abc import AsyncIterator, Iterator
+
 from grongier.pex._common import _Common
+from grongier.pex._utils import _Utils
+from grongier.pex._event_loop import _EventLoop
+from grongier.pex._polling import _PollingHost
+from grongier.pex._logging import _LogSink
 
-class _InboundAdapter(_Common):
+class _InboundAdapter(_Common, _PollingHost):
     """ Responsible for receiving the data from the external system, validating the data, 
     and sending it to the business service by calling the BusinessHost.ProcessInput() method.
     """
     BusinessHost = business_host = business_host_python = None
 
+    batch_delivery:bool = False
+    max_batch:int = 1000
+
     def on_task(self): 
         """ Called by the production framework at intervals determined by the business service CallInterval property.
         It is responsible for receiving the data from the external system, validating the data, and sending it in a message to the business service OnProcessInput method.
         The message can have any structure agreed upon by the inbound adapter and the business service.
+        It can be a coroutine function (async def), it is then run on the event loop of the job.
+
+        With the batch_delivery setting, instead of calling ProcessInput for each message, on_task can return a list
+        of messages or yield them (generator or async generator): they are delivered to the process_inputs method of
+        the business service by batches of at most max_batch messages, one ProcessInput call per batch.
+        Without it, the value returned by on_task is left as is.
+
+        With the adaptive_polling setting, on_task is called again at once while it finds work, and at an
+        interval growing from polling_min_interval by polling_backoff up to polling_max_interval (CallInterval
+        if 0) while it finds nothing. on_task tells it found work by returning or yielding messages, or by
+        returning a true value (the number of items found for instance).
         """
         return self.OnTask()
 
+    @_LogSink.flush_after
+    def _dispatch_on_task(self):
+        """ For internal use only. Return the interval before the next call, or None to keep CallInterval. """
+        found = _EventLoop.result(self.on_task())
+        if _Utils.to_bool(self.batch_delivery) and isinstance(found, (list, tuple, Iterator, AsyncIterator)):
+            found = self._deliver(found)
+        return self._next_poll_interval(bool(found), lambda: self.iris_handle.CallInterval)
+
+    def _deliver(self, messages) -> int:
+        """ For internal use only. Send the messages returned or yielded by on_task to the business service, return their number. """
+        bulk = hasattr(self.business_host_python, '_dispatch_process_inputs')
+        count = 0
+        for batch in self._batches(messages, max(int(self.max_batch), 1)):
+            if bulk:
+                self.business_host.dispatchProcessInputs(batch)
+            else:
+                for message in batch:
+                    self.business_host.ProcessInput(message)
+            count += len(batch)
+        return count
+
+    @staticmethod
+    def _batches(messages, size):
+        """ For internal use only. Read the messages by lists of at most size messages, without reading ahead. """
+        if isinstance(messages, AsyncIterator):
+            messages = _EventLoop.iterate(messages)
+        messages = iter(messages)
+        while True:
+            batch = list(itertools.islice(messages, size))
+            if not batch:
+                return
+            yield batch
+
     def _set_iris_handles(self, handle_current, handle_partner):
         """ For internal use only. """
         self.iris_handle = handle_current
@@ -0,0 +1,102 @@
+class _LazyMessage():
+    """ Messages decoded on first access.
+
+    A lazy message is an instance of a subclass of the message class, generated once per class,
+    whose __getattribute__, __setattr__ and __delattr__ decode the message the first time they are
+    called. The decoded fields are then moved into the instance and its class is switched back to
+    the message class, so that the following accesses cost nothing and the message behaves exactly
+    like an eagerly decoded one (isinstance, dataclasses functions, equality, ...).
+
+    A lazy message that has never been accessed keeps the IRIS message it comes from, which is sent
+    again as is instead of being encoded.
+    """
+
+    _classes = {}
+
+    @classmethod
+    def supports(cls, klass) -> bool:
+        """
+        Return True if instances of klass can be lazy, that is if they have a __dict__.
+
+        :param klass: the message class
+        """
+        return not any('__slots__' in vars(c) for c in klass.__mro__[:-1])
+
+    @classmethod
+    def wrap(cls, klass, serial, load):
+        """
+        Return a lazy instance of klass.
+
+        :param klass: the message class
+        :param serial: the IRIS message
+        :param load: a function returning the decoded message, called on first access
+        :return: an instance of a subclass of klass
+        """
+        try:
+            lazy_class = cls._classes[klass]
+        except KeyError:
+            lazy_class = cls._classes[klass] = cls._lazy_class(klass)
+        obj = object.__new__(lazy_class)
+        state = object.__getattribute__(obj, '__dict__')
+        state['__iop_serial__'] = serial
+        state['__iop_load__'] = load
+        return obj
+
+    @staticmethod
+    def is_lazy(obj) -> bool:
+        """ Return True if obj is a lazy message that hasn't been decoded yet."""
+        return type(obj).__dict__.get('__iop_lazy__', False)
+
+    @staticmethod
+    def serial(obj):
+        """
+        Return the IRIS message of a lazy message that hasn't been decoded yet, None otherwise.
+
+        :param obj: any object
+        """
+        if type(obj).__dict__.get('__iop_lazy__', False):
+            return object.__getattribute__(obj, '__dict__')['__iop_serial__']
+        return None
+
+    @staticmethod
+    def materialize(obj):
+        """
+        Decode a lazy message in place, do nothing if it is already decoded.
+
+        :param obj: the lazy message
+        :return: obj
+        """
+        if not type(obj).__dict__.get('__iop_lazy__', False):
+            return obj
+        state = object.__getattribute__(obj, '__dict__')
+        message = state['__iop_load__']()
+        state.clear()
+        state.update(message.__dict__)
+        object.__setattr__(obj, '__class__', type(message))
+        return obj
+
+    @classmethod
+    def _lazy_class(cls, klass):
+        materialize = cls.materialize
+
+        def __getattribute__(self, name):
+            materialize(self)
+            return object.__getattribute__(self, name)
+
+        def __setattr__(self, name, value):
+            materialize(self)
+            object.__setattr__(self, name, value)
+
+        def __delattr__(self, name):
+            materialize(self)
+            object.__delattr__(self, name)
+
+        namespace = {
+            '__iop_lazy__': True,
+            '__module__': klass.__module__,
+            '__qualname__': klass.__qualname__,
+            '__getattribute__': __getattribute__,
+            '__setattr__': __setattr__,
+            '__delattr__': __delattr__,
+        }
+        return type(klass.__name__, (klass,), namespace)
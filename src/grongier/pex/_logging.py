@@ -0,0 +1,150 @@
+import functools
+import json
+import logging
+import threading
+import time
+
+import iris
+
+class _LogSink():
+    """ Buffer of the log entries of the job, written to Ens.Util.Log in bulk.
+
+    Entries are queued in memory and written with a single call to IRIS when the buffer holds size
+    entries, when the oldest entry is older than interval seconds, at the end of the handling of each
+    message (see flush_after), on keepalive and on tear down, so an idle component holds no entry.
+    Under a log storm, identical entries (same type, source and text) beyond repeat_limit in a buffer
+    are not queued, they are counted and summed up by one entry at the next flush.
+
+    IRIS is only called from the main thread, entries queued by other threads wait for the next flush
+    of the main thread.
+
+    Counters: flushed (entries written), dropped (identical entries not written), flushes (bulk writes).
+    """
+
+    _lock = threading.Lock()
+    _entries = []
+    _repeats = {}
+    _skipped = {}
+    _oldest = 0.0
+
+    flushed = 0
+    dropped = 0
+    flushes = 0
+
+    @classmethod
+    def write(cls, method, source_class, source_method, text, size=0, interval=1.0, repeat_limit=0):
+        """
+        Queue a log entry, or write it at once if size is 0.
+
+        :param method: the Ens.Util.Log method, LogInfo, LogAlert, LogWarning, LogError or LogAssert
+        :param source_class: the name of the class writing the entry
+        :param source_method: the name of the method writing the entry
+        :param text: the text of the entry
+        :param size: number of entries that triggers a flush, 0 to write synchronously
+        :param interval: age in seconds of the oldest entry that triggers a flush
+        :param repeat_limit: number of identical entries kept per flush, 0 for no limit
+        """
+        if size <= 0:
+            getattr(iris.cls("Ens.Util.Log"), method)(source_class, source_method, text)
+            return
+        now = time.monotonic()
+        key = (method, source_class, source_method, text)
+        with cls._lock:
+            count = cls._repeats.get(key, 0) + 1
+            cls._repeats[key] = count
+            if repeat_limit > 0 and count > repeat_limit:
+                cls._skipped[key] = count - repeat_limit
+                cls.dropped += 1
+            else:
+                if not cls._entries:
+                    cls._oldest = now
+                cls._entries.append(key)
+            due = len(cls._entries) >= size or now - cls._oldest >= interval
+        if due:
+            cls.flush()
+
+    @classmethod
+    def flush(cls):
+        """ Write all the queued entries in one call, do nothing outside of the main thread."""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        with cls._lock:
+            entries, skipped = cls._entries, cls._skipped
+            cls._entries, cls._repeats, cls._skipped = [], {}, {}
+        for (method, source_class, source_method, text), count in skipped.items():
+            entries.append((method, source_class, source_method,
+                            "Identical entry repeated " + str(count) + " more times: " + text))
+        if not entries:
+            return
+        iris.cls("Grongier.PEX.Utils").dispatchLogBulk(json.dumps(entries))
+        cls.flushed += len(entries)
+        cls.flushes += 1
+
+    @staticmethod
+    def flush_after(function):
+        """ Decorator of the dispatch methods, flushing the buffer when the method returns or raises."""
+        @functools.wraps(function)
+        def flush_after(*args, **kwargs):
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _LogSink.flush()
+        return flush_after
+
+    @classmethod
+    def stats(cls) -> dict:
+        """ Return the counters and the number of entries waiting to be written."""
+        return {
+            'buffered': len(cls._entries),
+            'flushed': cls.flushed,
+            'dropped': cls.dropped,
+            'flushes': cls.flushes,
+        }
+
+class _LogHandler(logging.Handler):
+    """ logging.Handler writing the records to the production log through the buffered log sink.
+
+    Add it to the loggers of the libraries used by the components:
+        logging.getLogger('urllib3').addHandler(LogHandler())
+
+    Records are written with the logger name as source class and the function name as source method.
+    CRITICAL records are written as alerts, DEBUG and lower as asserts.
+    """
+
+    def __init__(self, level=logging.NOTSET, size=100, interval=1.0, repeat_limit=10):
+        """
+        :param level: the level of the handler
+        :param size: number of entries that triggers a flush, 0 to write synchronously
+        :param interval: age in seconds of the oldest entry that triggers a flush
+        :param repeat_limit: number of identical entries kept per flush, 0 for no limit
+        """
+        super().__init__(level)
+        self.size = size
+        self.interval = interval
+        self.repeat_limit = repeat_limit
+
+    @staticmethod
+    def _method(levelno) -> str:
+        if levelno >= logging.CRITICAL:
+            return 'LogAlert'
+        if levelno >= logging.ERROR:
+            return 'LogError'
+        if levelno >= logging.WARNING:
+            return 'LogWarning'
+        if levelno >= logging.INFO:
+            return 'LogInfo'
+        return 'LogAssert'
+
+    def emit(self, record):
+        try:
+            _LogSink.write(self._method(record.levelno), record.name, record.funcName, self.format(record),
+                           self.size, self.interval, self.repeat_limit)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        _LogSink.flush()
+
+    def close(self):
+        self.flush()
+        super().close()
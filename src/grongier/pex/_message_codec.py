@@ -0,0 +1,355 @@
+import io
+import abc
+import datetime
+import uuid
+import decimal
+import base64
+import json
+import importlib
+
+# It's a subclass of the standard JSONEncoder class that knows how to encode date/time, decimal types,
+# and UUIDs.
+class IrisJSONEncoder(json.JSONEncoder):
+    """
+    JSONEncoder subclass that knows how to encode date/time, decimal types, and
+    UUIDs.
+    """
+
+    def default(self, o):
+        if o.__class__.__name__ == 'DataFrame':
+            return 'dataframe:'+o.to_json(orient="table")
+        elif isinstance(o, datetime.datetime):
+            r = o.isoformat()
+            if o.microsecond:
+                r = r[:23] + r[26:]
+            if r.endswith("+00:00"):
+                r = r[:-6] + "Z"
+            return 'datetime:'+r
+        elif isinstance(o, datetime.date):
+            return 'date:'+o.isoformat()
+        elif isinstance(o, datetime.time):
+            r = o.isoformat()
+            if o.microsecond:
+                r = r[:12]
+            return 'time:'+r
+        elif isinstance(o, decimal.Decimal): 
+            return 'decimal:'+str(o)
+        elif isinstance(o, uuid.UUID):
+            return 'uuid:'+str(o)
+        elif isinstance(o, bytes):
+            return 'bytes:'+base64.b64encode(o).decode("UTF-8")
+        elif hasattr(o, '__dict__'):
+            return o.__dict__
+        else:
+            return super().default(o)
+
+# It's a JSON decoder that looks for a colon in the value of a key/value pair. If it finds one, it
+# assumes the value is a string that represents a type and a value. It then converts the value to the
+# appropriate type
+class IrisJSONDecoder(json.JSONDecoder):
+    def __init__(self, *args, **kwargs):
+        json.JSONDecoder.__init__(
+            self, object_hook=self.object_hook, *args, **kwargs)
+
+    @staticmethod
+    def object_hook(obj):
+        ret = {}
+        for key, value in obj.items():
+            i = 0
+            if isinstance(value, str):
+                i = value.find(":") 
+            if (i>0):
+                typ = value[:i]
+                if typ == 'datetime':
+                    ret[key] = datetime.datetime.fromisoformat(value[i+1:])
+                elif typ == 'date':
+                    ret[key] = datetime.date.fromisoformat(value[i+1:])
+                elif typ == 'time':
+                    ret[key] = datetime.time.fromisoformat(value[i+1:])
+                elif typ == 'dataframe':
+                    module = importlib.import_module('pandas')
+                    ret[key] = module.read_json(io.StringIO(value[i+1:]),orient="table")
+                elif typ == 'decimal':
+                    ret[key] = decimal.Decimal(value[i+1:])
+                elif typ == 'uuid':
+                    ret[key] = uuid.UUID(value[i+1:])
+                elif typ == 'bytes':
+                    ret[key] = base64.b64decode((value[i+1:].encode("UTF-8")))
+                else:
+                    ret[key] = value
+            else:
+                ret[key] = value
+        return ret
+
+# It's a subclass of the standard JSONEncoder class that writes date/time, decimal types, UUIDs and bytes
+# without type prefix, for the messages decoded with the annotations of their dataclass.
+class TypedJSONEncoder(json.JSONEncoder):
+    """
+    JSONEncoder subclass for the typed mode: values are written as plain strings,
+    the type comes from the annotation of the field when the message is decoded.
+    """
+
+    def default(self, o):
+        if o.__class__.__name__ == 'DataFrame':
+            return o.to_json(orient="table")
+        elif isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        elif isinstance(o, (decimal.Decimal, uuid.UUID)):
+            return str(o)
+        elif isinstance(o, (bytes, bytearray)):
+            return base64.b64encode(o).decode("UTF-8")
+        elif hasattr(o, '__dict__'):
+            return o.__dict__
+        else:
+            return super().default(o)
+
+def _revive(obj):
+    """
+    Apply IrisJSONDecoder.object_hook to every object of an already decoded document,
+    for parsers that don't support object hooks.
+    """
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if isinstance(value, (dict, list)):
+                obj[key] = _revive(value)
+        return IrisJSONDecoder.object_hook(obj)
+    if isinstance(obj, list):
+        for i, value in enumerate(obj):
+            if isinstance(value, (dict, list)):
+                obj[i] = _revive(value)
+    return obj
+
+def _prefix_uuids(obj):
+    """
+    Return obj with its UUIDs replaced by "uuid:" strings, as IrisJSONEncoder writes them,
+    for serializers that write UUIDs themselves. Only the containers holding UUIDs are copied.
+    """
+    if isinstance(obj, uuid.UUID):
+        return 'uuid:' + str(obj)
+    if isinstance(obj, dict):
+        copy = None
+        for key, value in obj.items():
+            if isinstance(value, (dict, list, tuple, uuid.UUID)):
+                new = _prefix_uuids(value)
+                if new is not value:
+                    if copy is None:
+                        copy = dict(obj)
+                    copy[key] = new
+        return obj if copy is None else copy
+    if isinstance(obj, (list, tuple)):
+        copy = None
+        for i, value in enumerate(obj):
+            if isinstance(value, (dict, list, tuple, uuid.UUID)):
+                new = _prefix_uuids(value)
+                if new is not value:
+                    if copy is None:
+                        copy = list(obj)
+                    copy[i] = new
+        return obj if copy is None else copy
+    return obj
+
+class _MessageCodec(metaclass=abc.ABCMeta):
+    """ The abstract class of the codecs used to write the body of a Grongier.PEX.Message.
+    A codec turns the dictionary of a message into a str (stored in the character stream)
+    or into bytes (stored in the binary stream) and back.
+    The name of the codec is stored alongside the classname of the message, so that the
+    consumer decodes the body with the codec that wrote it.
+    """
+
+    name:str = None
+    """ The tag stored in the message, must be unique."""
+    binary:bool = False
+    """ True if dumps returns bytes."""
+    fallback:str = None
+    """ Name of a codec able to read the bodies of this one when it isn't available."""
+
+    _registry = {}
+
+    @property
+    def available(self) -> bool:
+        """ False when the library of the codec isn't installed."""
+        return True
+
+    @abc.abstractmethod
+    def dumps(self, obj, typed:bool=False):
+        """
+        Serialize a dictionary.
+
+        :param obj: the dictionary
+        :param typed: write values without type prefix, see TypedJSONEncoder
+        """
+
+    @abc.abstractmethod
+    def loads(self, data, typed:bool=False):
+        """
+        Deserialize what dumps returned.
+
+        :param data: the body
+        :param typed: don't look for type prefixes, the values are converted by the dataclass decoder
+        """
+
+    @classmethod
+    def register(cls, codec):
+        """
+        Register a codec, replacing any codec with the same name.
+
+        :param codec: an instance of a subclass of _MessageCodec
+        """
+        if not codec.name:
+            raise ValueError("A codec must have a name")
+        cls._registry[codec.name] = codec
+        return codec
+
+    @classmethod
+    def get(cls, name:str=None):
+        """
+        Return the codec to write a message with.
+        Falls back to the json codec when the library of the codec isn't installed.
+
+        :param name: the name of the codec, None or "" for json
+        :raises ValueError: if the codec is unknown
+        """
+        if not name:
+            return cls._registry['json']
+        try:
+            codec = cls._registry[name]
+        except KeyError:
+            raise ValueError("Unknown codec: " + name)
+        if not codec.available:
+            return cls._registry['json']
+        return codec
+
+    @classmethod
+    def for_reading(cls, name:str=None):
+        """
+        Return the codec to read a message written with the codec name.
+
+        :param name: the tag stored in the message, None or "" for json
+        :raises ValueError: if the codec is unknown
+        :raises ImportError: if neither the codec nor its fallback is available
+        """
+        if not name:
+            return cls._registry['json']
+        try:
+            codec = cls._registry[name]
+        except KeyError:
+            raise ValueError("Unknown codec: " + name)
+        if codec.available:
+            return codec
+        if codec.fallback:
+            return cls.for_reading(codec.fallback)
+        raise ImportError(f"The codec {name} is required to read this message")
+
+class JsonCodec(_MessageCodec):
+    """ The default codec, stdlib json with the IrisJSONEncoder/IrisJSONDecoder type prefixes."""
+
+    name = 'json'
+
+    def dumps(self, obj, typed:bool=False):
+        return json.dumps(obj, cls=TypedJSONEncoder if typed else IrisJSONEncoder, ensure_ascii=False)
+
+    def loads(self, data, typed:bool=False):
+        if typed:
+            return json.loads(data)
+        return json.loads(data, cls=IrisJSONDecoder)
+
+class OrjsonCodec(_MessageCodec):
+    """ JSON written and parsed by orjson, the body is the same as with the json codec.
+    datetime and dataclasses go through IrisJSONEncoder, UUIDs are given their prefix beforehand.
+    Non str dict keys are written as stdlib json does, what orjson can't write (integers over
+    64 bits for instance) is written by stdlib json.
+    """
+
+    name = 'orjson'
+    fallback = 'json'
+
+    def __init__(self):
+        try:
+            self._orjson = importlib.import_module('orjson')
+        except ImportError:
+            self._orjson = None
+            return
+        self._options = (self._orjson.OPT_PASSTHROUGH_DATETIME
+                         | self._orjson.OPT_PASSTHROUGH_DATACLASS
+                         | self._orjson.OPT_PASSTHROUGH_SUBCLASS
+                         | self._orjson.OPT_NON_STR_KEYS)
+        default = IrisJSONEncoder().default
+        # the dictionaries of the nested objects can hold UUIDs too
+        self._default = lambda o: _prefix_uuids(default(o))
+        # orjson writes datetimes and UUIDs itself in the typed mode
+        self._typed_options = (self._orjson.OPT_PASSTHROUGH_DATACLASS
+                               | self._orjson.OPT_PASSTHROUGH_SUBCLASS
+                               | self._orjson.OPT_NON_STR_KEYS)
+        self._typed_default = TypedJSONEncoder().default
+        self._json = JsonCodec()
+
+    @property
+    def available(self) -> bool:
+        return self._orjson is not None
+
+    def dumps(self, obj, typed:bool=False):
+        try:
+            if typed:
+                return self._orjson.dumps(obj, default=self._typed_default, option=self._typed_options).decode()
+            return self._orjson.dumps(_prefix_uuids(obj), default=self._default, option=self._options).decode()
+        except self._orjson.JSONEncodeError:
+            return self._json.dumps(obj, typed)
+
+    def loads(self, data, typed:bool=False):
+        if typed:
+            return self._orjson.loads(data)
+        return _revive(self._orjson.loads(data))
+
+class MsgpackCodec(_MessageCodec):
+    """ MessagePack body stored in the binary stream, bytes are kept as is instead of base64."""
+
+    name = 'msgpack'
+    binary = True
+
+    def __init__(self):
+        try:
+            self._msgpack = importlib.import_module('msgpack')
+        except ImportError:
+            self._msgpack = None
+            return
+        def default_for(encoder):
+            def default(o):
+                if isinstance(o, bytearray):
+                    return bytes(o)
+                return encoder.default(o)
+            return default
+        self._default = default_for(IrisJSONEncoder())
+        self._typed_default = default_for(TypedJSONEncoder())
+
+    @property
+    def available(self) -> bool:
+        return self._msgpack is not None
+
+    def dumps(self, obj, typed:bool=False):
+        return self._msgpack.packb(obj, default=self._typed_default if typed else self._default, use_bin_type=True)
+
+    def loads(self, data, typed:bool=False):
+        if typed:
+            return self._msgpack.unpackb(data, raw=False, strict_map_key=False)
+        return self._msgpack.unpackb(data, raw=False, strict_map_key=False, object_hook=IrisJSONDecoder.object_hook)
+
+_MessageCodec.register(JsonCodec())
+_MessageCodec.register(OrjsonCodec())
+_MessageCodec.register(MsgpackCodec())
+
+def register_codec(codec):
+    """
+    Register a message codec, it can then be selected with the CODEC attribute of a message class
+    or the codec setting of a component.
+
+    :param codec: an instance of a subclass of MessageCodec
+    """
+    return _MessageCodec.register(codec)
+
+def get_codec(name:str=None):
+    """
+    Return a registered message codec, the json codec if its library isn't installed.
+
+    :param name: the name of the codec
+    """
+    return _MessageCodec.get(name)
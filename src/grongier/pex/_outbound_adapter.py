@@ -1,8 +1,23 @@
 from grongier.pex._common import _Common
+from grongier.pex._logging import _LogSink
+from grongier.pex._connection_pool import _ConnectionPool
 
 class _OutboundAdapter(_Common):
-    """ Responsible for sending the data to the external system."""
+    """ Responsible for sending the data to the external system.
+
+    The adapter can keep its connections to the external system open from one message to the next in a
+    connection pool. The pool is opt-in: define a create_connection method returning a new connection
+    (any object), optionally override check_connection and close_connection, then use the connections with:
+        with self.connection() as conn:
+            ...
+    pool_min_size connections are opened at on_init, idle connections are closed after pool_max_idle seconds
+    and checked with check_connection on keepalive (set the KeepaliveInterval setting), the pool is closed on tear down.
+    """
     BusinessHost = business_host = business_host_python = None
+    pool_size:int = 10
+    pool_min_size:int = 0
+    pool_max_idle:float = 60.0
+    pool_timeout:float = 30.0
 
     def on_keepalive(self):
         """
@@ -10,6 +25,89 @@ class _OutboundAdapter(_Common):
         """
         return
 
+    def check_connection(self, connection) -> bool:
+        """ Called on keepalive for each idle connection of the pool, override it to run a health check.
+
+        Parameters:
+        connection: a connection of the pool.
+
+        Returns:
+        True if the connection is still usable, otherwise it is closed.
+        """
+        return True
+
+    def close_connection(self, connection):
+        """ Called by the connection pool to close a connection, by default calls its close method.
+
+        Parameters:
+        connection: a connection of the pool.
+        """
+        if hasattr(connection, 'close'):
+            connection.close()
+        return
+
+    def get_pool(self) -> _ConnectionPool:
+        """ Return the connection pool of the adapter, create it on first use.
+
+        Raises:
+        RuntimeError: if the adapter doesn't define create_connection.
+        """
+        pool = self.__dict__.get('_pool')
+        if pool is None:
+            if not callable(getattr(self, 'create_connection', None)):
+                raise RuntimeError(type(self).__name__ + " has no connection pool: define a create_connection method returning a new connection to use it")
+            klass = type(self)
+            check = self.check_connection if klass.check_connection is not _OutboundAdapter.check_connection else None
+            pool = self._pool = _ConnectionPool(self.create_connection, int(self.pool_size), float(self.pool_max_idle),
+                                                check, self.close_connection, float(self.pool_timeout))
+        return pool
+
+    def connection(self, timeout=-1):
+        """ Context manager taking a connection from the pool and giving it back at the end of the block.
+        A connection is closed instead of given back when the block raises an OSError.
+
+        Parameters:
+        timeout: seconds to wait for a free connection when pool_size connections are in use, by default pool_timeout.
+        """
+        return self.get_pool().connection(timeout)
+
+    def pool_stats(self) -> dict:
+        """ Return the metrics of the connection pool: connections in use and idle, created, evicted, acquired, waits and wait time."""
+        return self.get_pool().stats()
+
+    def _dispatch_on_init(self, host_object):
+        """ For internal use only. """
+        super()._dispatch_on_init(host_object)
+        if int(self.pool_min_size) > 0:
+            try:
+                self.get_pool().warm_up(int(self.pool_min_size))
+            except Exception as e:
+                # the connections are opened on demand instead
+                self.log_warning("Connection pool warm up failed: %s", e)
+        return
+
+    def _pools(self) -> list:
+        """ For internal use only. Return the connection pools created so far. """
+        pool = self.__dict__.get('_pool')
+        return [pool] if pool is not None else []
+
+    def _dispatch_on_keepalive(self):
+        """ For internal use only. """
+        _LogSink.flush()
+        for pool in self._pools():
+            pool.evict_idle()
+            pool.check_idle()
+        return self.on_keepalive()
+
+    def _dispatch_on_tear_down(self, host_object=None):
+        """ For internal use only. """
+        try:
+            super()._dispatch_on_tear_down(host_object)
+        finally:
+            for pool in self._pools():
+                pool.close()
+        return
+
     def _set_iris_handles(self, handle_current, handle_partner):
         """ For internal use only. """
         self.iris_handle = handle_current
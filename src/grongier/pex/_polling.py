@@ -0,0 +1,88 @@
+from grongier.pex._utils import _Utils
+
+class _AdaptivePolling():
+    """ Adaptive polling interval of a polling business service or inbound adapter.
+
+    While the polls find work the source is polled again at once, when a poll finds nothing the interval
+    starts from min_interval and is multiplied by backoff at each empty poll, up to max_interval.
+
+    Counters: polls, hits (polls that found work), interval (the current interval in seconds).
+    """
+
+    def __init__(self, min_interval=0.1, max_interval=5.0, backoff=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = max(backoff, 1.0)
+        self.interval = 0.0
+        self.polls = 0
+        self.hits = 0
+
+    @classmethod
+    def from_settings(cls, host, call_interval):
+        """
+        Create the polling state from the settings of a component.
+
+        :param host: the component, with the polling_min_interval, polling_max_interval and polling_backoff settings
+        :param call_interval: the CallInterval of the component, used when polling_max_interval is 0
+        """
+        max_interval = float(host.polling_max_interval) or float(call_interval)
+        return cls(float(host.polling_min_interval), max_interval, float(host.polling_backoff))
+
+    def update(self, found) -> float:
+        """
+        Record the outcome of a poll and return the number of seconds to wait before the next one.
+
+        :param found: True if the poll found work
+        :return: 0 to poll again at once, else the interval
+        """
+        self.polls += 1
+        if found:
+            self.hits += 1
+            self.interval = 0.0
+        elif self.interval == 0.0:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return self.interval
+
+    def stats(self) -> dict:
+        """ Return the current interval, the counters and the hit rate."""
+        return {
+            'interval': self.interval,
+            'polls': self.polls,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.polls if self.polls else 0.0,
+        }
+
+class _PollingHost():
+    """ Adaptive polling settings of the components polled by the production: the business services and the inbound adapters."""
+
+    adaptive_polling:bool = False
+    polling_min_interval:float = 0.1
+    polling_max_interval:float = 0
+    polling_backoff:float = 2.0
+
+    def polling_stats(self) -> dict:
+        """ Return the current interval, the number of polls, of polls that found work, and the hit rate of the adaptive polling. """
+        polling = self.__dict__.get('_polling')
+        return polling.stats() if polling is not None else _AdaptivePolling().stats()
+
+    def _next_poll_interval(self, found, call_interval):
+        """
+        For internal use only. Return the interval before the next poll, or None when adaptive polling is off.
+
+        :param found: True if the poll found work
+        :param call_interval: a function returning the CallInterval of the component
+        """
+        if not _Utils.to_bool(self.adaptive_polling):
+            return None
+        polling = self.__dict__.get('_polling')
+        if polling is None:
+            polling = self._polling = _AdaptivePolling.from_settings(self, call_interval())
+        idle = polling.interval > 0
+        interval = polling.update(found)
+        if idle != (interval > 0):
+            stats = polling.stats()
+            self.log_assert("Adaptive polling: next poll in %ss, hit rate %.0f%% over %d polls",
+                            interval, stats['hit_rate'] * 100, stats['polls'])
+        return interval
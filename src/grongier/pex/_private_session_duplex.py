@@ -1,5 +1,6 @@
 import importlib
 from grongier.pex._business_host import _BusinessHost
+from grongier.pex._logging import _LogSink
 
 class _PrivateSessionDuplex(_BusinessHost):
     
@@ -21,6 +22,7 @@ class _PrivateSessionDuplex(_BusinessHost):
         """
         pass
 
+    @_LogSink.flush_after
     @_BusinessHost.input_deserialzer
     @_BusinessHost.output_serialzer
     def _dispatch_on_message(self, request):
@@ -37,6 +39,7 @@ class _PrivateSessionDuplex(_BusinessHost):
         self.Adapter = self.adapter = handle_partner
         return
 
+    @_LogSink.flush_after
     @_BusinessHost.input_deserialzer
     @_BusinessHost.output_serialzer
     def _dispatch_on_process_input(self, request):
@@ -1,8 +1,10 @@
 from grongier.pex._business_process import _BusinessProcess
 from grongier.pex._business_host import _BusinessHost
+from grongier.pex._logging import _LogSink
 
 class _PrivateSessionProcess(_BusinessProcess):
     
+    @_LogSink.flush_after
     @_BusinessHost.input_deserialzer
     @_BusinessHost.output_serialzer
     def _dispatch_on_document(self, host_object,source_config_name, request):
@@ -1,11 +1,35 @@
 import os
 import ast
+import struct
 import iris
 import inspect
 import xmltodict
 import pkg_resources
 
+# maximum length of an IRIS string, and thus of a single stream read or write
+IRIS_MAX_STRING_LENGTH = 3641144
+DEFAULT_CHUNK_SIZE = 1000000
+# header of a binary payload made of several frames, see _Utils.pack_frames
+FRAMES_MAGIC = b'IOPF'
+
 class _Utils():
+
+    _iris_classes = {}
+
+    @staticmethod
+    def iris_class(name:str):
+        """
+        Return the handle of an IRIS class, looked up once per process.
+
+        :param name: the name of the IRIS class
+        :return: the same object as iris.cls(name)
+        """
+        try:
+            return _Utils._iris_classes[name]
+        except KeyError:
+            klass = _Utils._iris_classes[name] = iris.cls(name)
+            return klass
+
     @staticmethod
     def raise_on_error(sc):
         """
@@ -117,7 +141,7 @@ class _Utils():
                         extend = klass.bases[0].id
                     else:
                         extend = klass.bases[0].attr
-                if  extend in ('BusinessOperation','BusinessProcess','BusinessService','DuplexService','DuplexProcess','DuplexOperation','InboundAdapter','OutboundAdapter'):
+                if  extend in ('BusinessOperation','BusinessProcess','BusinessService','DuplexService','DuplexProcess','DuplexOperation','InboundAdapter','OutboundAdapter','BatchBusinessOperation','HttpOutboundAdapter'):
                     module = _Utils.filename_to_module(filename)
                     iris_class_name = f"{iris_package_name}.{module}.{klass.name}"
                     # strip "_" for iris class name
@@ -352,18 +376,169 @@ class _Utils():
         return data
 
     @staticmethod
-    def stream_to_string(stream)-> str:
-        string = ""
+    def _chunk_size(buffer:int=None) -> int:
+        """
+        Clamp a requested chunk size to what a single IRIS string can hold.
+
+        :param buffer: the requested chunk size, None for the default one
+        :return: a chunk size between 1 and IRIS_MAX_STRING_LENGTH
+        """
+        if buffer is None:
+            return DEFAULT_CHUNK_SIZE
+        buffer = int(buffer)
+        if buffer <= 0:
+            return DEFAULT_CHUNK_SIZE
+        return min(buffer, IRIS_MAX_STRING_LENGTH)
+
+    @staticmethod
+    def iter_chunks(data, buffer:int=None):
+        """
+        Yield successive slices of a string, bytes or memoryview without building
+        an intermediate list. Bytes are sliced through a memoryview so that only
+        one chunk is copied at a time.
+
+        :param data: the payload to slice
+        :param buffer: the size of each chunk
+        """
+        n = _Utils._chunk_size(buffer)
+        if isinstance(data, (bytes, bytearray)):
+            data = memoryview(data)
+        if isinstance(data, memoryview):
+            data = data.cast('B')
+            for i in range(0, len(data), n):
+                yield bytes(data[i:i+n])
+        else:
+            for i in range(0, len(data), n):
+                yield data[i:i+n]
+
+    @staticmethod
+    def iter_stream(stream, buffer:int=None):
+        """
+        Yield the content of an IRIS stream chunk by chunk, from the beginning.
+
+        :param stream: an IRIS %Stream object
+        :param buffer: the size of each read
+        """
+        n = _Utils._chunk_size(buffer)
         stream.Rewind()
+        read = stream.Read
         while not stream.AtEnd:
-            string += stream.Read(4092)
-        return string
-    
+            yield read(n)
+
     @staticmethod
-    def string_to_stream(string:str):
-        stream = iris.cls('%Stream.GlobalCharacter')._New()
-        n = 4092
-        chunks = [string[i:i+n] for i in range(0, len(string), n)]
+    def chunks_to_stream(chunks, stream=None):
+        """
+        Write an iterable of chunks (a generator, a list, ...) into an IRIS stream.
+
+        :param chunks: an iterable of str or bytes
+        :param stream: the stream to write to, a new %Stream.GlobalCharacter if None
+        :return: the stream
+        """
+        if stream is None:
+            stream = _Utils.iris_class('%Stream.GlobalCharacter')._New()
+        write = stream.Write
         for chunk in chunks:
-            stream.Write(chunk)
-        return stream
\ No newline at end of file
+            write(chunk)
+        return stream
+
+    @staticmethod
+    def stream_to_string(stream, buffer:int=None)-> str:
+        """
+        Read a whole IRIS character stream into a python string.
+        Chunks are joined once at the end so the cost stays linear in the size of the stream.
+
+        :param stream: an IRIS %Stream object
+        :param buffer: the size of each read, up to IRIS_MAX_STRING_LENGTH
+        :return: the content of the stream
+        """
+        return "".join(_Utils.iter_stream(stream, buffer))
+
+    @staticmethod
+    def string_to_stream(string:str, buffer:int=None):
+        """
+        Write a python string into a new IRIS %Stream.GlobalCharacter, chunk by chunk.
+
+        :param string: the string to write
+        :param buffer: the size of each write, up to IRIS_MAX_STRING_LENGTH
+        :return: the stream
+        """
+        return _Utils.chunks_to_stream(_Utils.iter_chunks(string, buffer))
+
+    @staticmethod
+    def stream_to_bytes(stream, buffer:int=None, writable:bool=False) -> bytes:
+        """
+        Read a whole IRIS binary stream into python bytes.
+        IRIS strings come back as python str with one character per byte, they are
+        encoded back to bytes with latin-1.
+
+        :param stream: an IRIS %Stream object
+        :param buffer: the size of each read, up to IRIS_MAX_STRING_LENGTH
+        :param writable: return a bytearray instead of bytes, for views that must be writable
+        :return: the content of the stream
+        """
+        return (bytearray() if writable else b"").join(
+            chunk.encode('latin-1') if isinstance(chunk, str) else chunk
+            for chunk in _Utils.iter_stream(stream, buffer)
+        )
+
+    @staticmethod
+    def bytes_to_stream(data, buffer:int=None):
+        """
+        Write bytes, a bytearray, a memoryview or an iterable of bytes chunks into a new
+        IRIS %Stream.GlobalBinary.
+
+        :param data: the payload to write
+        :param buffer: the size of each write, up to IRIS_MAX_STRING_LENGTH
+        :return: the stream
+        """
+        stream = _Utils.iris_class('%Stream.GlobalBinary')._New()
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = _Utils.iter_chunks(data, buffer)
+        return _Utils.chunks_to_stream(data, stream)
+
+    @staticmethod
+    def pack_frames(frames, buffer:int=None):
+        """
+        Yield the chunks of a binary payload made of several frames, without concatenating them.
+        The payload starts with FRAMES_MAGIC, the number of frames and the length of each frame.
+
+        :param frames: a list of bytes-like objects
+        :param buffer: the size of each chunk
+        """
+        views = [memoryview(frame).cast('B') for frame in frames]
+        yield FRAMES_MAGIC + struct.pack(f'<I{len(views)}Q', len(views), *[len(v) for v in views])
+        for view in views:
+            yield from _Utils.iter_chunks(view, buffer)
+
+    @staticmethod
+    def unpack_frames(data) -> list:
+        """
+        Split a payload built with pack_frames into zero copy memoryviews.
+        A payload that doesn't start with FRAMES_MAGIC is returned as a single frame.
+
+        :param data: the bytes of the payload
+        :return: a list of memoryview
+        """
+        view = memoryview(data)
+        if bytes(view[:4]) != FRAMES_MAGIC:
+            return [view]
+        (count,) = struct.unpack_from('<I', view, 4)
+        lengths = struct.unpack_from(f'<{count}Q', view, 8)
+        frames = []
+        offset = 8 + 8 * count
+        for length in lengths:
+            frames.append(view[offset:offset+length])
+            offset += length
+        return frames
+
+    @staticmethod
+    def to_bool(value) -> bool:
+        """
+        Convert a setting to a boolean, settings set by the production are strings.
+
+        :param value: a boolean, a number or a string like "1", "true", "0" or "false"
+        :return: the boolean value
+        """
+        if isinstance(value, str):
+            return value.strip().lower() in ('1', 'true', 'yes', 'on')
+        return bool(value)
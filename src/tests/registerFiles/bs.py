@@ -114,4 +114,20 @@ class RedditServiceWithPexAdapter(BusinessService):
         if not hasattr(self,'Target'):
             self.Target = "Python.FilterPostRoutingRule"
         
-        return
\ No newline at end of file
+        return
+
+ARCHIVE_TARGET = "Python.ArchiveOperation"
+
+class ConnectionsService(BusinessService):
+
+    target = "Python.FileOperation"
+
+    def on_init(self):
+        raise RuntimeError('on_init must not be called to find the connections')
+
+    def on_process_input(self, request):
+        self.send_request_sync(self.target, request)
+        self.send_request_async(target=ARCHIVE_TARGET, request=request)
+        audit = "Python.AuditOperation"
+        self.send_request_async(audit, request)
+        self.send_request_sync(request.destination, request)
@@ -54,4 +54,14 @@ class TestSimpleMessageNotMessage:
 @dataclass
 class TestPickledMessage(PickleMessage):
     integer : int 
-    string : str
\ No newline at end of file
+    string : str
+
+@dataclass
+class TestTypedMessage(Message):
+    TYPED = True
+
+    text:str = None
+    created:datetime = None
+    day:date = None
+    hour:time = None
+    embedded_list:List[PostClass] = None
@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+
+from grongier.pex import BatchBusinessOperation, BatchItemError, Message
+
+@dataclass
+class Item(Message):
+    value: int = 0
+
+@dataclass
+class Result(Message):
+    value: int = 0
+
+class HostObject:
+    """ Stand-in for Grongier.PEX.BusinessOperation, keeping the deferred responses."""
+
+    def __init__(self):
+        self.tokens = 0
+        self.responses = {}
+        self.KeepaliveInterval = 0
+
+    def dispatchDeferResponse(self):
+        self.tokens += 1
+        return 'token' + str(self.tokens)
+
+    def dispatchSendDeferredResponse(self, token, response):
+        self.responses[token] = response
+
+class DoubleOperation(BatchBusinessOperation):
+    batch_size = 3
+    batch_age = 60
+
+    def on_init(self):
+        self.batches = []
+
+    def on_batch(self, requests):
+        self.batches.append(len(requests))
+        return [ValueError("odd") if r.value % 2 else Result(r.value * 2) for r in requests]
+
+def make_operation():
+    bo = DoubleOperation()
+    bo.iris_handle = HostObject()
+    bo.on_init()
+    bo.log_error = lambda message, *args: None
+    # keep the responses as python objects
+    bo._dispatch_serializer = lambda message: message
+    return bo
+
+def test_batch_flush_on_size():
+    bo = make_operation()
+    for i in range(4):
+        assert bo._dispatch_on_message(Item(i * 2)) is None
+    assert bo.batches == [3]
+    responses = bo.iris_handle.responses
+    assert sorted(responses) == ['token1', 'token2', 'token3']
+    assert responses['token3'].value == 8
+
+def test_batch_flush_on_keepalive_and_errors():
+    bo = make_operation()
+    bo._dispatch_on_message(Item(2))
+    bo._dispatch_on_message(Item(3))
+    bo._dispatch_on_keepalive()
+    assert bo.batches == [2]
+    error = bo.iris_handle.responses['token2']
+    assert isinstance(error, BatchItemError)
+    assert error.error_type == 'ValueError'
+    assert error.error == 'odd'
+
+def test_batch_keepalive_interval():
+    bo = make_operation()
+    bo.log_info = lambda message, *args: None
+    bo._dispatch_on_init(None)
+    # no keepalive configured, the partial batches would wait for the next request
+    assert bo.iris_handle.KeepaliveInterval == 60
+    bo.batch_age = '2.5'
+    bo.iris_handle.KeepaliveInterval = 30
+    bo._dispatch_on_init(None)
+    assert bo.iris_handle.KeepaliveInterval == 3
+    bo.iris_handle.KeepaliveInterval = 1
+    bo._dispatch_on_init(None)
+    assert bo.iris_handle.KeepaliveInterval == 1
+
+def test_batch_wrong_length():
+    bo = make_operation()
+    bo.on_batch = lambda requests: []
+    bo._dispatch_on_message(Item(2))
+    bo._flush_batch()
+    error = bo.iris_handle.responses['token1']
+    assert isinstance(error, BatchItemError)
+    assert error.error_type == 'ValueError'
+
+class AsyncOperation(BatchBusinessOperation):
+    batch_size = 2
+
+    async def on_message(self, request):
+        return Result(request.value + 1)
+
+def test_batch_default_async_handler():
+    bo = AsyncOperation()
+    bo.iris_handle = HostObject()
+    bo._dispatch_serializer = lambda message: message
+    bo._dispatch_on_message(Item(1))
+    bo._dispatch_on_message(Item(2))
+    # the coroutines of on_message are run, not sent as responses
+    assert [bo.iris_handle.responses[token].value for token in ('token1', 'token2')] == [2, 3]
+
+def test_batch_generator_and_serializer_error():
+    bo = make_operation()
+    bo.on_batch = lambda requests: (Result(r.value) for r in requests)
+    def serializer(message):
+        if isinstance(message, Result) and message.value == 3:
+            raise TypeError("not serializable")
+        return message
+    bo._dispatch_serializer = serializer
+    for i in range(3):
+        bo._dispatch_on_message(Item(i + 2))
+    responses = bo.iris_handle.responses
+    # the failing item gets an error, the others their response
+    assert responses['token1'].value == 2
+    assert isinstance(responses['token2'], BatchItemError)
+    assert responses['token2'].error_type == 'TypeError'
+    assert responses['token3'].value == 4
@@ -1,17 +1,22 @@
+import io
+import iris
 import pickle
 import codecs
+import pytest
 from datetime import datetime, date, time
 from unittest.mock import MagicMock
 
-from grongier.pex._business_host import _BusinessHost
+from grongier.pex._business_host import _BusinessHost, OutOfBandPickler, OutOfBandUnpickler
+from grongier.pex._dataclass_codec import _DataclassCodec
+from grongier.pex._class_resolver import _ClassResolver
 
-from grongier.pex import Message
+from grongier.pex import Message, BusinessOperation, RequestError
 
-from registerFiles.message import TestSimpleMessage, TestSimpleMessageNotMessage, TestSimpleMessageNotDataclass, TestPickledMessage, FullMessage, PostMessage, MyResponse
+from registerFiles.message import TestSimpleMessage, TestSimpleMessageNotMessage, TestSimpleMessageNotDataclass, TestPickledMessage, FullMessage, PostMessage, MyResponse, TestTypedMessage
 
 from registerFiles.obj import PostClass
 
-from registerFiles.bs import RedditService
+from registerFiles.bs import RedditService, RedditServiceWithIrisAdapter, ConnectionsService
 
 def test_dispatch_serializer():
     bh = _BusinessHost()
@@ -90,6 +95,26 @@ def test_serialize_message_decorator():
     assert bh.iris_handle.dispatchSendRequestSync.call_args[0][0] == 'test'
     assert type(bh.iris_handle.dispatchSendRequestSync.call_args[0][1]) == type(msg_serialized)
 
+def test_send_multi_request_sync():
+    bh = _BusinessHost()
+    msg = TestSimpleMessage(integer=1, string='test')
+    # Mock iris_handler, the first call answers with its request, the second one fails
+    def send_multiple(targets, requests, timeout, description, responses, errors):
+        assert targets.Count() == 2
+        responses.Insert(requests.GetAt(1))
+        errors.Insert('')
+        responses.Insert(None)
+        errors.Insert('ERROR #5002')
+    bh.iris_handle = MagicMock()
+    bh.iris_handle.dispatchSendRequestSyncMultiple.side_effect = send_multiple
+
+    result = bh.send_multi_request_sync(targets_and_requests=[('first', msg), ('second', msg)])
+
+    assert result[0] == msg
+    assert isinstance(result[1], RequestError)
+    assert result[1].target == 'second'
+    assert result[1].message == 'ERROR #5002'
+
 def test_serialize_message_decorator_by_position():
     bh = _BusinessHost()
     msg = TestSimpleMessage(integer=1, string='test')
@@ -106,11 +131,32 @@ def test_serialize_message():
     bh = _BusinessHost()
     msg = TestSimpleMessage(integer=1, string='test')
     result = bh._serialize_message(msg)
+    assert result.classname == 'registerFiles.message.TestSimpleMessage'
+    assert result.json == '{"integer": 1, "string": "test"}'
+    assert result.jinline == '{"integer": 1, "string": "test"}'
+
+def test_serialize_message_columnar_without_buffer():
+    bh = _BusinessHost()
+    bh.columnar = True
+    msg = TestSimpleMessage(integer=1, string='buffer:0')
+    result = bh._serialize_message(msg)
+    # no frames, the reader doesn't have to load the jbuf stream
+    assert result.codec == ''
+    msg = bh._deserialize_message(result)
+    assert msg.string == 'buffer:0'
+
+def test_serialize_message_stream():
+    bh = _BusinessHost()
+    bh.inline_threshold = 0
+    msg = TestSimpleMessage(integer=1, string='test')
+    result = bh._serialize_message(msg)
     result.jstr.Rewind()
     stream = result.jstr.Read()
-    assert result.classname == 'registerFiles.message.TestSimpleMessage'
+    assert result.jinline == ''
     assert result.json == '{"integer": 1, "string": "test"}'
     assert stream == '{"integer": 1, "string": "test"}'
+    msg = bh._deserialize_message(result)
+    assert msg.string == 'test'
 
 def test_deseialize_message():
     bh = _BusinessHost()
@@ -202,4 +248,245 @@ def test_dispatch_on_get_connections():
     _list_len = _list.__len__()
     for i in range(0, _list_len):
         print(_list.__getitem__(i))
-    assert len(_list) == 1
\ No newline at end of file
+    assert len(_list) == 1
+
+def test_on_get_connections_static():
+    # on_init raises, the targets are found without running the component
+    bs = ConnectionsService()
+    assert bs.on_get_connections() == ['Python.FileOperation', 'Python.ArchiveOperation', 'Python.AuditOperation']
+    # attribute assigned in OnInit
+    bs = RedditServiceWithIrisAdapter()
+    assert bs.on_get_connections() == ['Python.FilterPostRoutingRule']
+
+def test_dataclass_from_dict_extra_fields():
+    bh = _BusinessHost()
+    dikt = {
+        'Post': {'Title': 'title', 'Selftext': 'text', 'Author': 'author', 'Url': 'url'},
+        'ToEmailAddress': 'test@example.com',
+        'extra': 'extra',
+    }
+    # PostMessage resolves PostClass through `from obj import PostClass`
+    post_class = PostMessage.__dataclass_fields__['Post'].type
+    result = bh._dataclass_from_dict(PostMessage, dikt)
+    assert type(result.Post) is post_class
+    assert result.Post.Title == 'title'
+    assert result.Post.CreatedUTC is None
+    assert result.ToEmailAddress == 'test@example.com'
+    assert result.Found is None
+    assert result.extra == 'extra'
+    # the decode function is compiled once per class
+    assert PostMessage in _DataclassCodec._decoders
+    assert post_class in _DataclassCodec._decoders
+    assert bh._dataclass_from_dict(PostMessage, dikt) == result
+
+def test_deserialize_message_class_cache():
+    bh = _BusinessHost()
+    msg = TestSimpleMessage(integer=1, string='test')
+    result = bh._serialize_message(msg)
+    bh._deserialize_message(result)
+    hits = _ClassResolver.stats()['hits']
+    msg = bh._deserialize_message(result)
+    assert msg.integer == 1
+    assert _ClassResolver.stats()['hits'] == hits + 1
+
+def test_deserialize_message_unknown_class():
+    bh = _BusinessHost()
+    result = bh._serialize_message(TestSimpleMessage(integer=1, string='test'))
+    result.classname = 'registerFiles.message.UnknownMessage'
+    for _ in range(2):
+        try:
+            bh._deserialize_message(result)
+            assert False
+        except ImportError:
+            pass
+    assert _ClassResolver.stats()['negative_hits'] >= 1
+
+def test_serialize_pickled_message_binary():
+    bh = _BusinessHost()
+    bh.pickle_binary = "1"
+    payload = bytes(range(256)) * 1024
+    msg = TestPickledMessage(integer=1, string=payload)
+    result = bh._serialize_pickle_message(msg)
+    assert result.classname == 'registerFiles.message.TestPickledMessage'
+    assert result.jbin.Size > len(payload)
+    assert result.jstr.Size == 0
+    msg = bh._deserialize_pickle_message(result)
+    assert msg.integer == 1
+    assert msg.string == payload
+
+def test_deserialize_pickled_message_legacy_base64():
+    bh = _BusinessHost()
+    bh.pickle_binary = True
+    result = _BusinessHost()._serialize_pickle_message(TestPickledMessage(integer=1, string='test'))
+    # bodies written in base64 are still readable
+    msg = bh._deserialize_pickle_message(result)
+    assert msg.integer == 1
+    assert msg.string == 'test'
+
+def test_serialize_message_codec_fallback():
+    bh = _BusinessHost()
+    bh.codec = 'orjson'
+    msg = TestSimpleMessage(integer=1, string='test')
+    result = bh._serialize_message(msg)
+    # orjson writes plain json, the body must be readable whatever the codec available
+    assert result.json.replace(' ', '') == '{"integer":1,"string":"test"}'
+    msg = bh._deserialize_message(result)
+    assert msg.integer == 1
+    assert msg.string == 'test'
+
+def test_message_codec_unknown():
+    bh = _BusinessHost()
+    bh.codec = 'unknown'
+    msg = TestSimpleMessage(integer=1, string='test')
+    try:
+        bh._serialize_message(msg)
+        assert False
+    except ValueError:
+        pass
+
+def test_serialize_message_compressed():
+    bh = _BusinessHost()
+    bh.compression = 'zlib'
+    bh.compression_threshold = 100
+    msg = TestSimpleMessage(integer=1, string='test' * 100)
+    result = bh._serialize_message(msg)
+    assert result.compression == 'zlib'
+    assert result.jbin.Size < 400
+    msg = bh._deserialize_message(result)
+    assert msg.integer == 1
+    assert msg.string == 'test' * 100
+
+def test_serialize_message_below_compression_threshold():
+    bh = _BusinessHost()
+    bh.compression = 'zlib'
+    msg = TestSimpleMessage(integer=1, string='test')
+    result = bh._serialize_message(msg)
+    assert result.compression == ''
+    assert result.json == '{"integer": 1, "string": "test"}'
+
+def test_typed_message():
+    bh = _BusinessHost()
+    msg = TestTypedMessage(text='date:not a date', created=datetime(2020, 1, 2, 3, 4, 5), day=date(2020, 1, 2),
+                           hour=time(3, 4, 5), embedded_list=[PostClass(Title='test', Selftext='', Author='', Url='')])
+    result = bh._serialize_message(msg)
+    # no type prefix in the typed mode
+    assert '"created": "2020-01-02T03:04:05"' in result.json
+    msg = bh._deserialize_message(result)
+    assert msg.text == 'date:not a date'
+    assert msg.created == datetime(2020, 1, 2, 3, 4, 5)
+    assert msg.day == date(2020, 1, 2)
+    assert msg.hour == time(3, 4, 5)
+    assert msg.embedded_list[0].Title == 'test'
+
+def test_typed_decoder_accepts_prefixes():
+    msg = _DataclassCodec.decode_typed(TestTypedMessage, {'text': 'date:2020-01-02', 'day': 'date:2020-01-02'})
+    assert msg.text == 'date:2020-01-02'
+    assert msg.day == date(2020, 1, 2)
+
+def test_lazy_message():
+    bh = _BusinessHost()
+    bh.lazy = True
+    msg = TestSimpleMessage(integer=1, string='test')
+    serial = bh._serialize_message(msg)
+    result = bh._deserialize_message(serial)
+    assert isinstance(result, TestSimpleMessage)
+    # never accessed, the original message is sent again
+    assert bh._dispatch_serializer(result) is serial
+    assert result.integer == 1
+    assert type(result) is TestSimpleMessage
+    assert result == msg
+
+def test_dispatch_deserializer_cache():
+    bh = _BusinessHost()
+    serial = bh._dispatch_serializer(TestSimpleMessage(integer=1, string='test'))
+    assert _BusinessHost._serializers[TestSimpleMessage] == '_serialize_message'
+    msg = bh._dispatch_deserializer(serial)
+    assert msg.integer == 1
+    assert _BusinessHost._deserializers['Grongier.PEX.Message'] == '_deserialize_message'
+    # other iris objects are returned as is
+    request = iris.cls('Ens.Request')._New()
+    assert bh._dispatch_deserializer(request) is request
+
+def test_dispatch_table():
+    from typing import Union
+    from dataclasses import dataclass
+
+    @dataclass
+    class SubMessage(TestSimpleMessage):
+        pass
+
+    class FirstOperation(BusinessOperation):
+        def on_message(self, request):
+            return 'default'
+        def on_simple(self, request: TestSimpleMessage):
+            return 'simple'
+        def on_union(self, request: Union[PostMessage, MyResponse]):
+            return 'union'
+
+    class SecondOperation(BusinessOperation):
+        def on_message(self, request):
+            return 'default'
+        def on_post(self, request: PostMessage):
+            return 'post'
+
+    first = FirstOperation()
+    second = SecondOperation()
+    assert first._dispach_message(TestSimpleMessage(integer=1, string='test')) == 'simple'
+    # subclassed messages fall back along the MRO
+    assert first._dispach_message(SubMessage(integer=1, string='test')) == 'simple'
+    assert first._dispach_message(PostMessage()) == 'union'
+    assert first._dispach_message(MyResponse()) == 'union'
+    # sibling classes don't share their handlers
+    assert second._dispach_message(TestSimpleMessage(integer=1, string='test')) == 'default'
+    assert second._dispach_message(PostMessage()) == 'post'
+
+def test_dispatch_table_framework_bases():
+
+    class AuditOperation(BusinessOperation):
+        def on_message(self, request):
+            return 'default'
+        def audit(self, item: object):
+            return 'audit'
+        def on_any(self, request: Message):
+            return 'any'
+
+    operation = AuditOperation()
+    # handlers of object or Message don't take over the messages of on_message
+    assert operation._dispach_message(TestSimpleMessage(integer=1, string='test')) == 'default'
+    assert operation._dispach_message(PostMessage()) == 'default'
+    assert operation._dispach_message(Message()) == 'any'
+
+def test_deserialize_pickled_message_binary_writable():
+    np = pytest.importorskip('numpy')
+    bh = _BusinessHost()
+    bh.pickle_binary = True
+    msg = bh._deserialize_pickle_message(bh._serialize_pickle_message(TestPickledMessage(integer=1, string=np.arange(10))))
+    # arrays restored from the out-of-band buffers are writable, as with the base64 pickles
+    msg.string[0] = 42
+    assert msg.string[0] == 42
+
+def test_pickle_large_bytes_out_of_band():
+    for value in (b'x' * OutOfBandPickler.OUT_OF_BAND_THRESHOLD, bytearray(OutOfBandPickler.OUT_OF_BAND_THRESHOLD), b'small'):
+        pickler = OutOfBandPickler(io.BytesIO())
+        pickler.dump(TestPickledMessage(integer=1, string=value))
+        frames = pickler.frames()
+        # large fields are written after the pickle, small ones stay in it
+        assert len(frames) == (1 if value == b'small' else 2)
+        assert len(frames[0]) < 1024
+        msg = OutOfBandUnpickler(frames).load()
+        assert type(msg.string) is type(value)
+        assert msg.string == value
+
+def test_orjson_codec_interchangeable():
+    pytest.importorskip('orjson')
+    import uuid
+    from grongier.pex._message_codec import _MessageCodec
+    value = uuid.uuid4()
+    dikt = {'id': value, 'ids': [value], 'date': date(2020, 1, 2), 1: 'int key'}
+    body = _MessageCodec.get('orjson').dumps(dikt)
+    # the body is read back the same way by both codecs
+    assert _MessageCodec.get('json').loads(body) == _MessageCodec.get('orjson').loads(body)
+    assert _MessageCodec.get('orjson').loads(body)['id'] == value
+    assert _MessageCodec.get('orjson').loads(body)['1'] == 'int key'
+    # integers over 64 bits are written by stdlib json
+    assert _MessageCodec.get('orjson').loads(_MessageCodec.get('orjson').dumps({'big': 2**70}))['big'] == 2**70
@@ -0,0 +1,214 @@
+from dataclasses import dataclass
+
+import pytest
+
+from grongier.pex import BusinessProcess
+
+@dataclass
+class Counter:
+    name: str = None
+    value: int = 0
+
+class StatefulProcess(BusinessProcess):
+    PERSISTENT_PROPERTY_LIST = ['targets', 'counters', 'counter', 'done']
+    done = False
+
+class HostObject:
+    """ Stand-in for Grongier.PEX.BusinessProcess, counting the calls."""
+
+    def __init__(self, properties=None):
+        self.state = ''
+        self.properties = properties or {}
+        self.writes = 0
+
+    def getPersistentState(self):
+        return self.state
+
+    def setPersistentState(self, value, append=0):
+        self.writes += 1
+        self.state = (self.state if append else '') + value.decode('latin-1')
+
+    def hasPersistentProperties(self):
+        return len(self.properties) > 0
+
+    def getPersistentProperty(self, name):
+        return self.properties.get(name, '')
+
+def test_persistent_properties_round_trip():
+    host = HostObject()
+    bp = StatefulProcess()
+    bp._restore_persistent_properties(host)
+    bp.targets = ['a', 'b']
+    bp.counters = {'a': 1}
+    bp.counter = Counter('a', 1)
+    bp._save_persistent_properties(host)
+    assert host.writes == 1
+
+    other = StatefulProcess()
+    other._restore_persistent_properties(host)
+    assert other.targets == ['a', 'b']
+    assert other.counters == {'a': 1}
+    assert other.counter == Counter('a', 1)
+    assert other.done == False
+
+def test_persistent_properties_saved_only_if_changed():
+    host = HostObject()
+    bp = StatefulProcess()
+    bp._restore_persistent_properties(host)
+    bp.targets = ['a']
+    bp._save_persistent_properties(host)
+    bp._restore_persistent_properties(host)
+    bp._save_persistent_properties(host)
+    assert host.writes == 1
+    bp.targets.append('b')
+    bp._save_persistent_properties(host)
+    assert host.writes == 2
+
+def test_persistent_properties_reset_between_instances():
+    bp = StatefulProcess()
+    bp._restore_persistent_properties(HostObject())
+    bp.done = True
+    bp._save_persistent_properties(HostObject())
+    # another instance of the process without state gets the class values
+    bp._restore_persistent_properties(HostObject())
+    assert bp.done == False
+    assert not hasattr(bp, 'targets')
+
+def test_persistent_properties_legacy():
+    bp = StatefulProcess()
+    bp._restore_persistent_properties(HostObject({'done': 1}))
+    assert bp.done == 1
+
+class AsyncHooksProcess(StatefulProcess):
+    async def on_init(self):
+        self.targets = ['init']
+
+    async def on_connected(self):
+        self.targets.append('connected')
+
+    async def on_tear_down(self):
+        self.done = True
+
+def test_async_hooks():
+    host = HostObject()
+    bp = AsyncHooksProcess()
+    bp._dispatch_on_init(host)
+    bp._dispatch_on_connected(host)
+    bp._dispatch_on_tear_down(host)
+    # the coroutines are run and their changes saved
+    other = StatefulProcess()
+    other._restore_persistent_properties(host)
+    assert other.targets == ['init', 'connected']
+    assert other.done == True
+
+class AggregateProcess(BusinessProcess):
+
+    def on_responses(self, request, response, calls):
+        self.keys = [call.completion_key for call in calls]
+        return response
+
+    def on_complete(self, request, response):
+        return response
+
+class IrisList:
+    """ Stand-in for %ListOfObjects and %ListOfDataTypes."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def Count(self):
+        return len(self.items)
+
+    def GetAt(self, i):
+        return self.items[i - 1]
+
+def test_coalesce_responses():
+    assert AggregateProcess._coalesce_responses()
+    assert not StatefulProcess._coalesce_responses()
+
+def test_dispatch_on_responses():
+    bp = AggregateProcess()
+    bp._dispatch_on_complete(HostObject(), None, None,
+                             IrisList([None, None]), IrisList([None, None]), IrisList(['1', '2']))
+    assert bp.keys == ['1', '2']
+
+class SequenceProcess(BusinessProcess):
+
+    async def on_request(self, request):
+        first = await self.call('Python.First', request)
+        second, third = await self.gather(self.call('Python.Second', first), self.call('Python.Third', first))
+        self.result = second + third
+
+def test_continuation():
+    host = HostObject()
+    bp = SequenceProcess()
+    sent = []
+    bp.send_request_async = lambda target, request, response_required=True, completion_key=None, description=None: sent.append((target, request, completion_key))
+
+    assert bp._dispatch_on_request(host, 'a') is None
+    assert sent == [('Python.First', 'a', 'iop:0')]
+
+    assert bp._dispatch_on_response(host, 'a', None, 'a', 'b', 'iop:0') is None
+    assert sent[1:] == [('Python.Second', 'b', 'iop:1'), ('Python.Third', 'b', 'iop:2')]
+
+    # waiting for the second response, the coroutine isn't replayed
+    assert bp._dispatch_on_response(host, 'a', None, 'b', 'c', 'iop:2') is None
+    assert bp._dispatch_on_response(host, 'a', None, 'b', 'd', 'iop:1') is None
+    assert bp.result == 'dc'
+    assert len(sent) == 3
+    assert bp._continuation is None
+
+class ReplayProcess(BusinessProcess):
+
+    async def on_request(self, request):
+        self.log_info('start')
+        checked = self.send_request_sync('Python.Check', request)
+        first = await self.call(self.first_target, checked)
+        self.log_info('between')
+        second = await self.call('Python.Second', first)
+        return second
+
+class SyncHandle:
+    """ Stand-in for the IRIS handle of the process, counting the synchronous calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def dispatchSendRequestSync(self, target, request, timeout, description):
+        self.calls.append(target)
+        return request + '!'
+
+def test_continuation_replay(monkeypatch):
+    from grongier.pex._logging import _LogSink
+    logs = []
+    monkeypatch.setattr(_LogSink, 'write', staticmethod(lambda method, source_class, source_method, text, *args: logs.append(text)))
+    host = HostObject()
+    bp = ReplayProcess()
+    bp.first_target = 'Python.First'
+    bp.iris_handle = SyncHandle()
+    # keep the messages as python objects
+    bp._dispatch_serializer = bp._dispatch_deserializer = lambda message: message
+    sent = []
+    bp.send_request_async = lambda target, request, response_required=True, completion_key=None, description=None: sent.append((target, request, completion_key))
+
+    bp._dispatch_on_request(host, 'a')
+    assert sent == [('Python.First', 'a!', 'iop:0')]
+    bp._dispatch_on_response(host, 'a', None, 'a!', 'b', 'iop:0')
+    assert sent[1:] == [('Python.Second', 'b', 'iop:1')]
+    assert bp._dispatch_on_response(host, 'a', None, 'b', 'c', 'iop:1') == 'c'
+    # the code before the await resumed is replayed without its side effects
+    assert bp.iris_handle.calls == ['Python.Check']
+    assert logs == ['start', 'between']
+
+def test_continuation_not_deterministic():
+    host = HostObject()
+    bp = ReplayProcess()
+    bp.first_target = 'Python.First'
+    bp.iris_handle = SyncHandle()
+    bp._dispatch_serializer = bp._dispatch_deserializer = lambda message: message
+    bp.send_request_async = lambda *args, **kwargs: None
+    bp.log_info = lambda message, *args: None
+    bp._dispatch_on_request(host, 'a')
+    bp.first_target = 'Python.Other'
+    with pytest.raises(RuntimeError, match="deterministic"):
+        bp._dispatch_on_response(host, 'a', None, 'a!', 'b', 'iop:0')
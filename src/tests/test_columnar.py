@@ -0,0 +1,51 @@
+import pytest
+
+from grongier.pex._columnar import _Columnar
+from grongier.pex._utils import _Utils
+
+np = pytest.importorskip("numpy")
+
+def roundtrip(dikt):
+    dikt, frames = _Columnar.encode(dikt)
+    payload = b''.join(_Utils.pack_frames(frames))
+    return dikt, _Columnar.decode(dict(dikt), _Utils.unpack_frames(payload))
+
+def test_ndarray():
+    array = np.arange(12, dtype='float32').reshape(3, 4)
+    body, result = roundtrip({'name': 'test', 'array': array})
+    assert body == {'name': 'test', 'array': 'buffer:0'}
+    assert result['array'].dtype == array.dtype
+    assert (result['array'] == array).all()
+
+def test_ndarray_fortran_order():
+    array = np.arange(12).reshape(3, 4).T
+    _, result = roundtrip({'array': array})
+    assert (result['array'] == array).all()
+
+def test_no_buffer():
+    dikt = {'name': 'test', 'list': [1, 2]}
+    result, frames = _Columnar.encode(dikt)
+    assert result is dikt
+    assert frames == []
+
+def test_dataframe():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({'a': np.arange(5), 'b': np.linspace(0, 1, 5)})
+    body, result = roundtrip({'df': df, 'array': np.ones(3)})
+    assert body['df'] == 'buffer:0'
+    assert result['df'].equals(df)
+    assert (result['array'] == np.ones(3)).all()
+
+def test_strings_like_markers():
+    body, result = roundtrip({'note': 'buffer:see attachment', 'other': 'buffer:0', 'array': np.ones(3)})
+    assert body['array'] == 'buffer:0'
+    assert result['note'] == 'buffer:see attachment'
+    assert result['other'] == 'buffer:0'
+    assert (result['array'] == np.ones(3)).all()
+
+def test_second_buffer_index():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({'a': np.arange(5), 'b': np.linspace(0, 1, 5)})
+    body, result = roundtrip({'df': df, 'array': np.arange(3)})
+    assert body['array'] == 'buffer:1'
+    assert (result['array'] == np.arange(3)).all()
@@ -26,6 +26,12 @@ def test_is_pickle_message_class():
     result = _Common._is_pickel_message_class(TestSimpleMessageNotMessage)
     assert result == False
 
+def test_message_kind():
+    assert _Common._message_kind(TestSimpleMessage) == 'message'
+    assert _Common._message_kind(TestPickledMessage) == 'pickle'
+    assert _Common._message_kind(TestSimpleMessageNotMessage) is None
+    assert TestSimpleMessage in _Common._message_kinds
+
 def test_is_iris_object_instance():
     msg = iris.cls('Ens.Request')._New()
     result = _Common._is_iris_object_instance(msg)
@@ -66,6 +72,34 @@ def test_log_info_japanese():
             rs = cursor.fetchall()
             assert len(rs) == 1
 
+def test_log_info_args():
+    commun = _Common()
+    import random, string
+    random_string = ''.join(random.choice(string.ascii_lowercase) for i in range(10))
+    commun.log_info("value=%s", random_string)
+    sql = "SELECT * FROM Ens_Util.Log where SourceClass = '_Common' and SourceMethod = 'test_log_info_args' and Text = ? order by id desc"
+    with irisdbapi.connect(embedded=True) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, ("value=" + random_string,))
+            rs = cursor.fetchall()
+            assert len(rs) == 1
+
+def test_log_level():
+    commun = _Common()
+    commun.log_level = 'Warning'
+    import random, string
+    random_string = ''.join(random.choice(string.ascii_lowercase) for i in range(10))
+    commun.log_info(random_string)
+    # suppressed entries are not formatted
+    commun.log_info("%d", random_string)
+    commun.log_error(random_string)
+    sql = "SELECT Type FROM Ens_Util.Log where SourceClass = '_Common' and SourceMethod = 'test_log_level' and Text = ? order by id desc"
+    with irisdbapi.connect(embedded=True) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, (random_string,))
+            rs = cursor.fetchall()
+            assert len(rs) == 1
+
 def test_get_info():
     # set python path to the registerFiles folder
     path = os.path.dirname(os.path.realpath(__file__))
@@ -0,0 +1,30 @@
+import zlib
+
+import pytest
+
+from grongier.pex._compression import _Compression
+
+def test_compress_zlib():
+    data = b'{"name": "test"}' * 100
+    compressed = _Compression.compress(data, 'zlib')
+    assert len(compressed) < len(data)
+    assert _Compression.decompress(compressed, 'zlib') == data
+
+def test_compress_lzma():
+    data = b'{"name": "test"}' * 100
+    compressed = _Compression.compress(data, 'lzma')
+    assert _Compression.decompress(compressed, 'lzma') == data
+
+def test_compress_zdict():
+    samples = [b'{"status": "DONE", "city": "Paris"}', b'{"status": "NEW", "city": "Boston"}']
+    zdict = _Compression.build_dict(samples)
+    data = b'{"status": "DONE", "city": "Boston"}'
+    compressed = _Compression.compress(data, 'zlib', zdict=zdict)
+    assert len(compressed) < len(_Compression.compress(data, 'zlib'))
+    assert _Compression.decompress(compressed, 'zlib', zdict=zdict) == data
+    with pytest.raises(zlib.error):
+        _Compression.decompress(compressed, 'zlib')
+
+def test_compress_unknown_method():
+    with pytest.raises(ValueError):
+        _Compression.compress(b'data', 'gzip')
@@ -0,0 +1,145 @@
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from grongier.pex import ConnectionPool, OutboundAdapter
+
+class LineHandler(socketserver.StreamRequestHandler):
+    """ Answers PONG to PING, echoes the other lines, closes on QUIT."""
+
+    def handle(self):
+        self.server.connections.append(self.connection)
+        for line in self.rfile:
+            if line.strip() == b'QUIT':
+                return
+            self.wfile.write(b'PONG\n' if line.strip() == b'PING' else line)
+
+@pytest.fixture
+def server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), LineHandler)
+    server.daemon_threads = True
+    server.connections = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+class LineClient:
+
+    def __init__(self, address):
+        self.sock = socket.create_connection(address)
+        self.file = self.sock.makefile('rwb')
+
+    def call(self, text):
+        self.file.write(text.encode() + b'\n')
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionResetError("connection closed by the server")
+        return line.decode().strip()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+def ping(client):
+    return client.call('PING') == 'PONG'
+
+def test_pool_reuse(server):
+    pool = ConnectionPool(lambda: LineClient(server.server_address))
+    for i in range(5):
+        with pool.connection() as client:
+            assert client.call(str(i)) == str(i)
+    stats = pool.stats()
+    assert stats['created'] == 1
+    assert stats['acquired'] == 5
+    assert stats['idle'] == 1
+    assert stats['in_use'] == 0
+    pool.close()
+
+def test_pool_max_size(server):
+    pool = ConnectionPool(lambda: LineClient(server.server_address), max_size=2, timeout=0.1)
+    first = pool.acquire()
+    second = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    threading.Timer(0.05, pool.release, (first,)).start()
+    assert pool.acquire(timeout=5) is first
+    stats = pool.stats()
+    assert stats['created'] == 2
+    assert stats['waits'] == 2
+    assert stats['wait_time'] > 0
+    pool.release(first)
+    pool.release(second)
+    pool.close()
+
+def test_pool_discard_on_os_error(server):
+    pool = ConnectionPool(lambda: LineClient(server.server_address))
+    with pytest.raises(ConnectionResetError):
+        with pool.connection() as client:
+            client.call('QUIT')
+    assert pool.stats()['idle'] == 0
+    with pool.connection() as client:
+        assert client.call('a') == 'a'
+    assert pool.stats()['created'] == 2
+
+def test_pool_evict_idle(server):
+    pool = ConnectionPool(lambda: LineClient(server.server_address), max_idle=0.05)
+    pool.warm_up(2)
+    assert pool.stats()['idle'] == 2
+    time.sleep(0.1)
+    assert pool.evict_idle() == 2
+    assert pool.stats()['evicted'] == 2
+
+def test_pool_health_check(server):
+    pool = ConnectionPool(lambda: LineClient(server.server_address), check=ping)
+    first, second = pool.acquire(), pool.acquire()
+    assert first.call('a') == second.call('a') == 'a'
+    pool.release(first)
+    pool.release(second)
+    # the server drops one of the connections
+    server.connections[0].shutdown(socket.SHUT_RDWR)
+    assert pool.check_idle() == 1
+    assert pool.stats()['idle'] == 1
+
+class LineAdapter(OutboundAdapter):
+    pool_min_size = "2"
+
+    def create_connection(self):
+        return LineClient(self.address)
+
+    def check_connection(self, connection):
+        return ping(connection)
+
+def test_adapter_pool(server):
+    adapter = LineAdapter()
+    adapter.address = server.server_address
+    adapter._dispatch_on_init(None)
+    assert adapter.pool_stats()['created'] == 2
+    with adapter.connection() as client:
+        assert client.call('hello') == 'hello'
+    adapter._dispatch_on_keepalive()
+    assert adapter.pool_stats()['idle'] == 2
+    adapter._dispatch_on_tear_down()
+    assert adapter.pool_stats()['idle'] == 0
+
+def test_pool_warm_up_max_size(server):
+    sizes = []
+    def factory():
+        # the slot of the connection being opened is already counted
+        sizes.append(pool.size)
+        return LineClient(server.server_address)
+    pool = ConnectionPool(factory, max_size=2)
+    assert pool.warm_up(5) == 2
+    assert sizes == [1, 2]
+    stats = pool.stats()
+    assert stats['in_use'] == 0
+    assert stats['idle'] == 2
+    pool.close()
+
+def test_adapter_without_pool():
+    with pytest.raises(RuntimeError, match="create_connection"):
+        OutboundAdapter().get_pool()
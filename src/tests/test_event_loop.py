@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from grongier.pex._event_loop import _EventLoop
+from grongier.pex import BusinessOperation
+
+class AsyncOperation(BusinessOperation):
+
+    async def on_message(self, request):
+        self.loops.append(asyncio.get_running_loop())
+        results = await asyncio.gather(*(asyncio.sleep(0.01, result=i) for i in range(10)))
+        self.total = sum(results)
+        return None
+
+def test_result_not_awaitable():
+    assert _EventLoop.result(1) == 1
+
+def test_result_coroutine():
+    async def coroutine():
+        await asyncio.sleep(0)
+        return 'done'
+    assert _EventLoop.result(coroutine()) == 'done'
+
+def test_loop_kept_across_calls():
+    bo = AsyncOperation()
+    bo.loops = []
+    bo._dispatch_on_init(None)
+    bo._dispatch_on_message(None)
+    bo._dispatch_on_message(None)
+    assert bo.total == 45
+    assert bo.loops[0] is bo.loops[1]
+    bo._dispatch_on_tear_down()
+    assert bo.loops[0].is_closed()
+
+def test_run_while_loop_running():
+    async def inner():
+        return 'inner'
+    async def outer():
+        # in process call of another component of the job
+        return _EventLoop.run(inner())
+    # the inner coroutine isn't run on another thread, away from the thread of the job
+    with pytest.raises(RuntimeError, match="same job"):
+        _EventLoop.run(outer())
@@ -0,0 +1,147 @@
+import io
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from grongier.pex import HttpOutboundAdapter, HttpResponse
+
+BIG = bytes(range(256)) * 1000
+TEXT = 'héllo wörld ✓ ' * 100
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # idle keep-alive connections are closed by the server after timeout seconds
+    timeout = 0.5
+
+    def do_GET(self):
+        if self.path == '/big':
+            self.answer(BIG, 'application/octet-stream')
+        elif self.path == '/text':
+            self.answer(TEXT.encode(), 'text/plain; charset=utf-8')
+        elif self.path.startswith('/slow'):
+            time.sleep(0.1)
+            self.answer(json.dumps({'path': self.path}).encode())
+        else:
+            self.answer(json.dumps({'path': self.path}).encode())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.answer(body, self.headers['Content-Type'])
+
+    def answer(self, body, content_type='application/json'):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def adapter():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    adapter = HttpOutboundAdapter()
+    adapter.base_url = 'http://127.0.0.1:%d/api/' % server.server_address[1]
+    yield adapter
+    adapter._dispatch_on_tear_down()
+    server.shutdown()
+    server.server_close()
+
+def stats(adapter):
+    return list(adapter.pool_stats().values())[0]
+
+def test_keep_alive(adapter):
+    for i in range(5):
+        response = adapter.get('item/' + str(i))
+        assert isinstance(response, HttpResponse)
+        assert response.status == 200
+        assert response.json() == {'path': '/api/item/' + str(i)}
+    assert stats(adapter)['created'] == 1
+    assert stats(adapter)['acquired'] == 5
+
+def test_post_json(adapter):
+    response = adapter.post('echo', {'a': 1})
+    assert response.json() == {'a': 1}
+    assert response.headers['content-type'] == 'application/json'
+
+def test_stale_connection(adapter):
+    adapter.get('first')
+    # the server closes the idle connection
+    time.sleep(1)
+    assert adapter.get('second').ok
+    assert stats(adapter)['created'] == 2
+
+def test_stale_connection_post(adapter):
+    adapter.post('first', b'1')
+    time.sleep(1)
+    # a POST may have reached the server, it isn't sent twice
+    with pytest.raises(OSError):
+        adapter.post('second', b'2')
+    assert adapter.post('third', b'3').ok
+
+class IrisStream:
+    """ Stand-in for an IRIS stream, Write takes a string."""
+
+    def __init__(self, character):
+        self.character = character
+        self.chunks = []
+        self.threads = set()
+
+    def IsCharacter(self):
+        return self.character
+
+    def Write(self, string):
+        self.threads.add(threading.get_ident())
+        self.chunks.append(string)
+
+def test_stream_to_iris_stream(adapter):
+    # chunks split the multibyte characters
+    adapter.chunk_size = 7
+    stream = IrisStream(True)
+    adapter.get('/text', stream_to=stream)
+    assert ''.join(stream.chunks) == TEXT
+    stream = IrisStream(False)
+    adapter.get('/text', stream_to=stream)
+    assert ''.join(stream.chunks).encode('latin-1') == TEXT.encode()
+
+def test_stream_to(adapter):
+    stream = io.BytesIO()
+    response = adapter.get('/big', stream_to=stream)
+    assert response.body is None
+    assert response.length == len(BIG)
+    assert stream.getvalue() == BIG
+
+def test_request_many(adapter):
+    adapter.pool_size = 4
+    start = time.perf_counter()
+    responses = adapter.request_many([('GET', 'slow/' + str(i)) for i in range(8)] + [{'method': 'GET', 'url': 'http://127.0.0.1:1/'}])
+    elapsed = time.perf_counter() - start
+    assert [r.json()['path'] for r in responses[:8]] == ['/api/slow/' + str(i) for i in range(8)]
+    assert isinstance(responses[8], OSError)
+    # 8 calls of 0.1s on 4 connections
+    assert elapsed < 0.6
+    assert stats(adapter)['created'] <= 4
+
+def test_request_many_iris_stream(adapter):
+    streams = [IrisStream(True) for i in range(3)]
+    responses = adapter.request_many([('GET', '/text', None, None, stream) for stream in streams] + [('GET',)])
+    assert all(response.ok for response in responses[:3])
+    assert isinstance(responses[3], TypeError)
+    for stream in streams:
+        assert ''.join(stream.chunks) == TEXT
+        # the IRIS streams are written by the calling thread only
+        assert stream.threads == {threading.get_ident()}
+
+def test_warm_up(adapter):
+    adapter.pool_min_size = 2
+    adapter._dispatch_on_init(None)
+    assert stats(adapter)['idle'] == 2
+    adapter._dispatch_on_keepalive()
+    assert stats(adapter)['idle'] == 2
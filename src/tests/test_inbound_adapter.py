@@ -0,0 +1,112 @@
+from grongier.pex import InboundAdapter, BusinessService
+
+class BulkService(BusinessService):
+
+    def on_init(self):
+        self.batches = []
+
+    def process_inputs(self, messages):
+        self.batches.append(list(messages))
+
+class BusinessHost:
+    """ Stand-in for Grongier.PEX.BusinessService, calling the service in process."""
+
+    def __init__(self, service):
+        self.service = service
+        self.calls = 0
+
+    def dispatchProcessInputs(self, inputs):
+        self.calls += 1
+        self.service._dispatch_process_inputs(inputs)
+
+    def ProcessInput(self, message):
+        self.calls += 1
+        self.service._dispatch_on_process_input(message)
+
+class Feed(InboundAdapter):
+    batch_delivery = True
+    max_batch = 2
+
+    def on_task(self):
+        for i in range(5):
+            self.read = i
+            yield i
+
+class AsyncFeed(InboundAdapter):
+    batch_delivery = True
+    max_batch = 3
+
+    async def on_task(self):
+        for i in range(4):
+            yield i
+
+def make_adapter(klass):
+    service = BulkService()
+    service.on_init()
+    adapter = klass()
+    adapter.business_host = BusinessHost(service)
+    adapter.business_host_python = service
+    return adapter, service
+
+def test_on_task_generator():
+    adapter, service = make_adapter(Feed)
+    adapter._dispatch_on_task()
+    assert service.batches == [[0, 1], [2, 3], [4]]
+    assert adapter.business_host.calls == 3
+
+def test_on_task_streaming():
+    adapter, service = make_adapter(Feed)
+    batches = adapter._batches(adapter.on_task(), 2)
+    next(batches)
+    assert adapter.read == 1
+
+def test_on_task_async_generator():
+    adapter, service = make_adapter(AsyncFeed)
+    adapter._dispatch_on_task()
+    assert service.batches == [[0, 1, 2], [3]]
+
+def test_on_task_list_without_bulk():
+    adapter, service = make_adapter(Feed)
+    adapter.business_host_python = None
+    received = []
+    service.on_process_input = received.append
+    adapter.on_task = lambda: [1, 2, 3]
+    adapter._dispatch_on_task()
+    assert received == [1, 2, 3]
+    assert adapter.business_host.calls == 3
+
+def test_on_task_list_without_batch_delivery():
+    adapter, service = make_adapter(Feed)
+    adapter.batch_delivery = "0"
+    adapter.on_task = lambda: [1, 2, 3]
+    # the returned value is left to the adapter
+    adapter._dispatch_on_task()
+    assert adapter.business_host.calls == 0
+
+class HostObject:
+    """ Stand-in for Grongier.PEX.InboundAdapter."""
+    CallInterval = 4
+
+class PollingFeed(InboundAdapter):
+    adaptive_polling = "1"
+    polling_min_interval = "0.5"
+
+    def on_task(self):
+        return self.pending.pop(0)
+
+def test_adaptive_polling():
+    adapter, service = make_adapter(PollingFeed)
+    adapter.iris_handle = HostObject()
+    adapter.log_assert = lambda message, *args: None
+    adapter.pending = [[1, 2], 3, 0, None, [], 0, 0, 0, 1]
+    intervals = [adapter._dispatch_on_task() for i in range(9)]
+    assert intervals == [0, 0, 0.5, 1.0, 2.0, 4, 4, 4, 0]
+    stats = adapter.polling_stats()
+    assert stats['polls'] == 9
+    assert stats['hits'] == 3
+    assert stats['interval'] == 0
+
+def test_polling_off():
+    adapter, service = make_adapter(Feed)
+    assert adapter._dispatch_on_task() is None
+    assert adapter.polling_stats()['polls'] == 0
@@ -0,0 +1,62 @@
+import logging
+import random
+import string
+
+import intersystems_iris.dbapi._DBAPI as irisdbapi
+
+from grongier.pex._logging import _LogSink
+from grongier.pex import LogHandler
+
+def random_string():
+    return ''.join(random.choice(string.ascii_lowercase) for i in range(10))
+
+def count_entries(source_class, text):
+    sql = "SELECT count(*) FROM Ens_Util.Log where SourceClass = ? and Text = ?"
+    with irisdbapi.connect(embedded=True) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, (source_class, text))
+            return cursor.fetchone()[0]
+
+def test_sink_buffered():
+    text = random_string()
+    flushes = _LogSink.flushes
+    _LogSink.write('LogInfo', 'test_logging', 'test_sink_buffered', text, size=2, interval=60)
+    assert count_entries('test_logging', text) == 0
+    _LogSink.write('LogInfo', 'test_logging', 'test_sink_buffered', text, size=2, interval=60)
+    assert count_entries('test_logging', text) == 2
+    assert _LogSink.flushes == flushes + 1
+
+def test_sink_repeat_limit():
+    text = random_string()
+    dropped = _LogSink.dropped
+    for i in range(5):
+        _LogSink.write('LogWarning', 'test_logging', 'test_sink_repeat_limit', text, size=100, interval=60, repeat_limit=2)
+    _LogSink.flush()
+    assert _LogSink.dropped == dropped + 3
+    assert count_entries('test_logging', text) == 2
+    assert count_entries('test_logging', 'Identical entry repeated 3 more times: ' + text) == 1
+
+def test_log_handler():
+    text = random_string()
+    logger = logging.getLogger('test_logging.handler')
+    handler = LogHandler(size=100, interval=60)
+    logger.addHandler(handler)
+    try:
+        logger.warning(text)
+        assert _LogSink.stats()['buffered'] >= 1
+        handler.flush()
+        assert count_entries('test_logging.handler', text) == 1
+    finally:
+        logger.removeHandler(handler)
+
+def test_flush_after_dispatch():
+    text = random_string()
+
+    @_LogSink.flush_after
+    def dispatch():
+        _LogSink.write('LogInfo', 'test_logging', 'test_flush_after_dispatch', text, size=100, interval=60)
+        assert count_entries('test_logging', text) == 0
+
+    dispatch()
+    # the entries of a message are written when its handling ends, even if no other entry follows
+    assert count_entries('test_logging', text) == 1
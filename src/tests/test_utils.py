@@ -242,4 +242,21 @@ def test_migrate_only_classes():
         # Act
         _Utils.migrate('/path/to/settings/settings.py')
         # Assert
-        assert True # if no exception is raised, the test is ok
\ No newline at end of file
+        assert True # if no exception is raised, the test is ok
+
+def test_string_to_stream_roundtrip():
+    # a payload spanning several chunks, with a partial last chunk
+    string = 'あいうえお' * 1000 + 'end'
+    stream = _Utils.string_to_stream(string, 4092)
+    result = _Utils.stream_to_string(stream, 4092)
+
+    assert result == string
+
+def test_iter_chunks():
+    result = list(_Utils.iter_chunks('abcdefg', 3))
+    assert result == ['abc', 'def', 'g']
+    # bytes are sliced through a memoryview
+    result = list(_Utils.iter_chunks(b'abcdefg', 3))
+    assert result == [b'abc', b'def', b'g']
+    # the chunk size is clamped to the iris string limit
+    assert _Utils._chunk_size(10**9) == 3641144